@@ -12,7 +12,6 @@ import time
 from datetime import datetime
 from typing import Dict, List, Any, Optional
 from decimal import Decimal, ROUND_DOWN
-from difflib import SequenceMatcher
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -50,6 +49,17 @@ class EnhancedDryRunTrader:
                 "news_analysis": []
             }
             
+            # Лексический индекс рынков Gamma (BM25), переиспользуется между анализами
+            self._market_index = None
+            self._market_index_markets: Dict[str, Dict[str, Any]] = {}
+            self._market_index_built_at = 0.0
+            # NewsRAG создаётся один раз; хранилище общее для процесса (vectorstores.STORES)
+            self._newsrag = None
+            try:
+                self._market_index_ttl = float(os.getenv("MARKET_INDEX_TTL_SECS", "300"))
+            except Exception:
+                self._market_index_ttl = 300.0
+
             # Проверяем доступность MCP
             self._check_mcp_availability()
             
@@ -75,38 +85,57 @@ class EnhancedDryRunTrader:
             logger.error(f"Error initializing EnhancedDryRunTrader: {e}")
             raise
 
+    def _get_market_index(self):
+        """BM25-индекс по вопросам активных рынков; перестраивается раз в MARKET_INDEX_TTL_SECS."""
+        if self._market_index is not None and time.time() - self._market_index_built_at < self._market_index_ttl:
+            return self._market_index
+        from agents.polymarket.gamma import GammaMarketClient
+        from agents.connectors.bm25 import BM25Index
+
+        candidates = GammaMarketClient().get_all_current_markets(limit=200)
+        index = BM25Index()
+        markets: Dict[str, Dict[str, Any]] = {}
+        for m in candidates or []:
+            question = m.get("question") or ""
+            if not question:
+                continue
+            key = str(m.get("id"))
+            index.add(key, question)
+            markets[key] = m
+        self._market_index = index
+        self._market_index_markets = markets
+        self._market_index_built_at = time.time()
+        return index
+
+    def _get_newsrag(self):
+        """NewsRAG, переиспользуемый между анализами"""
+        if self._newsrag is None:
+            from agents.connectors.news_rag import NewsRAG
+            self._newsrag = NewsRAG()
+        return self._newsrag
+
     def _find_best_market_match(self, query: str) -> Optional[Dict[str, Any]]:
-        """Поиск наиболее похожего рынка по тексту вопроса через Gamma API.
+        """Поиск наиболее похожего рынка по тексту вопроса (BM25 по рынкам Gamma).
         Возвращает dict с полями question, slug, id при успехе.
         """
         try:
-            from agents.polymarket.gamma import GammaMarketClient
-            client = GammaMarketClient()
-            # Забираем батч активных рынков и ищем лучшую текстовую схожесть
-            candidates = client.get_all_current_markets(limit=200)
-            if not candidates:
+            index = self._get_market_index()
+            hits = index.search(query or "", k=1)
+            if not hits:
+                return None
+            key, _ = hits[0]
+            # Требуем, чтобы совпала хотя бы половина (по IDF) значимых слов запроса
+            if index.coverage(query or "", key) < 0.5:
                 return None
-            best = None
-            best_score = 0.0
-            qlow = (query or "").lower()
-            for m in candidates:
-                question = (m.get("question") or "").lower()
-                if not question:
-                    continue
-                score = SequenceMatcher(None, qlow, question).ratio()
-                if score > best_score:
-                    best_score = score
-                    best = m
-            if best and best_score >= 0.5:
-                return {
-                    "id": best.get("id"),
-                    "question": best.get("question"),
-                    "slug": best.get("slug"),
-                }
+            best = self._market_index_markets[key]
+            return {
+                "id": best.get("id"),
+                "question": best.get("question"),
+                "slug": best.get("slug"),
+            }
         except Exception as _:
             return None
-        return None
-    
+
     def _check_mcp_availability(self):
         """Проверяет доступность MCP сервера"""
         try:
@@ -188,9 +217,7 @@ class EnhancedDryRunTrader:
             # Дополнительно: подтягиваем топ‑новости из локального RAG (без отправки в Telegram)
             rag_news = []
             try:
-                from agents.connectors.news_rag import NewsRAG
-                newsrag = NewsRAG()
-                rag_hits = newsrag.query_news(market_query, top_k=3)
+                rag_hits = self._get_newsrag().query_news(market_query, top_k=3)
                 for meta, _ in rag_hits:
                     title = (meta.get("title") or "No title").strip()
                     url = meta.get("url") or ""
@@ -254,9 +281,7 @@ class EnhancedDryRunTrader:
             logger.warning(f"Fallback: Could not get news from The Verge: {e}")
         # Пробуем RAG локально
         try:
-            from agents.connectors.news_rag import NewsRAG
-            newsrag = NewsRAG()
-            rag_hits = newsrag.query_news(market_query, top_k=3)
+            rag_hits = self._get_newsrag().query_news(market_query, top_k=3)
             for meta, _ in rag_hits:
                 title = (meta.get("title") or "No title").strip()
                 url = meta.get("url") or ""
@@ -2,32 +2,63 @@ import os
 import json
 import ast
 import re
-from typing import List, Dict, Any
+import asyncio
+import logging
+import time
+import weakref
+from typing import List, Dict, Any, Coroutine, Optional
 
 import math
 
+import httpx
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    AsyncOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
 
 from agents.polymarket.gamma import GammaMarketClient as Gamma
 from agents.utils.objects import SimpleEvent, SimpleMarket
 from agents.application.prompts import Prompter
 from agents.polymarket.polymarket import Polymarket
 from agents.utils.market_dto import normalize_market
+from agents.utils.llm_scheduler import get_llm_scheduler, priority_for, retry_after_seconds
+from agents.utils.async_runtime import get_runtime
+from agents.utils.metrics import observe_llm_call
+from agents.utils.trading_config import trading_config
+from agents.application.model_router import ModelRouter
 
-def retain_keys(data, keys_to_retain):
-    if isinstance(data, dict):
-        return {
-            key: retain_keys(value, keys_to_retain)
-            for key, value in data.items()
-            if key in keys_to_retain
-        }
-    elif isinstance(data, list):
-        return [retain_keys(item, keys_to_retain) for item in data]
-    else:
-        return data
+logger = logging.getLogger(__name__)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except Exception:
+        return default
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except Exception:
+        return default
+
+
+class AsyncExecutor:
+    """
+    Event-loop-native executor built on AsyncOpenAI.
+    - One AsyncOpenAI/httpx client per instance, so connections are reused across calls
+    - Per-request timeout via LLM_REQUEST_TIMEOUT_SECS (default 60s)
+    - In-flight LLM requests bounded by LLM_MAX_CONCURRENCY (default 4)
+    - Admission, priorities and 429 backoff handled by the shared LLMScheduler
+    - Model, context limit and timeout chosen per call site by ModelRouter
+    Blocking Gamma/CLOB calls are pushed to worker threads so they overlap with LLM latency.
+    """
 
-class Executor:
     def __init__(self, default_model='gpt-3.5-turbo-16k') -> None:
         load_dotenv()
         # Disable Chroma telemetry by default to avoid readonly DB writes
@@ -35,12 +66,38 @@ class Executor:
             os.environ.setdefault("CHROMADB_DISABLE_TELEMETRY", "true")
         except Exception:
             pass
-        max_token_model = {'gpt-3.5-turbo-16k':15000, 'gpt-4-1106-preview':95000}
-        self.token_limit = max_token_model.get(default_model)
         self.prompter = Prompter()
         self.openai_api_key = os.getenv("OPENAI_API_KEY")
         self.default_model = default_model
-        self.client = OpenAI(api_key=self.openai_api_key)
+        self.request_timeout = _env_float("LLM_REQUEST_TIMEOUT_SECS", 60.0)
+        # Per-stage model/context/timeout; the default route covers unrouted call sites
+        self.router = ModelRouter.from_config(trading_config, default_model, self.request_timeout)
+        self.token_limit = self.router.default_route.context_limit
+        # Optional JSONL log of prompts/responses for replaying through candidate routes
+        self.record_prompts_path = os.getenv("LLM_RECORD_PROMPTS", "")
+        self.max_concurrency = max(1, _env_int("LLM_MAX_CONCURRENCY", 4))
+        self.max_retries = max(0, _env_int("LLM_MAX_RETRIES", 2))
+        self.retry_backoff = _env_float("LLM_RETRY_BACKOFF_SECS", 1.5)
+        # Room reserved for the completion when charging the TPM bucket up front
+        self.completion_token_reserve = _env_int("LLM_COMPLETION_TOKEN_RESERVE", 512)
+        self.scheduler = get_llm_scheduler()
+        # Retries are driven by _chat so that 429s go through the scheduler
+        self.client = AsyncOpenAI(
+            api_key=self.openai_api_key,
+            timeout=self.request_timeout,
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                timeout=self.request_timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency * 2,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            ),
+        )
+        # Semaphores bind to a loop (on Python < 3.10 at construction), so one per loop, created on first use
+        self._semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
         self.gamma = Gamma()
         # Lazy init RAG only if explicitly enabled
         self.chroma = None
@@ -52,36 +109,102 @@ class Executor:
                 self.chroma = None
         self.polymarket = Polymarket()
 
-    def _chat(self, prompt_text: str) -> str:
-        response = self.client.chat.completions.create(
-            model=self.default_model,
-            messages=[{"role": "user", "content": prompt_text}],
-            temperature=0,
-        )
-        return response.choices[0].message.content
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
 
-    def get_llm_response(self, user_input: str) -> str:
+    async def _chat(self, prompt_text: str, call_site: str = "chat") -> str:
+        priority = priority_for(call_site)
+        input_tokens = self.estimate_tokens(prompt_text)
+        route = self.router.route(call_site, input_tokens)
+        estimated = input_tokens + self.completion_token_reserve
+        attempt = 0
+        while True:
+            await self.scheduler.acquire(priority, estimated)
+            model = route.model
+            try:
+                async with self._get_semaphore():
+                    started = time.perf_counter()
+                    try:
+                        response = await self.client.chat.completions.create(
+                            model=model,
+                            messages=[{"role": "user", "content": prompt_text}],
+                            temperature=0,
+                            timeout=route.timeout,
+                        )
+                    except Exception as e:
+                        observe_llm_call(
+                            call_site, model, time.perf_counter() - started, status=type(e).__name__
+                        )
+                        raise
+                    latency = time.perf_counter() - started
+            except RateLimitError as e:
+                headers = getattr(getattr(e, "response", None), "headers", None)
+                self.scheduler.on_rate_limited(retry_after_seconds(headers))
+                # The rejected request consumed no quota; acquire() charges the retry again
+                self.scheduler.refund(estimated)
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                continue
+            except (APITimeoutError, APIConnectionError, InternalServerError):
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                await asyncio.sleep(self.retry_backoff * attempt)
+                continue
+            usage = getattr(response, "usage", None)
+            prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+            completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+            observe_llm_call(call_site, model, latency, prompt_tokens, completion_tokens)
+            logger.info(
+                f"LLM {call_site} model={model} latency={latency:.2f}s "
+                f"tokens={prompt_tokens}+{completion_tokens}"
+            )
+            self.scheduler.record_usage(estimated, getattr(usage, "total_tokens", None))
+            content = response.choices[0].message.content
+            if self.record_prompts_path:
+                self._record_prompt(call_site, model, prompt_text, content, latency)
+            return content
+
+    def _record_prompt(self, call_site: str, model: str, prompt: str, response: str, latency: float) -> None:
+        try:
+            with open(self.record_prompts_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({
+                    "call_site": call_site,
+                    "model": model,
+                    "prompt": prompt,
+                    "response": response,
+                    "latency": latency,
+                }, ensure_ascii=False) + "\n")
+        except Exception as e:
+            logger.warning(f"Failed to record prompt: {e}")
+
+    async def get_llm_response(self, user_input: str) -> str:
         system_text = str(self.prompter.market_analyst())
         combined = f"{system_text}\n\n{user_input}"
-        return self._chat(combined)
+        return await self._chat(combined, call_site="market_analyst")
 
-    def get_superforecast(
+    async def get_superforecast(
         self, event_title: str, market_question: str, outcome: str
     ) -> str:
         messages = self.prompter.superforecaster(
             description=event_title, question=market_question, outcome=outcome
         )
-        return self._chat(messages)
+        return await self._chat(messages, call_site="superforecaster")
 
 
     def estimate_tokens(self, text: str) -> int:
         # This is a rough estimate. For more accurate results, consider using a tokenizer.
         return len(text) // 4  # Assuming average of 4 characters per token
 
-    def process_data_chunk(self, data1: List[Dict[Any, Any]], data2: List[Dict[Any, Any]], user_input: str) -> str:
+    async def process_data_chunk(self, data1: List[Dict[Any, Any]], data2: List[Dict[Any, Any]], user_input: str) -> str:
         system_text = str(self.prompter.prompts_polymarket(data1=data1, data2=data2))
         combined = f"{system_text}\n\n{user_input}"
-        return self._chat(combined)
+        return await self._chat(combined, call_site="polymarket_llm")
 
 
     def divide_list(self, original_list, i):
@@ -91,79 +214,72 @@ class Executor:
         # Use list comprehension to create sublists
         return [original_list[j:j+sublist_size] for j in range(0, len(original_list), sublist_size)]
     
-    def get_polymarket_llm(self, user_input: str) -> str:
-        data1 = self.gamma.get_current_events()
-        data2 = self.gamma.get_current_markets()
+    async def get_polymarket_llm(self, user_input: str) -> str:
+        # Fetch events and markets concurrently instead of back to back
+        data1, data2 = await asyncio.gather(
+            asyncio.to_thread(self.gamma.get_current_events),
+            asyncio.to_thread(self.gamma.get_current_markets),
+        )
         
         combined_data = str(self.prompter.prompts_polymarket(data1=data1, data2=data2))
         
         # Estimate total tokens
         total_tokens = self.estimate_tokens(combined_data)
         
-        # Set a token limit (adjust as needed, leaving room for system and user messages)
-        token_limit = self.token_limit
+        # Context limit of the model this stage is routed to for an input of this size
+        token_limit = self.router.route("polymarket_llm", total_tokens).context_limit
         if total_tokens <= token_limit:
             # If within limit, process normally
-            return self.process_data_chunk(data1, data2, user_input)
+            return await self.process_data_chunk(data1, data2, user_input)
         else:
             # If exceeding limit, process in chunks
-            chunk_size = len(combined_data) // ((total_tokens // token_limit) + 1)
-            print(f'total tokens {total_tokens} exceeding llm capacity, now will split and answer')
+            logger.info(f'total tokens {total_tokens} exceeding llm capacity, now will split and answer')
             group_size = (total_tokens // token_limit) + 1 # 3 is safe factor
-            keys_no_meaning = ['image','pagerDutyNotificationEnabled','resolvedBy','endDate','clobTokenIds','negRiskMarketID','conditionId','updatedAt','startDate']
-            useful_keys = ['id','questionID','description','liquidity','clobTokenIds','outcomes','outcomePrices','volume','startDate','endDate','question','questionID','events']
-            data1 = retain_keys(data1, useful_keys)
             cut_1 = self.divide_list(data1, group_size)
             cut_2 = self.divide_list(data2, group_size)
-            cut_data_12 = zip(cut_1, cut_2)
-
-            results = []
-
-            for cut_data in cut_data_12:
-                sub_data1 = cut_data[0]
-                sub_data2 = cut_data[1]
-                sub_tokens = self.estimate_tokens(str(self.prompter.prompts_polymarket(data1=sub_data1, data2=sub_data2)))
 
-                result = self.process_data_chunk(sub_data1, sub_data2, user_input)
-                results.append(result)
+            # Chunks are independent, so send them concurrently (bounded by the semaphore)
+            results = await asyncio.gather(
+                *(
+                    self.process_data_chunk(sub_data1, sub_data2, user_input)
+                    for sub_data1, sub_data2 in zip(cut_1, cut_2)
+                )
+            )
             
             combined_result = " ".join(results)
             
-        
-            
             return combined_result
-    def filter_events(self, events: "list[SimpleEvent]") -> str:
+
+    async def filter_events(self, events: "list[SimpleEvent]") -> str:
         prompt = self.prompter.filter_events(events)
-        return self._chat(prompt)
+        return await self._chat(prompt, call_site="filter_events")
 
     def filter_events_with_rag(self, events: "list[SimpleEvent]") -> str:
         if not self.chroma:
             return []
         prompt = self.prompter.filter_events()
-        print()
-        print("... prompting ... ", prompt)
-        print()
+        logger.debug(f"... prompting ... {prompt}")
         return self.chroma.events(events, prompt)
 
-    def map_filtered_events_to_markets(
+    async def map_filtered_events_to_markets(
         self, filtered_events: "list[SimpleEvent]"
     ) -> "list[SimpleMarket]":
-        markets = []
+        market_ids = []
         for e in filtered_events:
             data = json.loads(e[0].json())
-            market_ids = data["metadata"]["markets"].split(",")
-            for market_id in market_ids:
-                market_data = self.gamma.get_market(market_id)
-                markets.append(market_data)
-        return markets
+            market_ids.extend(data["metadata"]["markets"].split(","))
+        # Gamma lookups are blocking; run them side by side in worker threads
+        return list(
+            await asyncio.gather(
+                *(asyncio.to_thread(self.gamma.get_market, market_id) for market_id in market_ids)
+            )
+        )
 
     def filter_markets(self, markets) -> "list[tuple]":
         if not self.chroma:
             return []
         prompt = self.prompter.filter_markets()
-        print()
-        print("... prompting ... ", prompt)
-        print()
+        logger.debug(f"... prompting ... {prompt}")
         return self.chroma.markets(markets, prompt)
 
     def filter_markets_simple(self, markets) -> list[dict]:
@@ -195,7 +311,7 @@ class Executor:
         # return top 20
         return normalized[:20]
 
-    def source_best_trade(self, market_object) -> str:
+    async def source_best_trade(self, market_object) -> str:
         # Универсальная распаковка разных форматов market_object
         market = None
         description = ""
@@ -231,7 +347,11 @@ class Executor:
                 raw_ids = n.get("clobTokenIds", [])
                 token_ids = raw_ids
                 if isinstance(token_ids, list) and token_ids:
-                    price = float(self.polymarket.get_orderbook_price_cached(str(token_ids[0])))
+                    price = float(
+                        await asyncio.to_thread(
+                            self.polymarket.get_orderbook_price_cached, str(token_ids[0])
+                        )
+                    )
                     price = max(0.01, min(0.99, price))
                     outcome_prices = [price, round(1.0 - price, 4)]
                 if not outcomes:
@@ -240,20 +360,15 @@ class Executor:
                 pass
 
         prompt = self.prompter.superforecaster(question, description, outcomes)
-        print()
-        print("... prompting ... ", prompt)
-        print()
-        content = self._chat(prompt)
+        logger.debug(f"... prompting ... {prompt}")
+        content = await self._chat(prompt, call_site="superforecaster")
 
-        print("result: ", content)
-        print()
+        logger.debug(f"result: {content}")
         prompt = self.prompter.one_best_trade(content, outcomes, outcome_prices)
-        print("... prompting ... ", prompt)
-        print()
-        content = self._chat(prompt)
+        logger.debug(f"... prompting ... {prompt}")
+        content = await self._chat(prompt, call_site="one_best_trade")
 
-        print("result: ", content)
-        print()
+        logger.debug(f"result: {content}")
         return content
 
     def format_trade_prompt_for_execution(self, best_trade: str) -> float:
@@ -263,10 +378,98 @@ class Executor:
         usdc_balance = self.polymarket.get_usdc_balance()
         return float(size) * usdc_balance
 
-    def source_best_market_to_create(self, filtered_markets) -> str:
+    async def source_best_market_to_create(self, filtered_markets) -> str:
         prompt = self.prompter.create_new_market(filtered_markets)
-        print()
-        print("... prompting ... ", prompt)
-        print()
-        content = self._chat(prompt)
+        logger.debug(f"... prompting ... {prompt}")
+        content = await self._chat(prompt, call_site="create_new_market")
         return content
+
+
+class Executor:
+    """
+    Blocking facade over AsyncExecutor for the existing sync callers (traders, CLI).
+    Coroutines are submitted to the process-wide async runtime loop, so the AsyncOpenAI
+    connection pool survives between calls.
+    """
+
+    def __init__(self, default_model='gpt-3.5-turbo-16k') -> None:
+        self.async_executor = AsyncExecutor(default_model=default_model)
+        self._runtime = get_runtime()
+
+    def _run(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        return self._runtime.run(coro)
+
+    @property
+    def default_model(self) -> str:
+        return self.async_executor.default_model
+
+    @property
+    def token_limit(self) -> Optional[int]:
+        return self.async_executor.token_limit
+
+    @property
+    def prompter(self) -> Prompter:
+        return self.async_executor.prompter
+
+    @property
+    def gamma(self) -> Gamma:
+        return self.async_executor.gamma
+
+    @property
+    def polymarket(self) -> Polymarket:
+        return self.async_executor.polymarket
+
+    @property
+    def chroma(self):
+        return self.async_executor.chroma
+
+    def _chat(self, prompt_text: str, call_site: str = "chat") -> str:
+        return self._run(self.async_executor._chat(prompt_text, call_site=call_site))
+
+    def get_llm_response(self, user_input: str) -> str:
+        return self._run(self.async_executor.get_llm_response(user_input))
+
+    def get_superforecast(
+        self, event_title: str, market_question: str, outcome: str
+    ) -> str:
+        return self._run(
+            self.async_executor.get_superforecast(event_title, market_question, outcome)
+        )
+
+    def estimate_tokens(self, text: str) -> int:
+        return self.async_executor.estimate_tokens(text)
+
+    def process_data_chunk(self, data1: List[Dict[Any, Any]], data2: List[Dict[Any, Any]], user_input: str) -> str:
+        return self._run(self.async_executor.process_data_chunk(data1, data2, user_input))
+
+    def divide_list(self, original_list, i):
+        return self.async_executor.divide_list(original_list, i)
+
+    def get_polymarket_llm(self, user_input: str) -> str:
+        return self._run(self.async_executor.get_polymarket_llm(user_input))
+
+    def filter_events(self, events: "list[SimpleEvent]") -> str:
+        return self._run(self.async_executor.filter_events(events))
+
+    def filter_events_with_rag(self, events: "list[SimpleEvent]") -> str:
+        return self.async_executor.filter_events_with_rag(events)
+
+    def map_filtered_events_to_markets(
+        self, filtered_events: "list[SimpleEvent]"
+    ) -> "list[SimpleMarket]":
+        return self._run(self.async_executor.map_filtered_events_to_markets(filtered_events))
+
+    def filter_markets(self, markets) -> "list[tuple]":
+        return self.async_executor.filter_markets(markets)
+
+    def filter_markets_simple(self, markets) -> list[dict]:
+        return self.async_executor.filter_markets_simple(markets)
+
+    def source_best_trade(self, market_object) -> str:
+        return self._run(self.async_executor.source_best_trade(market_object))
+
+    def format_trade_prompt_for_execution(self, best_trade: str) -> float:
+        return self.async_executor.format_trade_prompt_for_execution(best_trade)
+
+    def source_best_market_to_create(self, filtered_markets) -> str:
+        return self._run(self.async_executor.source_best_market_to_create(filtered_markets))
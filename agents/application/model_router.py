@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+# Usable input tokens per model (leaves room for the completion)
+MODEL_CONTEXT_LIMITS = {
+    "gpt-3.5-turbo": 15000,
+    "gpt-3.5-turbo-16k": 15000,
+    "gpt-4-1106-preview": 95000,
+    "gpt-4-turbo": 95000,
+    "gpt-4o": 120000,
+    "gpt-4o-mini": 120000,
+}
+DEFAULT_CONTEXT_LIMIT = 15000
+
+# Stages that only filter/extract/format go to the small model
+SMALL_MODEL_CALL_SITES = ("filter_events", "polymarket_llm", "one_best_trade", "create_new_market")
+# Forecasting stages keep the large model
+LARGE_MODEL_CALL_SITES = ("superforecaster", "market_analyst")
+
+
+@dataclass(frozen=True)
+class Route:
+    model: str
+    context_limit: int
+    timeout: float
+
+
+class ModelRouter:
+    """
+    Picks model, context limit and timeout per call site and input size.
+    Each call site has an escalation chain; the first route whose context fits
+    the input wins, otherwise the route with the largest context is used.
+    - default_model (the executor's model) is the large tier and the default route
+    - enabled (LLM_ROUTING, off by default) sends filtering/formatting stages to small_model
+    - routes (LLM_ROUTES) are explicit per-site overrides and apply either way
+    """
+
+    def __init__(
+        self,
+        default_model: str,
+        default_timeout: float = 60.0,
+        small_model: Optional[str] = None,
+        routes: Optional[Dict[str, Any]] = None,
+        enabled: bool = False,
+    ) -> None:
+        self.default_timeout = default_timeout
+        self.default_route = self._make_route(default_model)
+        self.enabled = enabled
+        self._routes: Dict[str, List[Route]] = {}
+        if enabled and small_model:
+            for site in SMALL_MODEL_CALL_SITES:
+                # Escalate to the large model if the small one cannot fit the input
+                self._routes[site] = [self._make_route(small_model), self.default_route]
+            for site in LARGE_MODEL_CALL_SITES:
+                self._routes[site] = [self.default_route]
+        for site, spec in (routes or {}).items():
+            specs = spec if isinstance(spec, list) else [spec]
+            chain = [r for r in (self._parse_spec(s) for s in specs) if r is not None]
+            if chain:
+                self._routes[site] = chain
+
+    @classmethod
+    def from_config(cls, config: Any, default_model: str, default_timeout: float = 60.0) -> "ModelRouter":
+        return cls(
+            default_model=default_model,
+            default_timeout=default_timeout,
+            small_model=getattr(config, "llm_small_model", None),
+            routes=getattr(config, "llm_routes", None),
+            enabled=getattr(config, "llm_routing_enabled", False),
+        )
+
+    def _make_route(self, model: str, context_limit: Optional[int] = None, timeout: Optional[float] = None) -> Route:
+        return Route(
+            model=model,
+            context_limit=int(context_limit or MODEL_CONTEXT_LIMITS.get(model, DEFAULT_CONTEXT_LIMIT)),
+            timeout=float(timeout or self.default_timeout),
+        )
+
+    def _parse_spec(self, spec: Any) -> Optional[Route]:
+        if isinstance(spec, str) and spec:
+            return self._make_route(spec)
+        if isinstance(spec, dict) and spec.get("model"):
+            return self._make_route(spec["model"], spec.get("context_limit"), spec.get("timeout"))
+        return None
+
+    def routes_for(self, call_site: str) -> List[Route]:
+        return self._routes.get(call_site) or [self.default_route]
+
+    def route(self, call_site: str, input_tokens: int = 0) -> Route:
+        chain = self.routes_for(call_site)
+        for r in chain:
+            if input_tokens <= r.context_limit:
+                return r
+        return max(chain, key=lambda r: r.context_limit)
+
+
+def _normalize_answer(text: str) -> Dict[str, Any]:
+    """Reduces an answer to what decisions depend on: side and the first probability/price."""
+    lowered = (text or "").lower()
+    side = None
+    m = re.search(r"\b(buy|sell)\b", lowered)
+    if m:
+        side = m.group(1)
+    value = None
+    for num in re.findall(r"\d*\.\d+|\d+", lowered):
+        try:
+            v = float(num)
+        except Exception:
+            continue
+        if 0.0 <= v <= 1.0:
+            value = v
+            break
+    return {"side": side, "value": value, "text": " ".join(lowered.split())}
+
+
+def answers_agree(a: str, b: str, tolerance: float = 0.05) -> bool:
+    na, nb = _normalize_answer(a), _normalize_answer(b)
+    if na["side"] or nb["side"]:
+        if na["side"] != nb["side"]:
+            return False
+    if na["value"] is not None and nb["value"] is not None:
+        return abs(na["value"] - nb["value"]) <= tolerance
+    if na["side"] or nb["side"]:
+        return True
+    return na["text"] == nb["text"]
+
+
+def load_recorded_prompts(path: str, call_sites: Sequence[str] = (), limit: int = 0) -> List[Dict[str, Any]]:
+    records: List[Dict[str, Any]] = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except Exception:
+                continue
+            if call_sites and rec.get("call_site") not in call_sites:
+                continue
+            records.append(rec)
+            if limit and len(records) >= limit:
+                break
+    return records
+
+
+async def compare_routes(
+    client: Any,
+    records: Sequence[Dict[str, Any]],
+    models: Sequence[str],
+    timeout: float = 60.0,
+    concurrency: int = 4,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Replays recorded prompts through each candidate model.
+    Reports per-model latency and agreement with the recorded response.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(model: str, rec: Dict[str, Any]) -> Dict[str, Any]:
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": rec["prompt"]}],
+                    temperature=0,
+                    timeout=timeout,
+                )
+                answer = response.choices[0].message.content or ""
+                error = None
+            except Exception as e:
+                answer, error = "", str(e)
+            latency = time.perf_counter() - started
+        return {
+            "latency": latency,
+            "error": error,
+            "agree": (error is None) and answers_agree(answer, rec.get("response", "")),
+        }
+
+    report: Dict[str, Dict[str, Any]] = {}
+    for model in models:
+        results = await asyncio.gather(*(run_one(model, rec) for rec in records))
+        latencies = sorted(r["latency"] for r in results if r["error"] is None)
+        ok = [r for r in results if r["error"] is None]
+        report[model] = {
+            "prompts": len(results),
+            "errors": len(results) - len(ok),
+            "p50_latency": latencies[len(latencies) // 2] if latencies else None,
+            "p95_latency": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+            "agreement": (sum(1 for r in ok if r["agree"]) / len(ok)) if ok else None,
+        }
+    return report
@@ -1,6 +1,8 @@
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
+from agents.utils.prompt_serializer import default_serializer
+
 
 class Prompter:
 
@@ -53,14 +55,19 @@ class Prompter:
         """
 
     def prompts_polymarket(self, data1: str, data2: str) -> str:
-        current_market_data = str(data1)
-        current_event_data = str(data2)
+        # data1 = events, data2 = markets (as passed by Executor.get_polymarket_llm)
+        current_event_data = default_serializer.events_table(data1)
+        current_market_data = default_serializer.markets_table(data2)
         return f"""
         You are an AI assistant for users of a prediction market called Polymarket.
         Users want to place bets based on their beliefs of market outcomes such as political or sports events.
 
-        Here is data for current Polymarket markets {current_market_data} and 
-        current Polymarket events {current_event_data}.
+        Here is data for current Polymarket events (tab-separated):
+{current_event_data}
+
+        and current Polymarket markets (tab-separated):
+{current_market_data}
+
         Help users identify markets to trade based on their interests or queries.
         Provide specific information for markets including probabilities of outcomes.
         """
@@ -89,8 +96,8 @@ class Prompter:
                 Polymarket is an online prediction market that lets users Bet on the outcome of future events in a wide range of topics, like sports, politics, and pop culture. 
                 Get accurate real-time probabilities of the events that matter most to you. """
 
-    def filter_events(self) -> str:
-        return (
+    def filter_events(self, events: Optional[list] = None) -> str:
+        prompt = (
             self.polymarket_analyst_api()
             + f"""
         
@@ -98,6 +105,11 @@ class Prompter:
 
         """
         )
+        if events:
+            prompt += f"""Events (tab-separated):
+{default_serializer.events_table(events)}
+"""
+        return prompt
 
     def filter_markets(self) -> str:
         return (
@@ -0,0 +1,256 @@
+"""
+Incremental BM25 inverted index and rank fusion.
+
+Market questions are dominated by entities and numbers ("BTC above $100k by
+March") that dense vectors match poorly; a lexical index answers them without an
+embedding call.
+
+- Postings are compact per-term arrays (array('I') doc rows + array('H') term
+  frequencies), scored with NumPy over zero-copy views
+- add() upserts, remove() tombstones; postings are compacted once a quarter of the
+  rows are dead
+- reciprocal_rank_fusion() merges lexical and vector rankings; hybrid_search() /
+  hybrid_search_many() do it for one vector store collection
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+_TOKEN_RE = re.compile(r"\w+(?:[.,]\d+)*", re.UNICODE)
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens; "100,000" -> "100000", "$100k" -> "100k"."""
+    tokens = []
+    for tok in _TOKEN_RE.findall((text or "").lower()):
+        tok = tok.replace(",", "")
+        if tok and tok not in STOPWORDS:
+            tokens.append(tok)
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over an incrementally updated inverted index."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._ids: List[Optional[str]] = []  # row -> doc id (None when removed)
+        self._row: Dict[str, int] = {}
+        self._terms: List[Tuple[str, ...]] = []  # row -> unique terms, for df bookkeeping
+        self._lengths = array("I")
+        self._alive = bytearray()
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._df: Counter = Counter()
+        self._total_length = 0
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._row)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._row
+
+    def add(self, doc_id: str, text: str) -> None:
+        """Indexes (or re-indexes) a document."""
+        tf = Counter(tokenize(text))
+        with self._lock:
+            if doc_id in self._row:
+                self._remove(doc_id)
+            row = len(self._ids)
+            self._ids.append(doc_id)
+            self._row[doc_id] = row
+            self._terms.append(tuple(tf))
+            length = sum(tf.values())
+            self._lengths.append(length)
+            self._alive.append(1)
+            self._total_length += length
+            for term, count in tf.items():
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = (array("I"), array("H"))
+                postings[0].append(row)
+                postings[1].append(min(count, 0xFFFF))
+                self._df[term] += 1
+
+    def add_many(self, items: Iterable[Tuple[str, str]]) -> None:
+        for doc_id, text in items:
+            self.add(doc_id, text)
+
+    def remove(self, doc_id: str) -> None:
+        with self._lock:
+            if doc_id in self._row:
+                self._remove(doc_id)
+                if self._dead > 64 and self._dead * 4 > len(self._ids):
+                    self._compact()
+
+    def _remove(self, doc_id: str) -> None:
+        row = self._row.pop(doc_id)
+        self._ids[row] = None
+        self._alive[row] = 0
+        for term in self._terms[row]:
+            self._df[term] -= 1
+            if self._df[term] <= 0:
+                del self._df[term]
+        self._terms[row] = ()
+        self._total_length -= self._lengths[row]
+        self._dead += 1
+
+    def _compact(self) -> None:
+        remap = np.full(len(self._ids), -1, dtype=np.int64)
+        alive = [r for r, i in enumerate(self._ids) if i is not None]
+        remap[alive] = np.arange(len(alive))
+        postings: Dict[str, Tuple[array, array]] = {}
+        for term, (rows, tfs) in self._postings.items():
+            r = np.frombuffer(rows, dtype=np.uint32)
+            keep = remap[r] >= 0
+            if keep.any():
+                postings[term] = (
+                    array("I", remap[r[keep]].astype(np.uint32).tobytes()),
+                    array("H", np.frombuffer(tfs, dtype=np.uint16)[keep].tobytes()),
+                )
+        self._postings = postings
+        self._ids = [self._ids[r] for r in alive]
+        self._terms = [self._terms[r] for r in alive]
+        self._lengths = array("I", [self._lengths[r] for r in alive])
+        self._alive = bytearray(b"\x01" * len(alive))
+        self._row = {doc_id: r for r, doc_id in enumerate(self._ids)}
+        self._dead = 0
+
+    def _idf(self, term: str) -> float:
+        n = len(self._row)
+        df = self._df.get(term, 0)
+        return math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (rows, scores) for every live document matching at least one query term."""
+        tokens = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            terms = [t for t in tokens if t in self._postings]
+            if not terms or not self._row:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            lengths = np.frombuffer(self._lengths, dtype=np.uint32).astype(np.float32)
+            avgdl = max(1.0, self._total_length / max(1, len(self._row)))
+            norm = self.k1 * (1.0 - self.b + self.b * lengths / avgdl)
+            acc = np.zeros(len(self._ids), dtype=np.float32)
+            for term in terms:
+                rows_buf, tfs_buf = self._postings[term]
+                rows = np.frombuffer(rows_buf, dtype=np.uint32)
+                tf = np.frombuffer(tfs_buf, dtype=np.uint16).astype(np.float32)
+                acc[rows] += self._idf(term) * tf * (self.k1 + 1.0) / (tf + norm[rows])
+            acc *= np.frombuffer(self._alive, dtype=np.uint8)
+            rows = np.flatnonzero(acc)
+            return rows, acc[rows]
+
+    def search(self, query: str, k: int = 10, allowed: Optional[set] = None) -> List[Tuple[str, float]]:
+        """Top-k (doc_id, score), best first; `allowed` restricts results to a set of ids."""
+        with self._lock:
+            rows, scores = self.scores(query)
+            if allowed is not None and rows.size:
+                mask = np.array([self._ids[r] in allowed for r in rows], dtype=bool)
+                rows, scores = rows[mask], scores[mask]
+            if not rows.size or k <= 0:
+                return []
+            if rows.size > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+                rows, scores = rows[top], scores[top]
+            order = np.argsort(-scores, kind="stable")
+            return [(self._ids[rows[i]], float(scores[i])) for i in order]
+
+    def coverage(self, query: str, doc_id: str) -> float:
+        """IDF-weighted share of the query terms present in the document (0..1)."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            row = self._row.get(doc_id)
+            if not terms or row is None:
+                return 0.0
+            present = set(self._terms[row])
+            weights = [self._idf(t) for t in terms]
+        matched = sum(w for t, w in zip(terms, weights) if t in present)
+        return matched / sum(weights) if sum(weights) else 0.0
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]],
+    k: int = 60,
+    weights: Optional[Sequence[float]] = None,
+) -> List[Tuple[str, float]]:
+    """Merges ranked id lists: score(d) = sum_i w_i / (k + rank_i(d))."""
+    fused: Dict[str, float] = {}
+    for i, ranking in enumerate(rankings):
+        w = weights[i] if weights else 1.0
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + w / (k + rank + 1)
+    return sorted(fused.items(), key=lambda x: x[1], reverse=True)
+
+
+def hybrid_search_many(
+    store: Any,
+    lexical: BM25Index,
+    queries: Sequence[str],
+    query_embeddings: Sequence[Sequence[float]],
+    k: int = 4,
+    where: Optional[Dict[str, Any]] = None,
+    allowed: Optional[set] = None,
+    candidates: int = 0,
+    rrf_k: int = 60,
+) -> List[List[Tuple[Any, float]]]:
+    """
+    Fuses vector and BM25 rankings from one collection with RRF, per query.
+    - One store.query_many call for all queries, one store.get for lexical-only hits
+    - Returns (Document, distance) lists like VectorStore.query_many; documents found
+      only lexically get distance 1.0 (no vector evidence)
+    """
+    if not queries:
+        return []
+    n = candidates or max(20, 4 * k)
+    vector_hits = store.query_many(query_embeddings, k=n, where=where)
+    own = [{d.id: (d, dist) for d, dist in hits} for hits in vector_hits]
+    fused_ids: List[List[str]] = []
+    for query, hits in zip(queries, vector_hits):
+        lexical_hits = lexical.search(query, k=n, allowed=allowed)
+        fused = reciprocal_rank_fusion([[d.id for d, _ in hits], [i for i, _ in lexical_hits]], k=rrf_k)[:k]
+        fused_ids.append([i for i, _ in fused])
+    missing = list(dict.fromkeys(i for ids, found in zip(fused_ids, own) for i in ids if i not in found))
+    lexical_only: Dict[str, Tuple[Any, float]] = {}
+    if missing:
+        # `where` applies to lexical-only hits too (e.g. a recency window)
+        got = store.get(ids=missing, where=where)
+        for doc_id, metadata, text in zip(got["ids"], got["metadatas"], got["documents"]):
+            lexical_only[doc_id] = (Document(id=doc_id, page_content=text, metadata=dict(metadata)), 1.0)
+    results: List[List[Tuple[Any, float]]] = []
+    for ids, found in zip(fused_ids, own):
+        results.append([found.get(i) or lexical_only[i] for i in ids if i in found or i in lexical_only])
+    return results
+
+
+def hybrid_search(
+    store: Any,
+    lexical: BM25Index,
+    query: str,
+    query_embedding: Sequence[float],
+    k: int = 4,
+    where: Optional[Dict[str, Any]] = None,
+    allowed: Optional[set] = None,
+    candidates: int = 0,
+    rrf_k: int = 60,
+) -> List[Tuple[Any, float]]:
+    """Single-query hybrid_search_many."""
+    return hybrid_search_many(
+        store, lexical, [query], [query_embedding], k=k, where=where, allowed=allowed,
+        candidates=candidates, rrf_k=rrf_k,
+    )[0]
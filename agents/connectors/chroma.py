@@ -1,3 +1,4 @@
+import hashlib
 import json
 import os
 import time
@@ -6,94 +7,146 @@ try:
     from langchain_openai import OpenAIEmbeddings  # optional, not required
 except Exception:
     OpenAIEmbeddings = None  # type: ignore
-from typing import Any
-from langchain_community.document_loaders import JSONLoader
-from langchain_community.vectorstores.chroma import Chroma
-try:
-    from chromadb.config import Settings as ChromaSettings  # type: ignore
-    from chromadb import Client as ChromaClient  # type: ignore
-except Exception:
-    ChromaSettings = None  # type: ignore
-    ChromaClient = None  # type: ignore
+from typing import Any, Dict, List, Optional
+from langchain_core.documents import Document
 
 from agents.polymarket.gamma import GammaMarketClient
 from agents.utils.objects import SimpleEvent, SimpleMarket
+from agents.connectors.embeddings import get_default_embeddings
+from agents.connectors.bm25 import BM25Index, hybrid_search_many
+from agents.connectors.vectorstores import STORES, VectorStore, open_vector_store
+from agents.utils.metrics import rag_index_documents_total
+
+
+EVENTS_COLLECTION = "polymarket_events"
+MARKETS_COLLECTION = "polymarket_markets"
+
+
+def _content_hash(text: str) -> str:
+    # Only the embedded text: metadata such as outcome_prices changes every cycle without
+    # changing the vector
+    return hashlib.md5(text.encode("utf-8")).hexdigest()
+
+
+def _lexical_text(text: str, metadata: Dict[str, Any]) -> str:
+    question = metadata.get("question")
+    return f"{question}\n{text}" if question else text
+
+
+def _as_dict(obj: Any) -> Dict[str, Any]:
+    if isinstance(obj, dict):
+        return obj
+    for attr in ("model_dump", "dict"):
+        fn = getattr(obj, attr, None)
+        if callable(fn):
+            return fn()
+    return dict(obj)
+
+
+def _page_content(record: Dict[str, Any]) -> str:
+    # Non-string descriptions are serialized, missing ones become empty content
+    content = record.get("description")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, (dict, list)):
+        return json.dumps(content) if content else ""
+    return str(content) if content is not None else ""
+
+
+def event_documents(events: "list[SimpleEvent]") -> "list[Document]":
+    """Documents for events: description as content, id/markets as metadata."""
+    docs = []
+    for event in events:
+        record = _as_dict(event)
+        metadata = {"id": record.get("id"), "markets": record.get("markets")}
+        docs.append(Document(page_content=_page_content(record), metadata=metadata))
+    return docs
+
+
+def market_documents(markets: "list[SimpleMarket] | list[dict]") -> "list[Document]":
+    """Documents for markets (SimpleMarket or raw Gamma dicts, camelCase or snake_case)."""
+    docs = []
+    for market in markets:
+        record = _as_dict(market)
+        metadata = {
+            "id": record.get("id"),
+            "outcomes": record.get("outcomes") or record.get("outcome"),
+            "outcome_prices": record.get("outcome_prices") or record.get("outcomePrices"),
+            "question": record.get("question"),
+            "clob_token_ids": record.get("clob_token_ids") or record.get("clobTokenIds"),
+        }
+        docs.append(Document(page_content=_page_content(record), metadata=metadata))
+    return docs
+
+
+def _store_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    # Vector stores only accept scalar metadata values
+    clean: Dict[str, Any] = {}
+    for k, v in metadata.items():
+        if v is None:
+            continue
+        if isinstance(v, (str, int, float, bool)):
+            clean[k] = v
+        else:
+            clean[k] = json.dumps(v, default=str)
+    return clean
 
 
 class PolymarketRAG:
+    """
+    Events/markets RAG over warm collections.
+    - Collections are upserted by id plus a content hash, so each cycle embeds only
+      new or changed descriptions
+    - RAG_PERSIST=true keeps them on disk under local_db_directory, otherwise in memory
+    - Vector backend (chroma | numpy) is selected by RAG_VECTOR_BACKEND
+    - RAG_HYBRID=true (default) fuses vector hits with a BM25 index over
+      question + description, so entity/number matches are not lost
+    - Stores and BM25 indexes are shared process-wide (vectorstores.STORES), so the
+      Executor, the CLI and the API reuse one handle per collection
+    """
+
     def __init__(self, local_db_directory=None, embedding_function=None) -> None:
         self.gamma_client = GammaMarketClient()
         # Default to tmp directory to prevent permission issues in containers
         self.local_db_directory = local_db_directory or "/tmp/local_db"
         self.embedding_function = embedding_function
+        self._persist_enabled = os.getenv("RAG_PERSIST", "false").lower() == "true"
+        self._stores: Dict[str, VectorStore] = {}
+        self._hybrid = os.getenv("RAG_HYBRID", "true").lower() == "true"
 
     def _get_default_embeddings(self) -> Any:
         """Return embeddings based on RAG_EMBEDDINGS env var.
-        - default: FakeEmbeddings (no external calls)
-        - if RAG_EMBEDDINGS=openai: use OpenAIEmbeddings (requires OPENAI_API_KEY)
+        - default: local hashing embeddings (deterministic, no external calls)
+        - fake: FakeEmbeddings (random vectors)
+        - if RAG_EMBEDDINGS=openai: batched OpenAI client (requires OPENAI_API_KEY),
+          falling back to LangChain OpenAIEmbeddings if available
         """
-        choice = os.getenv("RAG_EMBEDDINGS", "fake").lower()
-        if choice == "openai":
-            # Prefer direct OpenAI client to avoid version mismatches
-            try:
-                from openai import OpenAI
-
-                class OpenAIEmbeddingAdapter:
-                    def __init__(self, model: str = "text-embedding-3-small") -> None:
-                        self.client = OpenAI()
-                        self.model = model
-
-                    def embed_documents(self, texts: list[str]) -> list[list[float]]:
-                        response = self.client.embeddings.create(model=self.model, input=texts)
-                        return [d.embedding for d in response.data]
+        fallbacks = []
+        if OpenAIEmbeddings is not None:
+            fallbacks.append(lambda: OpenAIEmbeddings(model="text-embedding-3-small"))
+        return get_default_embeddings(fallbacks)
 
-                    def embed_query(self, text: str) -> list[float]:
-                        response = self.client.embeddings.create(model=self.model, input=[text])
-                        return response.data[0].embedding
-
-                return OpenAIEmbeddingAdapter()
-            except Exception:
-                # Fallback to LangChain wrapper if available
-                if OpenAIEmbeddings is not None:
-                    try:
-                        return OpenAIEmbeddings(model="text-embedding-3-small")
-                    except Exception:
-                        pass
-                # Final fallback: FakeEmbeddings
-                from langchain_community.embeddings import FakeEmbeddings
-                return FakeEmbeddings(size=1536)
-        from langchain_community.embeddings import FakeEmbeddings
-        return FakeEmbeddings(size=1536)
+    def _embeddings(self) -> Any:
+        if self.embedding_function is None:
+            self.embedding_function = self._get_default_embeddings()
+        return self.embedding_function
 
     def load_json_from_local(
         self, json_file_path=None, vector_db_directory="./local_db"
     ) -> None:
-        loader = JSONLoader(
-            file_path=json_file_path, jq_schema=".[].description", text_content=False
-        )
-        loaded_docs = loader.load()
+        """File-based ingest for the CLI (create_local_markets_rag); the query path builds documents in memory."""
+        with open(json_file_path, "r", encoding="utf-8") as f:
+            markets = json.load(f)
+        docs = market_documents(markets)
 
-        embedding_function = self.embedding_function or self._get_default_embeddings()
         # Guard: write only if directory is writable
         try:
             os.makedirs(vector_db_directory or "/tmp/local_db", exist_ok=True)
-            Chroma.from_documents(
-                loaded_docs, embedding_function, persist_directory=vector_db_directory or "/tmp/local_db"
-            )
+            store = open_vector_store(MARKETS_COLLECTION, vector_db_directory or "/tmp/local_db")
         except Exception:
-            # Fallback to in-memory client
-            client_settings = (
-                ChromaSettings(is_persistent=False, anonymized_telemetry=False)
-                if ChromaSettings is not None
-                else None
-            )
-            client = ChromaClient(client_settings) if ChromaClient is not None else None
-            Chroma.from_documents(
-                loaded_docs,
-                embedding_function,
-                client=client,
-                collection_name="markets_inmemory_loader",
-            )
+            # Fallback to in-memory store
+            store = open_vector_store(MARKETS_COLLECTION)
+        self._upsert_documents(store, docs, MARKETS_COLLECTION)
 
     def create_local_markets_rag(self, local_directory="./local_db") -> None:
         all_markets = self.gamma_client.get_all_current_markets()
@@ -113,104 +166,131 @@ class PolymarketRAG:
     def query_local_markets_rag(
         self, local_directory=None, query=None
     ) -> "list[tuple]":
-        embedding_function = self.embedding_function or self._get_default_embeddings()
-        local_db = Chroma(
-            persist_directory=local_directory, embedding_function=embedding_function
-        )
-        response_docs = local_db.similarity_search_with_score(query=query)
-        return response_docs
+        store = open_vector_store(MARKETS_COLLECTION, local_directory)
+        return store.query(self._embeddings().embed_query(query), k=4)
 
-    def events(self, events: "list[SimpleEvent]", prompt: str) -> "list[tuple]":
-        if not events:
-            return []
-        # create local json file
-        # Пишем во временный путь в контейнере с правами на запись
-        local_events_directory: str = "/tmp/local_db_events"
-        os.makedirs(local_events_directory, exist_ok=True)
-        local_file_path = f"{local_events_directory}/events.json"
-        dict_events = [x.dict() for x in events]
-        with open(local_file_path, "w+") as output_file:
-            json.dump(dict_events, output_file)
+    def _get_store(self, name: str) -> VectorStore:
+        """Shared warm collection that survives between calls (and instances)."""
+        if name in self._stores:
+            return self._stores[name]
+        store: Optional[VectorStore] = None
+        if self._persist_enabled:
+            try:
+                os.makedirs(self.local_db_directory, exist_ok=True)
+                store = open_vector_store(name, self.local_db_directory)
+            except Exception:
+                store = None
+        if store is None:
+            store = open_vector_store(name)
+        self._stores[name] = store
+        return store
 
-        # create vector db
-        def metadata_func(record: dict, metadata: dict) -> dict:
+    def _get_lexical(self, name: str) -> BM25Index:
+        """BM25 index mirroring a warm collection; built from the store on first use."""
+        store = self._get_store(name)
 
-            metadata["id"] = record.get("id")
-            metadata["markets"] = record.get("markets")
+        def build() -> BM25Index:
+            index = BM25Index()
+            got = store.get()
+            for doc_id, metadata, text in zip(got["ids"], got["metadatas"], got["documents"]):
+                index.add(doc_id, _lexical_text(text, metadata))
+            return index
 
-            return metadata
+        return STORES.get_or_create(("bm25", store), build)
 
-        loader = JSONLoader(
-            file_path=local_file_path,
-            jq_schema=".[]",
-            content_key="description",
-            text_content=False,
-            metadata_func=metadata_func,
-        )
-        loaded_docs = loader.load()
-        embedding_function = self.embedding_function or self._get_default_embeddings()
-        # Используем in-memory индекс, чтобы избежать проблем с правами БД
-        # In-memory client (no file writes)
-        client_settings = (
-            ChromaSettings(is_persistent=False, anonymized_telemetry=False)
-            if ChromaSettings is not None
-            else None
-        )
-        client = ChromaClient(client_settings) if ChromaClient is not None else None
-        local_db = Chroma.from_documents(
-            loaded_docs,
-            embedding_function,
-            client=client,
-            collection_name="events_inmemory",
+    def _upsert_documents(self, store: VectorStore, docs: list, collection: str) -> List[str]:
+        """
+        Upserts documents keyed by metadata["id"]; only documents whose text hash
+        changed (or that are new) are embedded. Rows whose text is unchanged but whose
+        metadata differs keep their vector and get a metadata-only update.
+        Returns the keys of all given docs.
+        """
+        by_key: Dict[str, Any] = {}
+        for doc in docs:
+            metadata = doc.metadata or {}
+            key = metadata.get("id")
+            key = str(key) if key is not None else _content_hash(doc.page_content or "")
+            by_key[key] = doc  # last occurrence wins on duplicate ids
+        keys = list(by_key.keys())
+        if not keys:
+            return []
+        hashes = {k: _content_hash(d.page_content or "") for k, d in by_key.items()}
+        metadatas: Dict[str, Dict[str, Any]] = {}
+        for k, doc in by_key.items():
+            meta = dict(doc.metadata or {})
+            meta.update({"doc_key": k, "content_hash": hashes[k]})
+            metadatas[k] = _store_metadata(meta)
+        existing = store.get(ids=keys)
+        stored = dict(zip(existing["ids"], existing["metadatas"]))
+        changed = [k for k in keys if (stored.get(k) or {}).get("content_hash") != hashes[k]]
+        retagged = [k for k in keys if k in stored and k not in changed and stored[k] != metadatas[k]]
+        rag_index_documents_total.labels(collection=collection, action="reused").inc(len(keys) - len(changed))
+        if changed:
+            texts = [by_key[k].page_content or "" for k in changed]
+            embeddings = self._embeddings().embed_documents(texts)
+            store.upsert(changed, embeddings, [metadatas[k] for k in changed], texts)
+            rag_index_documents_total.labels(collection=collection, action="embedded").inc(len(changed))
+        if retagged:
+            store.update_metadata(retagged, [metadatas[k] for k in retagged])
+        if changed or retagged:
+            store.persist()
+            lexical = STORES.get(("bm25", store))
+            if lexical is not None:
+                for k in changed + retagged:
+                    lexical.add(k, _lexical_text(by_key[k].page_content or "", metadatas[k]))
+        return keys
+
+    def _query_universe(self, name: str, keys: List[str], prompt: str, k: int = 4) -> "list[tuple]":
+        return self.query_many([prompt], k=k, collection=name, keys=keys)[0]
+
+    def query_many(
+        self,
+        queries: List[str],
+        k: int = 4,
+        collection: str = MARKETS_COLLECTION,
+        keys: Optional[List[str]] = None,
+    ) -> "list[list[tuple]]":
+        """
+        Per-query top-k (Document, distance) from a warm collection.
+        - All queries are embedded in one batch and scored with one store.query_many call
+        - keys restricts results to the current universe so stale entries never surface
+        """
+        if not queries:
+            return []
+        store = self._get_store(collection)
+        where = {"doc_key": {"$in": keys}} if keys is not None else None
+        embeddings = self._embeddings().embed_documents(list(queries))
+        if not self._hybrid:
+            return store.query_many(embeddings, k=k, where=where)
+        return hybrid_search_many(
+            store,
+            self._get_lexical(collection),
+            queries,
+            embeddings,
+            k=k,
+            where=where,
+            allowed=set(keys) if keys is not None else None,
         )
 
+    def events(self, events: "list[SimpleEvent]", prompt: str) -> "list[tuple]":
+        if not events:
+            return []
+        # Documents are built in memory: no JSON round-trip on the hot path
+        docs = event_documents(events)
+        # Warm collection: only new/changed events are embedded
+        store = self._get_store(EVENTS_COLLECTION)
+        keys = self._upsert_documents(store, docs, EVENTS_COLLECTION)
+
         # query
-        return local_db.similarity_search_with_score(query=prompt)
+        return self._query_universe(EVENTS_COLLECTION, keys, prompt)
 
     def markets(self, markets: "list[SimpleMarket]", prompt: str) -> "list[tuple]":
         if not markets:
             return []
-        # create local json file
-        local_events_directory: str = "/tmp/local_db_markets"
-        os.makedirs(local_events_directory, exist_ok=True)
-        local_file_path = f"{local_events_directory}/markets.json"
-        with open(local_file_path, "w+") as output_file:
-            json.dump(markets, output_file)
-
-        # create vector db
-        def metadata_func(record: dict, metadata: dict) -> dict:
-
-            metadata["id"] = record.get("id")
-            # поддерживаем camelCase и snake_case из разных источников
-            metadata["outcomes"] = record.get("outcomes") or record.get("outcome")
-            metadata["outcome_prices"] = record.get("outcome_prices") or record.get("outcomePrices")
-            metadata["question"] = record.get("question")
-            metadata["clob_token_ids"] = record.get("clob_token_ids") or record.get("clobTokenIds")
-
-            return metadata
-
-        loader = JSONLoader(
-            file_path=local_file_path,
-            jq_schema=".[]",
-            content_key="description",
-            text_content=False,
-            metadata_func=metadata_func,
-        )
-        loaded_docs = loader.load()
-        embedding_function = self.embedding_function or self._get_default_embeddings()
-        # Используем in-memory индекс, чтобы избежать проблем с правами БД
-        client_settings = (
-            ChromaSettings(is_persistent=False, anonymized_telemetry=False)
-            if ChromaSettings is not None
-            else None
-        )
-        client = ChromaClient(client_settings) if ChromaClient is not None else None
-        local_db = Chroma.from_documents(
-            loaded_docs,
-            embedding_function,
-            client=client,
-            collection_name="markets_inmemory",
-        )
+        docs = market_documents(markets)
+        # Warm collection: only new/changed markets are embedded
+        store = self._get_store(MARKETS_COLLECTION)
+        keys = self._upsert_documents(store, docs, MARKETS_COLLECTION)
 
         # query
-        return local_db.similarity_search_with_score(query=prompt)
+        return self._query_universe(MARKETS_COLLECTION, keys, prompt)
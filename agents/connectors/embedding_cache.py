@@ -0,0 +1,231 @@
+"""
+Content-hash embedding cache.
+
+Vectors are keyed by sha256(model + text) and stored in an append-only,
+memory-mapped NumPy file per model:
+
+    <root>/<model>/meta.json    {"dim": ..., "dtype": "float16"}
+    <root>/<model>/keys.bin     32-byte digests, one per row (the offset index)
+    <root>/<model>/vectors.bin  dim * itemsize bytes per row
+
+Appends are serialized with a file lock, vectors are written before their key,
+so other processes can map the same files read-only and pick up new rows.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import fcntl  # type: ignore
+except Exception:  # pragma: no cover - non-POSIX
+    fcntl = None  # type: ignore
+
+from agents.utils.metrics import embedding_cache_lookups_total
+
+_DIGEST_SIZE = 32
+
+
+def _digest(model: str, text: str) -> bytes:
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).digest()
+
+
+class EmbeddingCache:
+    """
+    Memory-mapped vector cache for one embedding model.
+    - get_many returns zero-copy row views (None for misses)
+    - put_many appends only digests that are not stored yet
+    """
+
+    def __init__(self, root: str, model: str, dtype: str = "float16") -> None:
+        self.model = model
+        self.directory = os.path.join(root, re.sub(r"[^A-Za-z0-9_.-]+", "_", model) or "default")
+        os.makedirs(self.directory, exist_ok=True)
+        self._meta_path = os.path.join(self.directory, "meta.json")
+        self._keys_path = os.path.join(self.directory, "keys.bin")
+        self._vectors_path = os.path.join(self.directory, "vectors.bin")
+        self._lock_path = os.path.join(self.directory, ".lock")
+        self._lock = threading.Lock()
+        self.dim: Optional[int] = None
+        self.dtype = np.dtype(dtype)
+        self._index: Dict[bytes, int] = {}
+        self._keys_read = 0
+        self._vectors: Optional[np.ndarray] = None
+        self.hits = 0
+        self.misses = 0
+        self._load_meta()
+
+    # --- files -------------------------------------------------------------
+
+    def _load_meta(self) -> None:
+        if not os.path.exists(self._meta_path):
+            return
+        try:
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.dim = int(meta["dim"])
+            self.dtype = np.dtype(meta.get("dtype", self.dtype.name))
+        except Exception:
+            self.dim = None
+
+    def _row_bytes(self) -> int:
+        return int(self.dim or 0) * self.dtype.itemsize
+
+    def _refresh(self) -> None:
+        """Picks up rows appended since the last read (by this or another process)."""
+        if self.dim is None:
+            self._load_meta()
+            if self.dim is None:
+                return
+        try:
+            keys_size = os.path.getsize(self._keys_path)
+            vectors_size = os.path.getsize(self._vectors_path)
+        except OSError:
+            return
+        rows = min(keys_size // _DIGEST_SIZE, vectors_size // self._row_bytes())
+        if rows <= self._keys_read:
+            return
+        with open(self._keys_path, "rb") as f:
+            f.seek(self._keys_read * _DIGEST_SIZE)
+            data = f.read((rows - self._keys_read) * _DIGEST_SIZE)
+        for i in range(len(data) // _DIGEST_SIZE):
+            self._index.setdefault(data[i * _DIGEST_SIZE:(i + 1) * _DIGEST_SIZE], self._keys_read + i)
+        self._keys_read = rows
+        self._vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(rows, self.dim))
+
+    # --- public API --------------------------------------------------------
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._index)
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        with self._lock:
+            digests = [_digest(self.model, t) for t in texts]
+            if any(d not in self._index for d in digests):
+                self._refresh()
+            out: List[Optional[np.ndarray]] = []
+            for d in digests:
+                row = self._index.get(d)
+                out.append(self._vectors[row] if row is not None and self._vectors is not None else None)
+        hits = sum(1 for v in out if v is not None)
+        self.hits += hits
+        self.misses += len(out) - hits
+        if hits:
+            embedding_cache_lookups_total.labels(model=self.model, result="hit").inc(hits)
+        if len(out) - hits:
+            embedding_cache_lookups_total.labels(model=self.model, result="miss").inc(len(out) - hits)
+        return out
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        return self.get_many([text])[0]
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> int:
+        """Appends vectors for texts not cached yet; returns the number of rows written."""
+        if not texts:
+            return 0
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(texts):
+            raise ValueError("vectors must be a 2-D array with one row per text")
+        with self._lock:
+            lock_file = open(self._lock_path, "a+")
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                self._refresh()
+                if self.dim is None:
+                    self.dim = int(matrix.shape[1])
+                    with open(self._meta_path, "w", encoding="utf-8") as f:
+                        json.dump({"dim": self.dim, "dtype": self.dtype.name, "model": self.model}, f)
+                elif matrix.shape[1] != self.dim:
+                    raise ValueError(f"dimension mismatch: cache has {self.dim}, got {matrix.shape[1]}")
+                new_rows: List[int] = []
+                new_digests: List[bytes] = []
+                seen = set()
+                for i, text in enumerate(texts):
+                    d = _digest(self.model, text)
+                    if d in self._index or d in seen:
+                        continue
+                    seen.add(d)
+                    new_rows.append(i)
+                    new_digests.append(d)
+                if not new_rows:
+                    return 0
+                # Keep both files row-aligned even if a previous writer died between the two appends
+                start = self._keys_read
+                with open(self._vectors_path, "ab") as f:
+                    f.truncate(start * self._row_bytes())
+                    f.write(matrix[new_rows].astype(self.dtype).tobytes())
+                with open(self._keys_path, "ab") as f:
+                    f.truncate(start * _DIGEST_SIZE)
+                    f.write(b"".join(new_digests))
+                self._refresh()
+                return len(new_rows)
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                lock_file.close()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "model": self.model,
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+        }
+
+
+class CachedEmbeddings:
+    """
+    LangChain-compatible embeddings wrapper: only cache misses reach the backend.
+    Duplicate texts within one call are embedded once.
+    """
+
+    def __init__(self, inner: Any, cache: EmbeddingCache) -> None:
+        self.inner = inner
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        cached = self.cache.get_many(texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, cached) if v is None))
+        fresh: Dict[str, List[float]] = {}
+        if missing:
+            vectors = self.inner.embed_documents(missing)
+            self.cache.put_many(missing, vectors)
+            fresh = {t: list(map(float, v)) for t, v in zip(missing, vectors)}
+        return [
+            v.astype(np.float32).tolist() if v is not None else fresh[t]
+            for t, v in zip(texts, cached)
+        ]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def with_embedding_cache(inner: Any, model: str) -> Any:
+    """
+    Wraps an embeddings backend with the on-disk cache.
+    - EMBEDDING_CACHE=false disables it
+    - EMBEDDING_CACHE_DIR (default /tmp/embedding_cache), EMBEDDING_CACHE_DTYPE (float16|float32)
+    """
+    if os.getenv("EMBEDDING_CACHE", "true").lower() != "true":
+        return inner
+    try:
+        cache = EmbeddingCache(
+            os.getenv("EMBEDDING_CACHE_DIR", "/tmp/embedding_cache"),
+            model,
+            dtype=os.getenv("EMBEDDING_CACHE_DTYPE", "float16"),
+        )
+    except Exception:
+        return inner
+    return CachedEmbeddings(inner, cache)
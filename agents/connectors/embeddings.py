@@ -0,0 +1,247 @@
+"""
+Embedding backends shared by PolymarketRAG and NewsRAG.
+
+- LocalHashingEmbeddings: deterministic feature-hashed word + char n-gram vectors,
+  no network, no model files
+- BatchedOpenAIEmbeddings splits inputs by item count and token total, sends the
+  batches concurrently under a limit, retries only the batches that failed and
+  returns vectors in input order.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from agents.connectors.embedding_cache import with_embedding_cache
+from agents.utils.metrics import observe_llm_call
+
+# OpenAI limits for text-embedding-3-*: 8191 tokens per input, 2048 inputs per request
+MAX_INPUT_TOKENS = 8191
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)))
+    except Exception:
+        return default
+
+
+@lru_cache(maxsize=1)
+def _get_encoder() -> Any:
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class LocalHashingEmbeddings:
+    """
+    Deterministic local embeddings (the hashing trick over a bag of features).
+    - Features: lowercased words plus char n-grams of each "<word>"
+    - Sublinear term frequency (1 + log tf), signed hashing to cancel collisions
+    - Rows are L2-normalized, so cosine similarity is comparable with OpenAI vectors
+    crc32 is used instead of hash() so vectors are stable across processes.
+    """
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        ngram_range: Tuple[int, int] = (3, 5),
+        char_weight: float = 0.5,
+    ) -> None:
+        # 1536 matches the FakeEmbeddings this replaced, so collections they persisted stay queryable
+        self.dim = max(64, dim or _env_int("LOCAL_EMBEDDING_DIM", 1536))
+        self.ngram_range = ngram_range
+        self.char_weight = char_weight
+        self.model = f"local-hashing-{self.dim}"
+
+    def _features(self, text: str) -> Dict[str, float]:
+        words = _WORD_RE.findall((text or "").lower())
+        features: Dict[str, float] = {}
+        for word, tf in Counter(words).items():
+            features["w:" + word] = 1.0 + math.log(tf)
+        grams: Counter = Counter()
+        lo, hi = self.ngram_range
+        for word in words:
+            padded = f"<{word}>"
+            for n in range(lo, hi + 1):
+                for i in range(max(1, len(padded) - n + 1)):
+                    grams[padded[i:i + n]] += 1
+        for gram, tf in grams.items():
+            features["c:" + gram] = self.char_weight * (1.0 + math.log(tf))
+        return features
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text).items():
+                h = zlib.crc32(feature.encode("utf-8"))
+                matrix[row, h % self.dim] += weight if h & 0x80000000 else -weight
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class BatchedOpenAIEmbeddings:
+    """
+    LangChain-compatible OpenAI embeddings client.
+    - Batches hold at most max_batch_items inputs and max_batch_tokens tokens
+    - Inputs longer than MAX_INPUT_TOKENS are truncated instead of failing the batch
+    - Up to max_concurrency batches are in flight; failed batches are retried with backoff
+    """
+
+    def __init__(
+        self,
+        model: str = "text-embedding-3-small",
+        client: Any = None,
+        max_batch_items: Optional[int] = None,
+        max_batch_tokens: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_backoff: float = 1.0,
+    ) -> None:
+        if client is None:
+            from openai import OpenAI
+
+            # Retries are handled per batch here
+            client = OpenAI(max_retries=0)
+        self.client = client
+        self.model = model
+        self.max_batch_items = max(1, min(2048, max_batch_items or _env_int("EMBEDDING_BATCH_ITEMS", 256)))
+        self.max_batch_tokens = max(
+            MAX_INPUT_TOKENS, max_batch_tokens or _env_int("EMBEDDING_BATCH_TOKENS", 100000)
+        )
+        self.max_concurrency = max(1, max_concurrency or _env_int("EMBEDDING_CONCURRENCY", 4))
+        self.max_retries = max(0, max_retries if max_retries is not None else _env_int("EMBEDDING_MAX_RETRIES", 3))
+        self.retry_backoff = retry_backoff
+        self._encoder = _get_encoder()
+
+    def _fit(self, text: str) -> Tuple[str, int]:
+        """Returns the (possibly truncated) input and its token count."""
+        text = text or " "  # the API rejects empty strings
+        if self._encoder is None:
+            # Conservative 3 chars/token estimate without a tokenizer
+            text = text[: MAX_INPUT_TOKENS * 3]
+            return text, max(1, -(-len(text) // 3))
+        tokens = self._encoder.encode(text, disallowed_special=())
+        if len(tokens) > MAX_INPUT_TOKENS:
+            return self._encoder.decode(tokens[:MAX_INPUT_TOKENS]), MAX_INPUT_TOKENS
+        return text, max(1, len(tokens))
+
+    def _batches(self, texts: Sequence[str]) -> List[List[Tuple[int, str]]]:
+        batches: List[List[Tuple[int, str]]] = []
+        current: List[Tuple[int, str]] = []
+        current_tokens = 0
+        for i, raw in enumerate(texts):
+            text, n_tokens = self._fit(raw)
+            if current and (
+                len(current) >= self.max_batch_items or current_tokens + n_tokens > self.max_batch_tokens
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append((i, text))
+            current_tokens += n_tokens
+        if current:
+            batches.append(current)
+        return batches
+
+    def _create(self, texts: List[str]) -> List[List[float]]:
+        started = time.perf_counter()
+        try:
+            response = self.client.embeddings.create(model=self.model, input=texts)
+        except Exception as e:
+            observe_llm_call("embeddings", self.model, time.perf_counter() - started, status=type(e).__name__)
+            raise
+        usage = getattr(response, "usage", None)
+        observe_llm_call(
+            "embeddings",
+            self.model,
+            time.perf_counter() - started,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+        )
+        # The API may return items out of order; each carries its index
+        data = sorted(response.data, key=lambda d: getattr(d, "index", 0))
+        return [d.embedding for d in data]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        pending = self._batches(texts)
+        attempt = 0
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(pending))) as pool:
+            while pending:
+                futures = [(batch, pool.submit(self._create, [t for _, t in batch])) for batch in pending]
+                failed: List[List[Tuple[int, str]]] = []
+                last_error: Optional[Exception] = None
+                for batch, fut in futures:
+                    try:
+                        vectors = fut.result()
+                        if len(vectors) != len(batch):
+                            raise ValueError(f"expected {len(batch)} embeddings, got {len(vectors)}")
+                    except Exception as e:
+                        failed.append(batch)
+                        last_error = e
+                        continue
+                    for (i, _), vector in zip(batch, vectors):
+                        results[i] = vector
+                if failed and attempt >= self.max_retries:
+                    assert last_error is not None
+                    raise last_error
+                pending = failed
+                if pending:
+                    time.sleep(self.retry_backoff * (2 ** attempt))
+                    attempt += 1
+        return [r for r in results if r is not None]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+def _fake_embeddings() -> Any:
+    from langchain_community.embeddings import FakeEmbeddings
+
+    return FakeEmbeddings(size=1536)
+
+
+def get_default_embeddings(fallbacks: Sequence[Callable[[], Any]] = ()) -> Any:
+    """
+    Embeddings selected by RAG_EMBEDDINGS:
+    - local (default): LocalHashingEmbeddings, deterministic, no external calls
+    - fake: FakeEmbeddings (random vectors, for tests)
+    - openai: BatchedOpenAIEmbeddings behind the on-disk embedding cache
+      (EMBEDDING_MODEL, default text-embedding-3-small)
+    If OpenAI cannot be initialised, each fallback factory is tried before the local backend.
+    """
+    choice = os.getenv("RAG_EMBEDDINGS", "local").lower()
+    if choice == "fake":
+        return _fake_embeddings()
+    if choice == "openai":
+        try:
+            model = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+            return with_embedding_cache(BatchedOpenAIEmbeddings(model=model), model)
+        except Exception:
+            for factory in fallbacks:
+                try:
+                    return factory()
+                except Exception:
+                    continue
+    return LocalHashingEmbeddings()
@@ -0,0 +1,132 @@
+"""
+Process-wide TTL cache for MCP tool results.
+
+The same search-news keyword is requested by the ingest, the traders and the news
+adapter within a minute; each consumer has its own client, so the cache is shared
+by all of them and keyed by (server, tool, canonical JSON of the arguments).
+
+- Per-tool TTLs from MCP_CACHE_TTLS ("tool=secs,..."), default MCP_CACHE_TTL_SECS;
+  a TTL of 0 disables caching for that tool
+- When the call fails, a result up to MCP_CACHE_STALE_SECS past its TTL is served
+  instead of the error
+- MCP results flagged isError are not cached
+- Entries are evicted least-recently-used beyond MCP_CACHE_MAX_ENTRIES
+- Lookups are counted in mcp_tool_cache_lookups_total (hit / miss / stale)
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from agents.utils.lru import LRUCache
+from agents.utils.metrics import mcp_tool_cache_lookups_total
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_ttls(spec: str) -> Dict[str, float]:
+    ttls: Dict[str, float] = {}
+    for part in spec.split(","):
+        name, sep, value = part.partition("=")
+        if not sep:
+            continue
+        try:
+            ttls[name.strip()] = float(value)
+        except ValueError:
+            logger.warning(f"Ignoring MCP_CACHE_TTLS entry: {part!r}")
+    return ttls
+
+
+class MCPToolCache:
+    """TTL + stale-on-error cache around MCP call_tool; see the module docstring."""
+
+    def __init__(
+        self,
+        ttls: Optional[Dict[str, float]] = None,
+        default_ttl: Optional[float] = None,
+        stale_secs: Optional[float] = None,
+        max_entries: Optional[int] = None,
+    ) -> None:
+        if ttls is None:
+            ttls = _parse_ttls(
+                os.getenv("MCP_CACHE_TTLS", "search-news=300,get-daily-news=600,get-weekly-news=3600")
+            )
+        if default_ttl is None:
+            try:
+                default_ttl = float(os.getenv("MCP_CACHE_TTL_SECS", "300"))
+            except Exception:
+                default_ttl = 300.0
+        if stale_secs is None:
+            try:
+                stale_secs = float(os.getenv("MCP_CACHE_STALE_SECS", "3600"))
+            except Exception:
+                stale_secs = 3600.0
+        if max_entries is None:
+            try:
+                max_entries = int(os.getenv("MCP_CACHE_MAX_ENTRIES", "1024"))
+            except Exception:
+                max_entries = 1024
+        self.ttls = ttls
+        self.default_ttl = default_ttl
+        self.stale_secs = stale_secs
+        # key -> (stored_at monotonic, value)
+        self._entries = LRUCache(max_entries)
+
+    def ttl(self, tool: str) -> float:
+        return self.ttls.get(tool, self.default_ttl)
+
+    @staticmethod
+    def key(server: str, tool: str, arguments: Optional[Dict[str, Any]]) -> Tuple[str, str, str]:
+        return server, tool, json.dumps(arguments or {}, sort_keys=True, default=str)
+
+    async def call(
+        self,
+        server: str,
+        tool: str,
+        arguments: Optional[Dict[str, Any]],
+        fetch: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Cached value if fresh, else fetch() (stored unless isError); stale value if fetch() fails."""
+        ttl = self.ttl(tool)
+        if ttl <= 0:
+            return await fetch()
+        key = self.key(server, tool, arguments)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and now - entry[0] < ttl:
+            mcp_tool_cache_lookups_total.labels(server=server, tool=tool, result="hit").inc()
+            return copy.deepcopy(entry[1])
+        try:
+            value = await fetch()
+        except Exception as e:
+            if entry is not None and now - entry[0] < ttl + self.stale_secs:
+                mcp_tool_cache_lookups_total.labels(server=server, tool=tool, result="stale").inc()
+                logger.warning(f"{server}/{tool} failed ({e}); serving a result cached {now - entry[0]:.0f}s ago")
+                return copy.deepcopy(entry[1])
+            mcp_tool_cache_lookups_total.labels(server=server, tool=tool, result="miss").inc()
+            raise
+        mcp_tool_cache_lookups_total.labels(server=server, tool=tool, result="miss").inc()
+        if not getattr(value, "isError", False):
+            self._entries.put(key, (time.monotonic(), copy.deepcopy(value)))
+        return value
+
+    def fresh(self, server: str, tool: str, arguments: Optional[Dict[str, Any]]) -> bool:
+        """Whether call() would be answered from the cache without fetching."""
+        ttl = self.ttl(tool)
+        entry = self._entries.get(self.key(server, tool, arguments)) if ttl > 0 else None
+        return entry is not None and time.monotonic() - entry[0] < ttl
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Shared by every MCP client in the process
+tool_cache = MCPToolCache()
@@ -0,0 +1,290 @@
+"""
+Long-lived MCP client sessions.
+
+Opening an MCP session costs a streamable-HTTP connection plus the initialize()
+handshake, which dominates a single tool call. MCPSessionPool keeps sessions
+open between calls and multiplexes concurrent call_tool() requests over them
+(MCP matches responses to requests by id, so one session serves many callers).
+
+- connect(): async context manager yielding an initialized session; injectable,
+  so tests can run against an in-process stand-in server
+- Each session is owned by a background task that enters and exits connect(),
+  as anyio requires, and waits until the pool closes it
+- Sessions are opened lazily, up to `size`; a call goes to the least busy one
+- A session idle for longer than health_interval is pinged before reuse;
+  one idle for longer than idle_timeout is closed
+- The pool lock only covers bookkeeping: connects (with their retries) and pings
+  run outside it, so a slow reconnect never blocks callers a live session can serve
+- A transport failure drops the session, and call_tool retries once on a new one;
+  MCPUnavailableError means connect() kept failing for retry_attempts
+
+A pool and its sessions belong to the event loop that created them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncContextManager, AsyncIterator, Callable, Dict, List, Optional
+
+from agents.utils.metrics import mcp_session_connects_total, mcp_sessions_open
+
+logger = logging.getLogger(__name__)
+
+Connect = Callable[[], AsyncContextManager[Any]]
+
+_TRANSPORT_MODULES = ("anyio", "httpx", "httpcore", "aiohttp")
+
+
+class MCPUnavailableError(ConnectionError):
+    """No session could be opened within the pool's connect retries."""
+
+
+def is_transport_error(error: BaseException) -> bool:
+    """Errors that mean the session itself is unusable (as opposed to a failed tool call)."""
+    if isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError, EOFError)):
+        return True
+    return type(error).__module__.startswith(_TRANSPORT_MODULES)
+
+
+class _Connection:
+    def __init__(self) -> None:
+        self.session: Any = None
+        self.task: Optional["asyncio.Task[None]"] = None
+        self.closing = asyncio.Event()
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+        self.broken = False
+
+    @property
+    def alive(self) -> bool:
+        return not self.broken and self.task is not None and not self.task.done()
+
+
+class MCPSessionPool:
+    """Pool of long-lived MCP sessions for one server; see the module docstring."""
+
+    def __init__(
+        self,
+        connect: Connect,
+        size: int = 2,
+        idle_timeout: float = 300.0,
+        health_interval: float = 60.0,
+        retry_attempts: int = 3,
+        retry_backoff: float = 1.5,
+        name: str = "mcp",
+    ) -> None:
+        self.connect = connect
+        self.size = max(1, size)
+        self.idle_timeout = idle_timeout
+        self.health_interval = health_interval
+        self.retry_attempts = max(1, retry_attempts)
+        self.retry_backoff = retry_backoff
+        self.name = name
+        self._connections: List[_Connection] = []
+        self._opening = 0
+        self._lock = asyncio.Lock()
+        # Notified when an open finishes, for callers waiting on a full pool with no live session
+        self._changed = asyncio.Condition(self._lock)
+        self._reaper: Optional["asyncio.Task[None]"] = None
+        self._closed = False
+
+    def __len__(self) -> int:
+        return sum(1 for c in self._connections if c.alive)
+
+    # --- connections -------------------------------------------------------
+
+    async def _open_once(self) -> _Connection:
+        conn = _Connection()
+        ready: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+
+        async def own() -> None:
+            try:
+                async with self.connect() as session:
+                    conn.session = session
+                    if ready.done():  # the opener was cancelled
+                        return
+                    ready.set_result(None)
+                    await conn.closing.wait()
+            except BaseException as e:
+                if not ready.done():
+                    ready.set_exception(e)
+                elif not conn.closing.is_set():
+                    logger.warning(f"MCP session ({self.name}) dropped: {e!r}")
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+            finally:
+                conn.broken = True
+
+        conn.task = asyncio.ensure_future(own())
+        try:
+            await ready
+        except BaseException:
+            conn.task.cancel()
+            raise
+        return conn
+
+    async def _open(self) -> _Connection:
+        last_err: Optional[BaseException] = None
+        for attempt in range(1, self.retry_attempts + 1):
+            try:
+                conn = await self._open_once()
+            except Exception as e:
+                last_err = e
+                mcp_session_connects_total.labels(server=self.name, result="error").inc()
+                logger.warning(f"MCP session connect failed (attempt {attempt}/{self.retry_attempts}): {e}")
+                if attempt < self.retry_attempts:
+                    await asyncio.sleep(self.retry_backoff * attempt)
+                continue
+            mcp_session_connects_total.labels(server=self.name, result="ok").inc()
+            mcp_sessions_open.labels(server=self.name).inc()
+            self._connections.append(conn)
+            if self._reaper is None or self._reaper.done():
+                self._reaper = asyncio.ensure_future(self._reap_forever())
+            return conn
+        raise MCPUnavailableError(f"MCP session ({self.name}) unavailable after {self.retry_attempts} attempts: {last_err}")
+
+    def _detach(self, conn: _Connection) -> None:
+        """Takes a session out of rotation and tells its owner task to close it."""
+        if conn in self._connections:
+            self._connections.remove(conn)
+            mcp_sessions_open.labels(server=self.name).dec()
+        conn.broken = True
+        conn.closing.set()
+
+    @staticmethod
+    async def _finish(conn: _Connection) -> None:
+        if conn.task is not None and not conn.task.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(conn.task), timeout=5.0)
+            except BaseException:
+                conn.task.cancel()
+
+    async def _discard(self, conn: _Connection) -> None:
+        self._detach(conn)
+        await self._finish(conn)
+
+    async def _healthy(self, conn: _Connection) -> bool:
+        """Pings a session reserved by the caller if nobody else used it within health_interval."""
+        if not conn.alive:
+            return False
+        if conn.in_flight > 1 or time.monotonic() - conn.last_used < self.health_interval:
+            return True
+        ping = getattr(conn.session, "send_ping", None)
+        if ping is None:
+            return True
+        try:
+            await asyncio.wait_for(ping(), timeout=10.0)
+            return True
+        except Exception as e:
+            logger.info(f"MCP session ({self.name}) failed health check: {e!r}")
+            return False
+
+    def _stale(self) -> List[_Connection]:
+        """Detaches idle and dead sessions (call under the lock); the caller finishes them after releasing it."""
+        now = time.monotonic()
+        stale = [
+            c
+            for c in self._connections
+            if not c.alive or (c.in_flight == 0 and now - c.last_used >= self.idle_timeout)
+        ]
+        for conn in stale:
+            self._detach(conn)
+        return stale
+
+    async def _reap_forever(self) -> None:
+        while self._connections:
+            await asyncio.sleep(max(0.05, min(self.idle_timeout, self.health_interval) / 2))
+            async with self._lock:
+                stale = self._stale()
+            for conn in stale:
+                await self._finish(conn)
+
+    async def _acquire(self) -> _Connection:
+        while True:
+            if self._closed:
+                raise RuntimeError(f"MCP session pool ({self.name}) is closed")
+            conn: Optional[_Connection] = None
+            wait = False
+            async with self._changed:
+                stale = self._stale()
+                live = sorted(self._connections, key=lambda c: c.in_flight)
+                if live and (live[0].in_flight == 0 or len(live) + self._opening >= self.size):
+                    conn = live[0]
+                    # Reserved before the lock is released, so the reaper leaves it alone during the ping
+                    conn.in_flight += 1
+                elif self._opening >= self.size:
+                    wait = True
+                else:
+                    self._opening += 1
+            for old in stale:
+                await self._finish(old)
+            if wait:
+                # Every slot is still connecting: wait for one to finish, then look again
+                async with self._changed:
+                    if not self._connections and self._opening >= self.size:
+                        await self._changed.wait()
+                continue
+            if conn is None:
+                try:
+                    conn = await self._open()
+                finally:
+                    async with self._changed:
+                        self._opening -= 1
+                        self._changed.notify_all()
+                conn.in_flight += 1
+                return conn
+            if await self._healthy(conn):
+                return conn
+            conn.in_flight -= 1
+            await self._discard(conn)
+
+    # --- public API --------------------------------------------------------
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[Any]:
+        """Leases a session for several requests; it stays shared with other callers."""
+        conn = await self._acquire()
+        try:
+            yield conn.session
+        except Exception as e:
+            if is_transport_error(e):
+                conn.broken = True
+            raise
+        finally:
+            conn.in_flight -= 1
+            conn.last_used = time.monotonic()
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Any:
+        """session.call_tool on a pooled session; retried once on a fresh session after a transport error."""
+        for attempt in (1, 2):
+            try:
+                async with self.session() as session:
+                    return await session.call_tool(name, arguments or {})
+            except Exception as e:
+                if attempt == 2 or isinstance(e, MCPUnavailableError) or not is_transport_error(e):
+                    raise
+                logger.info(f"MCP call {name} lost its session ({e!r}), reconnecting")
+
+    async def list_tools(self) -> Any:
+        async with self.session() as session:
+            return await session.list_tools()
+
+    async def warm(self) -> None:
+        """Opens (or health-checks) a session now, so later calls skip the handshake."""
+        async with self.session():
+            pass
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._reaper is not None:
+            self._reaper.cancel()
+            await asyncio.gather(self._reaper, return_exceptions=True)
+        async with self._lock:
+            conns = list(self._connections)
+            for conn in conns:
+                self._detach(conn)
+        for conn in conns:
+            await self._finish(conn)
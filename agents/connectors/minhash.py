@@ -0,0 +1,136 @@
+"""
+MinHash signatures and LSH banding for near-duplicate text detection.
+
+Syndicated stories differ by a byline or a sentence; their word-shingle sets
+overlap almost entirely. A MinHash signature estimates the Jaccard similarity
+of two shingle sets, and LSH banding finds candidate pairs without comparing
+every chunk with every other one.
+
+- minhash_signature(text): num_perm uint32 values, stable across processes (crc32 + fixed seed)
+- MinHashLSH: insert/remove/query by key; candidates are verified on the full signature
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import zlib
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+import numpy as np
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_SEED = 1
+
+
+def shingles(text: str, size: int = 5) -> Set[int]:
+    """crc32 of each run of `size` consecutive lowercased words (the whole text if shorter)."""
+    words = _WORD_RE.findall((text or "").lower())
+    if not words:
+        return set()
+    if len(words) <= size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))}
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+
+_PERMUTATIONS: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+
+def _permutations(num_perm: int) -> Tuple[np.ndarray, np.ndarray]:
+    perms = _PERMUTATIONS.get(num_perm)
+    if perms is None:
+        rng = np.random.RandomState(_SEED)
+        a = rng.randint(1, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64)
+        b = rng.randint(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64)
+        perms = _PERMUTATIONS[num_perm] = (a, b)
+    return perms
+
+
+def minhash_signature(text: str, num_perm: int = 128, shingle_size: int = 5) -> Optional[np.ndarray]:
+    """uint32 MinHash signature of the text's word shingles; None for texts without words."""
+    hashes = shingles(text, shingle_size)
+    if not hashes:
+        return None
+    a, b = _permutations(num_perm)
+    values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+    # Universal hashing (a * x + b) mod p, one row per permutation; uint64 wrap-around is intended
+    with np.errstate(over="ignore"):
+        permuted = ((values[None, :] * a[:, None] + b[:, None]) % _MERSENNE_PRIME) & _MAX_HASH
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def estimate_jaccard(sig_a: np.ndarray, sig_b: np.ndarray) -> float:
+    return float(np.mean(sig_a == sig_b))
+
+
+def _optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    """(bands, rows) with bands * rows <= num_perm whose S-curve midpoint (1/b)^(1/r) is closest to threshold."""
+    best = (num_perm, 1)
+    best_err = float("inf")
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        err = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+        if err < best_err:
+            best, best_err = (bands, rows), err
+    return best
+
+
+class MinHashLSH:
+    """
+    Banded LSH index over MinHash signatures.
+    query() returns keys whose estimated Jaccard similarity with the signature
+    is at least `threshold`, best first.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128) -> None:
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = _optimal_bands(threshold, num_perm)
+        self._lock = threading.Lock()
+        self._buckets: List[Dict[bytes, Set[Hashable]]] = [{} for _ in range(self.bands)]
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._signatures
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def insert(self, key: Hashable, signature: np.ndarray) -> None:
+        signature = np.asarray(signature, dtype=np.uint32)
+        if signature.shape != (self.num_perm,):
+            raise ValueError(f"expected a signature of {self.num_perm} values, got {signature.shape}")
+        with self._lock:
+            if key in self._signatures:
+                self._remove(key)
+            self._signatures[key] = signature
+            for band, bucket_key in zip(self._buckets, self._band_keys(signature)):
+                band.setdefault(bucket_key, set()).add(key)
+
+    def remove(self, key: Hashable) -> None:
+        with self._lock:
+            if key in self._signatures:
+                self._remove(key)
+
+    def _remove(self, key: Hashable) -> None:
+        signature = self._signatures.pop(key)
+        for band, bucket_key in zip(self._buckets, self._band_keys(signature)):
+            members = band.get(bucket_key)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del band[bucket_key]
+
+    def query(self, signature: np.ndarray) -> List[Tuple[Hashable, float]]:
+        signature = np.asarray(signature, dtype=np.uint32)
+        with self._lock:
+            candidates: Set[Hashable] = set()
+            for band, bucket_key in zip(self._buckets, self._band_keys(signature)):
+                candidates.update(band.get(bucket_key, ()))
+            scored = [(key, estimate_jaccard(signature, self._signatures[key])) for key in candidates]
+        return sorted([(k, s) for k, s in scored if s >= self.threshold], key=lambda x: x[1], reverse=True)
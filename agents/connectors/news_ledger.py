@@ -0,0 +1,130 @@
+"""
+Persistent ingest ledger for NewsRAG.
+
+One sqlite row per article:
+
+    url_hash -> content_hash, chunk_ids (JSON list), ingested_at (unix seconds)
+
+Re-runs compare content hashes against the ledger, so unchanged articles are
+neither re-chunked nor re-embedded, and changed ones know which chunk ids to
+replace. The ledger is written only after the vector store accepted the chunks.
+
+It also keeps the MinHash signature of every stored chunk, so near-duplicate
+checks span runs:
+
+    chunk_id -> url_hash, signature (uint32 bytes)
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    url_hash TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    chunk_ids TEXT NOT NULL,
+    ingested_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunk_signatures (
+    chunk_id TEXT PRIMARY KEY,
+    url_hash TEXT NOT NULL,
+    signature BLOB NOT NULL
+)
+"""
+
+
+@dataclass(frozen=True)
+class LedgerEntry:
+    url_hash: str
+    content_hash: str
+    chunk_ids: Tuple[str, ...]
+    ingested_at: float
+
+
+class IngestLedger:
+    """sqlite-backed url_hash -> ingest state map; path ":memory:" keeps it per process."""
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL" if path != ":memory:" else "PRAGMA journal_mode=MEMORY")
+            self._conn.executescript(_SCHEMA)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0])
+
+    def get_many(self, url_hashes: Sequence[str]) -> Dict[str, LedgerEntry]:
+        out: Dict[str, LedgerEntry] = {}
+        keys = list(dict.fromkeys(url_hashes))
+        with self._lock:
+            # Stay well below SQLITE_MAX_VARIABLE_NUMBER
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT url_hash, content_hash, chunk_ids, ingested_at FROM articles "
+                    f"WHERE url_hash IN ({','.join('?' * len(part))})",
+                    part,
+                ).fetchall()
+                for url_hash, content_hash, chunk_ids, ingested_at in rows:
+                    out[url_hash] = LedgerEntry(url_hash, content_hash, tuple(json.loads(chunk_ids)), ingested_at)
+        return out
+
+    def record_many(self, entries: Iterable[Tuple[str, str, List[str]]]) -> None:
+        """Upserts (url_hash, content_hash, chunk_ids) in one transaction, stamped with the current time."""
+        now = time.time()
+        rows = [(u, c, json.dumps(list(ids)), now) for u, c, ids in entries]
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO articles (url_hash, content_hash, chunk_ids, ingested_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(url_hash) DO UPDATE SET content_hash=excluded.content_hash, "
+                "chunk_ids=excluded.chunk_ids, ingested_at=excluded.ingested_at",
+                rows,
+            )
+
+    def forget(self, url_hashes: Sequence[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM articles WHERE url_hash = ?", [(u,) for u in url_hashes])
+
+    def record_signatures(self, rows: Iterable[Tuple[str, str, bytes]]) -> None:
+        """Upserts (chunk_id, url_hash, MinHash signature bytes) in one transaction."""
+        rows = list(rows)
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunk_signatures (chunk_id, url_hash, signature) VALUES (?, ?, ?)", rows
+            )
+
+    def forget_signatures(self, chunk_ids: Sequence[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM chunk_signatures WHERE chunk_id = ?", [(c,) for c in chunk_ids])
+
+    def iter_signatures(self, batch_size: int = 10000) -> Iterator[Tuple[str, str, bytes]]:
+        """Yields (chunk_id, url_hash, signature bytes) for every stored chunk."""
+        last = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT chunk_id, url_hash, signature FROM chunk_signatures WHERE chunk_id > ? "
+                    "ORDER BY chunk_id LIMIT ?",
+                    (last, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last = rows[-1][0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,12 +1,32 @@
 import os
 import json
 import hashlib
+import threading
+import time
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from langchain_community.vectorstores.chroma import Chroma
+import numpy as np
 
 from agents.connectors.news_mcp_adapter import News
+from agents.connectors.embeddings import get_default_embeddings
+from agents.connectors.bm25 import BM25Index, hybrid_search_many
+from agents.connectors.chroma import MARKETS_COLLECTION
+from agents.connectors.minhash import MinHashLSH, minhash_signature
+from agents.connectors.news_ledger import IngestLedger
+from agents.connectors.vectorstores import (
+    STORES,
+    PartitionedVectorStore,
+    VectorStore,
+    open_partitioned_store,
+    open_vector_store,
+)
+from agents.utils.lru import LRUCache
+from agents.utils.metrics import rag_index_documents_total, rag_query_cache_lookups_total
+from agents.utils.pipeline import Pipeline, Stage
+
+
+NEWS_COLLECTION = "news_chunks"
 
 
 def _safe_float(value: Any, default: float = 0.0) -> float:
@@ -22,9 +42,23 @@ def _safe_float(value: Any, default: float = 0.0) -> float:
 
 class NewsRAG:
     """
-    Minimal news RAG: ingest from MCP adapter, index in Chroma, query and link to markets.
-    - Embeddings backend selected via env RAG_EMBEDDINGS (default: fake; 'openai' to enable OpenAI)
+    Minimal news RAG: ingest from MCP adapter, index in a vector store, query and link to markets.
+    - Embeddings backend selected via env RAG_EMBEDDINGS (default: local hashing; 'fake' for random vectors, 'openai' to enable OpenAI)
+    - Vector backend selected via env RAG_VECTOR_BACKEND (chroma | numpy)
+    - query_news fuses vector and BM25 rankings unless RAG_HYBRID=false
+    - ingest_news keeps an ingest ledger (url_hash -> content hash, chunk ids), so
+      re-runs skip unchanged articles; counts are in last_ingest_report
+    - near-duplicate chunks (MinHash/LSH, NEWS_DEDUP_THRESHOLD) are dropped before embedding
+    - chunks are partitioned by publication day/week (NEWS_PARTITION); partitions older than
+      NEWS_RETENTION_DAYS are dropped on ingest, and query_news(max_age_days=...) searches only
+      the partitions inside the window
     - Persist directory configurable via env NEWS_RAG_DIR (default: ./local_news_db)
+    - The store, BM25 index, ledger and LSH index are shared process-wide (vectorstores.STORES),
+      so every NewsRAG over the same directory sees the same data
+    - query results are kept in an LRU cache (NEWS_QUERY_CACHE_SIZE entries, 0 disables) keyed
+      by the store version, so any write to the collection invalidates them; the store is
+      refreshed from disk on every query, so that includes writes persisted by another process
+      (numpy backend), and NEWS_QUERY_CACHE_TTL_SECS bounds staleness where they go unnoticed
     """
 
     def __init__(self, persist_directory: Optional[str] = None) -> None:
@@ -35,35 +69,32 @@ class NewsRAG:
         self._persist_enabled = os.getenv("RAG_PERSIST", "false").lower() == "true"
         self.embedding_function = self._get_default_embeddings()
         self.news_client = News()
+        self._store: Optional[VectorStore] = None
+        self._ledger: Optional[IngestLedger] = None
+        self._partition = os.getenv("NEWS_PARTITION", "week").lower()
+        try:
+            self._retention_days = float(os.getenv("NEWS_RETENTION_DAYS", "0"))
+        except Exception:
+            self._retention_days = 0.0
+        self._near_dedupe = os.getenv("NEWS_NEAR_DEDUP", "true").lower() == "true"
+        try:
+            self._dedupe_threshold = float(os.getenv("NEWS_DEDUP_THRESHOLD", "0.85"))
+        except Exception:
+            self._dedupe_threshold = 0.85
+        self.last_ingest_report: Dict[str, Any] = {}
+        try:
+            cache_size = int(os.getenv("NEWS_QUERY_CACHE_SIZE", "512"))
+        except Exception:
+            cache_size = 512
+        self._query_cache = LRUCache(cache_size)
+        try:
+            self._query_cache_ttl = float(os.getenv("NEWS_QUERY_CACHE_TTL_SECS", "300"))
+        except Exception:
+            self._query_cache_ttl = 300.0
+        self._hybrid = os.getenv("RAG_HYBRID", "true").lower() == "true"
 
     def _get_default_embeddings(self) -> Any:
-        choice = os.getenv("RAG_EMBEDDINGS", "fake").lower()
-        if choice == "openai":
-            try:
-                from openai import OpenAI
-
-                class OpenAIEmbeddingAdapter:
-                    def __init__(self, model: str = "text-embedding-3-small") -> None:
-                        self.client = OpenAI()
-                        self.model = model
-
-                    def embed_documents(self, texts: List[str]) -> List[List[float]]:
-                        response = self.client.embeddings.create(
-                            model=self.model, input=texts
-                        )
-                        return [d.embedding for d in response.data]
-
-                    def embed_query(self, text: str) -> List[float]:
-                        response = self.client.embeddings.create(
-                            model=self.model, input=[text]
-                        )
-                        return response.data[0].embedding
-
-                return OpenAIEmbeddingAdapter()
-            except Exception:
-                pass
-        from langchain_community.embeddings import FakeEmbeddings
-        return FakeEmbeddings(size=1536)
+        return get_default_embeddings()
 
     @staticmethod
     def _now_utc() -> datetime:
@@ -106,161 +137,460 @@ class NewsRAG:
         if not os.path.isdir(path):
             os.makedirs(path, exist_ok=True)
 
-    def _get_chroma(self) -> Chroma:
-        """Returns a Chroma vectorstore. If RAG_PERSIST is not enabled, use in-memory client (no writes)."""
+    def _get_store(self) -> VectorStore:
+        """
+        Returns the shared news vector store. If RAG_PERSIST is not enabled, keep it in memory (no writes).
+        NEWS_PARTITION=day|week (default week) splits it into time partitions by published_ts;
+        none keeps a single collection.
+        Fetched from the registry on every call, which reloads what other processes persisted.
+        """
+        directory = self.persist_directory if self._persist_enabled else None
+        if self._partition in ("day", "week"):
+            self._store = open_partitioned_store(
+                NEWS_COLLECTION, directory, self._partition, retention_days=self._retention_days
+            )
+        else:
+            self._store = open_vector_store(NEWS_COLLECTION, directory)
+        return self._store
+
+    def _expire(self) -> int:
+        """Drops partitions past NEWS_RETENTION_DAYS and forgets their articles; returns dropped chunks."""
+        store = self._get_store()
+        if not isinstance(store, PartitionedVectorStore):
+            return 0
+        removed = store.expire()
+        if not removed:
+            return 0
+        lexical = STORES.get(("bm25", store))
+        near_dupes = STORES.get(self._near_dupes_key())
+        for doc_id in removed:
+            if lexical is not None:
+                lexical.remove(doc_id)
+            if near_dupes is not None:
+                near_dupes.remove(doc_id)
+        ledger = self._get_ledger()
+        ledger.forget_signatures(removed)
+        ledger.forget(list({doc_id.rsplit(":", 1)[0] for doc_id in removed}))
+        return len(removed)
+
+    @staticmethod
+    def _published_ts(published_at: str, default: float) -> float:
+        dt = NewsRAG._parse_dt(published_at)
+        if dt is None:
+            return default
         try:
-            if not self._persist_enabled:
-                # In-memory client with telemetry disabled
-                from chromadb.config import Settings as _Settings  # type: ignore
-                from chromadb import Client as _Client  # type: ignore
-                client = _Client(_Settings(is_persistent=False, anonymized_telemetry=False))
-                return Chroma(
-                    client=client,
-                    collection_name="news_inmemory",
-                    embedding_function=self.embedding_function,
-                )
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            return dt.timestamp()
         except Exception:
-            # Fall back to default persistent behavior if in-memory client not available
-            pass
-        # Persistent vectorstore (may write to disk)
-        return Chroma(
-            persist_directory=self.persist_directory,
-            embedding_function=self.embedding_function,
-        )
+            return default
 
-    def ingest_news(
-        self,
-        days: int = 14,
-        max_items: int = 300,
-        keywords_csv: str = "",
-    ) -> int:
+    def _get_ledger(self) -> IngestLedger:
+        """Ingest ledger next to the persistent store; in memory (one per process) when the store is too."""
+        if self._ledger is None:
+            path = ":memory:"
+            if self._persist_enabled:
+                self._ensure_dir(self.persist_directory)
+                path = os.path.realpath(os.path.join(self.persist_directory, "ingest_ledger.sqlite3"))
+            self._ledger = STORES.get_or_create(("ingest_ledger", path), lambda: IngestLedger(path))
+        return self._ledger
+
+    def _near_dupes_key(self) -> Tuple[Any, ...]:
+        return ("minhash", self._get_ledger(), self._dedupe_threshold)
+
+    def _get_near_dupes(self) -> Optional[MinHashLSH]:
+        """LSH index over the MinHash signatures of stored chunks, loaded from the ledger once."""
+        if not self._near_dedupe:
+            return None
+
+        def build() -> MinHashLSH:
+            index = MinHashLSH(threshold=self._dedupe_threshold)
+            for chunk_id, _, signature in self._get_ledger().iter_signatures():
+                index.insert(chunk_id, np.frombuffer(signature, dtype=np.uint32))
+            return index
+
+        return STORES.get_or_create(self._near_dupes_key(), build)
+
+    def _get_lexical(self) -> BM25Index:
+        """BM25 index over title + chunk text, built from the store on first use."""
+        store = self._get_store()
+
+        def build() -> BM25Index:
+            index = BM25Index()
+            got = store.get()
+            for doc_id, metadata, text in zip(got["ids"], got["metadatas"], got["documents"]):
+                index.add(doc_id, f"{metadata.get('title') or ''}\n{text}")
+            return index
+
+        return STORES.get_or_create(("bm25", store), build)
+
+    def _iter_articles(self, days: int, keywords: List[str]) -> Iterator[List[Dict[str, Any]]]:
         """
-        Fetch news from MCP adapter and index into Chroma as full-text chunks.
-        Returns number of indexed chunks.
+        Yields article batches as sources respond: daily news first, then keyword
+        searches fanned out concurrently over one MCP session (Verge News),
+        falling back to the adapter's serial interface.
         """
-        self._ensure_dir(self.persist_directory)
-
-        # Collect articles from MCP (Verge News) and adapter fallback
-        articles: List[Dict[str, Any]] = []
-        # Prefer direct Verge News MCP
         try:
             from agents.connectors.verge_news_mcp import VergeNewsMCPSync
             verge = VergeNewsMCPSync()
+        except Exception:
+            verge = None
+        if verge is not None:
             try:
                 daily = verge.get_daily_news()
                 if isinstance(daily, list):
-                    articles.extend(daily)
+                    yield daily
             except Exception:
                 pass
-            for kw in [k.strip() for k in keywords_csv.split(",") if k.strip()]:
+            if keywords:
                 try:
-                    res = verge.search_news(kw, days_back=days)
-                    if isinstance(res, list):
-                        articles.extend(res)
+                    for _, res in verge.iter_search_many(keywords, days_back=days):
+                        if isinstance(res, list):
+                            yield res
                 except Exception:
                     pass
+            return
+
+        # Fallback: use adapter generic interface if available
+        try:
+            daily = getattr(self.news_client, "get_daily_news", lambda: [])()
+            if isinstance(daily, list):
+                yield daily
         except Exception:
-            # Fallback: use adapter generic interface if available
+            pass
+        for kw in keywords:
             try:
-                daily = getattr(self.news_client, "get_daily_news", lambda: [])()
-                if isinstance(daily, list):
-                    articles.extend(daily)
+                res = getattr(self.news_client, "get_articles_for_cli_keywords", lambda *_: [])(kw)
+                if isinstance(res, list):
+                    # Convert Pydantic Articles to dicts if needed
+                    items: List[Dict[str, Any]] = []
+                    for it in res:
+                        try:
+                            items.append(it.dict())  # type: ignore[attr-defined]
+                        except Exception:
+                            items.append(it)
+                    yield items
             except Exception:
                 pass
-            for kw in [k.strip() for k in keywords_csv.split(",") if k.strip()]:
-                try:
-                    res = getattr(self.news_client, "get_articles_for_cli_keywords", lambda *_: [])(kw)
-                    if isinstance(res, list):
-                        # Convert Pydantic Articles to dicts if needed
-                        items: List[Dict[str, Any]] = []
-                        for it in res:
-                            try:
-                                items.append(it.dict())  # type: ignore[attr-defined]
-                            except Exception:
-                                items.append(it)
-                        articles.extend(items)
-                except Exception:
-                    pass
 
-        # Normalize and dedupe by url_hash
-        seen: set[str] = set()
-        normalized: List[Dict[str, Any]] = []
-        now = self._now_utc()
-        for a in articles:
-            title = a.get("title") or ""
-            desc = a.get("description") or ""
-            content = a.get("content") or ""
-            url = a.get("url") or ""
-            if not url and not (title or desc or content):
-                continue
-            url_hash = self._md5(url or title + desc)
-            if url_hash in seen:
-                continue
-            seen.add(url_hash)
-            published_at = a.get("published_at") or a.get("publishedAt") or ""
-            source = a.get("source") or ""
-            if isinstance(source, dict):
-                source = source.get("name") or source.get("id") or ""
-            text = "\n\n".join([title, desc, content]).strip()
-            normalized.append(
-                {
-                    "url": url,
-                    "url_hash": url_hash,
-                    "title": title,
-                    "description": desc,
-                    "content": content,
-                    "published_at": published_at,
-                    "source": source,
-                    "fetched_at": now.isoformat(),
-                    "text": text,
-                }
-            )
-
-        # Limit items
-        if len(normalized) > max_items:
-            normalized = normalized[:max_items]
+    def _normalize_article(self, a: Dict[str, Any], now: datetime) -> Optional[Dict[str, Any]]:
+        title = a.get("title") or ""
+        desc = a.get("description") or ""
+        content = a.get("content") or ""
+        url = a.get("url") or ""
+        if not url and not (title or desc or content):
+            return None
+        published_at = a.get("published_at") or a.get("publishedAt") or ""
+        source = a.get("source") or ""
+        if isinstance(source, dict):
+            source = source.get("name") or source.get("id") or ""
+        text = "\n\n".join([title, desc, content]).strip()
+        return {
+            "url": url,
+            "url_hash": self._md5(url or title + desc),
+            "title": title,
+            "description": desc,
+            "content": content,
+            "published_at": published_at,
+            "source": source,
+            "fetched_at": now.isoformat(),
+            "text": text,
+            "content_hash": self._md5(text),
+        }
 
-        # Index as chunks
-        docs: List[Tuple[str, Dict[str, Any]]] = []
-        for n in normalized:
-            chunks = self._simple_chunks(n["text"])
-            for idx, ch in enumerate(chunks):
+    def ingest_news(
+        self,
+        days: int = 14,
+        max_items: int = 300,
+        keywords_csv: str = "",
+        batch_size: int = 64,
+        queue_size: int = 128,
+        checkpoint_every: int = 16,
+    ) -> int:
+        """
+        Fetch news from MCP adapter and index into the vector store as full-text chunks.
+        Runs as a streaming pipeline, one thread per stage with bounded queues between them:
+            fetch -> normalize (dedupe, ledger check) -> chunk -> embed (batch_size) -> upsert
+        - Memory stays flat: at most queue_size items wait between two stages
+        - Every checkpoint_every batches the store is persisted and the ledger records the
+          articles whose chunks are all stored, so an interrupted run resumes from there
+        - Unchanged articles (per the ingest ledger) are skipped; changed ones have their
+          chunks replaced
+        - Partitions past NEWS_RETENTION_DAYS are dropped first, and articles older than
+          the retention window are not ingested (counted as expired)
+        - Chunks whose MinHash Jaccard estimate against another article's chunk reaches
+          NEWS_DEDUP_THRESHOLD are dropped before embedding (NEWS_NEAR_DEDUP=false disables);
+          signatures are kept in the ledger so the check spans runs
+        - last_ingest_report holds new/updated/skipped counts and per-stage throughput
+        Returns number of (re-)indexed chunks.
+        """
+        self._ensure_dir(self.persist_directory)
+        store = self._get_store()
+        ledger = self._get_ledger()
+        embeddings = self.embedding_function
+        now = self._now_utc()
+        keywords = [k.strip() for k in keywords_csv.split(",") if k.strip()]
+        chunks_expired = self._expire()
+        # Each stage thread updates only its own counters; they are merged into the report at the end
+        normalize_counts = {"new": 0, "updated": 0, "skipped": 0, "expired": 0}
+        chunk_counts = {"chunks_near_duplicate": 0}
+        upsert_counts = {"chunks_embedded": 0}
+        retention_cutoff = None
+        if isinstance(store, PartitionedVectorStore) and store.retention_days:
+            retention_cutoff = now.timestamp() - store.retention_days * 86400.0
+        seen: set[str] = set()
+        lock = threading.Lock()
+        # url_hash -> [content hash, chunk ids, previous chunk ids, chunks not stored yet, signatures]
+        pending: Dict[str, List[Any]] = {}
+        completed: List[Tuple[str, str, List[str]]] = []
+        completed_signatures: List[Tuple[str, str, bytes]] = []
+        near_dupes = self._get_near_dupes()
+        buffer: List[Tuple[str, str, Dict[str, Any]]] = []
+        batches_done = 0
+
+        def fetch() -> Iterator[Dict[str, Any]]:
+            batches = self._iter_articles(days, keywords)
+            try:
+                for batch in batches:
+                    yield from batch
+            finally:
+                # Cancels keyword searches still in flight
+                batches.close()
+
+        def normalize(article: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+            if len(seen) >= max_items:
+                return
+            n = self._normalize_article(article, now)
+            if n is None or n["url_hash"] in seen:
+                return
+            seen.add(n["url_hash"])
+            if len(seen) >= max_items:
+                pipeline.close_source()
+            n["published_ts"] = self._published_ts(n["published_at"], now.timestamp())
+            if retention_cutoff is not None and n["published_ts"] < retention_cutoff:
+                # Would land in an already expired partition
+                normalize_counts["expired"] += 1
+                return
+            entry = ledger.get_many([n["url_hash"]]).get(n["url_hash"])
+            if entry is not None and entry.content_hash == n["content_hash"]:
+                # An article whose chunks were all near-duplicates has no chunk ids
+                if not entry.chunk_ids or len(store.get(ids=list(entry.chunk_ids))["ids"]) == len(entry.chunk_ids):
+                    normalize_counts["skipped"] += 1
+                    rag_index_documents_total.labels(collection=NEWS_COLLECTION, action="reused").inc(
+                        len(entry.chunk_ids)
+                    )
+                    return
+            normalize_counts["updated" if entry is not None else "new"] += 1
+            n["previous_chunk_ids"] = entry.chunk_ids if entry is not None else ()
+            yield n
+
+        def chunk(n: Dict[str, Any]) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+            url_hash = n["url_hash"]
+            kept: List[Tuple[int, str]] = []
+            signatures: List[Tuple[str, str, bytes]] = []
+            for idx, ch in enumerate(self._simple_chunks(n["text"])):
+                # Ids are stable per article chunk, so re-ingests overwrite
+                chunk_id = f"{url_hash}:{idx}"
+                if near_dupes is not None:
+                    signature = minhash_signature(ch)
+                    if signature is not None:
+                        # Overlapping chunks of the same article (or its previous version) do not count
+                        if any(key.rsplit(":", 1)[0] != url_hash for key, _ in near_dupes.query(signature)):
+                            chunk_counts["chunks_near_duplicate"] += 1
+                            rag_index_documents_total.labels(collection=NEWS_COLLECTION, action="near_duplicate").inc()
+                            continue
+                        near_dupes.insert(chunk_id, signature)
+                        signatures.append((chunk_id, url_hash, signature.tobytes()))
+                kept.append((idx, ch))
+            ids = [f"{url_hash}:{idx}" for idx, _ in kept]
+            with lock:
+                if kept:
+                    pending[url_hash] = [n["content_hash"], ids, n["previous_chunk_ids"], len(kept), signatures]
+                else:
+                    # Nothing left to embed: the article is done once its old chunks are gone
+                    finish(url_hash, n["content_hash"], [], n["previous_chunk_ids"], [])
+            for chunk_id, (idx, ch) in zip(ids, kept):
                 meta = {
                     "url": n["url"],
-                    "url_hash": n["url_hash"],
+                    "url_hash": url_hash,
                     "title": n["title"],
                     "published_at": n["published_at"],
+                    "published_ts": n["published_ts"],
                     "source": n["source"],
                     "chunk_index": idx,
-                    "chunks_total": len(chunks),
+                    "chunks_total": len(kept),
                 }
-                docs.append((ch, meta))
+                yield chunk_id, ch, meta
+
+        def embed_buffer() -> Tuple[List[str], List[List[float]], List[Dict[str, Any]], List[str]]:
+            ids = [i for i, _, _ in buffer]
+            texts = [t for _, t, _ in buffer]
+            metadatas = [m for _, _, m in buffer]
+            buffer.clear()
+            return ids, embeddings.embed_documents(texts), metadatas, texts
+
+        def embed(item: Tuple[str, str, Dict[str, Any]]) -> Iterator[Any]:
+            buffer.append(item)
+            if len(buffer) >= batch_size:
+                yield embed_buffer()
+
+        def embed_flush() -> Iterator[Any]:
+            if buffer:
+                yield embed_buffer()
+
+        def finish(
+            url_hash: str, content_hash: str, chunk_ids: List[str], previous: Any, signatures: List[Any]
+        ) -> None:
+            """Called under lock once every kept chunk of an article is stored."""
+            # Changed articles may now have fewer chunks: drop the leftovers
+            stale = [cid for cid in previous if cid not in chunk_ids]
+            if stale:
+                store.delete(stale)
+                ledger.forget_signatures(stale)
+                lexical = STORES.get(("bm25", store))
+                for doc_id in stale:
+                    if lexical is not None:
+                        lexical.remove(doc_id)
+                    if near_dupes is not None:
+                        near_dupes.remove(doc_id)
+            completed.append((url_hash, content_hash, chunk_ids))
+            completed_signatures.extend(signatures)
+
+        def checkpoint() -> None:
+            # The ledger is written only after the store holds the chunks durably
+            if self._persist_enabled:
+                try:
+                    store.persist()
+                except Exception:
+                    return
+            with lock:
+                ledger.record_signatures(completed_signatures)
+                ledger.record_many(completed)
+                completed.clear()
+                completed_signatures.clear()
+
+        def upsert(batch: Tuple[List[str], List[List[float]], List[Dict[str, Any]], List[str]]) -> Iterator[Any]:
+            nonlocal batches_done
+            ids, vectors, metadatas, texts = batch
+            store.upsert(ids, vectors, metadatas, texts)
+            lexical = STORES.get(("bm25", store))
+            if lexical is not None:
+                for doc_id, text, meta in zip(ids, texts, metadatas):
+                    lexical.add(doc_id, f"{meta.get('title') or ''}\n{text}")
+            upsert_counts["chunks_embedded"] += len(ids)
+            rag_index_documents_total.labels(collection=NEWS_COLLECTION, action="embedded").inc(len(ids))
+            with lock:
+                for meta in metadatas:
+                    state = pending[meta["url_hash"]]
+                    state[3] -= 1
+                    if state[3] == 0:
+                        content_hash, chunk_ids, previous, _, signatures = pending.pop(meta["url_hash"])
+                        finish(meta["url_hash"], content_hash, chunk_ids, previous, signatures)
+            batches_done += 1
+            if batches_done % max(1, checkpoint_every) == 0:
+                checkpoint()
+            return iter(())
+
+        def upsert_flush() -> Iterator[Any]:
+            checkpoint()
+            return iter(())
+
+        pipeline = Pipeline(
+            fetch(),
+            [
+                Stage("normalize", normalize),
+                Stage("chunk", chunk),
+                Stage("embed", embed, flush=embed_flush),
+                Stage("upsert", upsert, flush=upsert_flush),
+            ],
+            maxsize=queue_size,
+        )
+        try:
+            pipeline.run()
+        except BaseException:
+            # Signatures of chunks that never got stored must not shadow them on the next run
+            STORES.discard(self._near_dupes_key())
+            raise
+        finally:
+            self.last_ingest_report = dict(
+                **normalize_counts,
+                **upsert_counts,
+                **chunk_counts,
+                chunks_expired=chunks_expired,
+                stages=pipeline.report(),
+                wall_secs=round(pipeline.wall_secs, 3),
+            )
+        return upsert_counts["chunks_embedded"]
 
-        if not docs:
-            return 0
+    def query_news(
+        self, query: str, top_k: int = 5, max_age_days: Optional[float] = None
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        return self.query_many([query], top_k=top_k, max_age_days=max_age_days)[0]
 
-        # Store via Chroma add_texts
-        chroma = self._get_chroma()
-        texts = [t for t, _ in docs]
-        metadatas = [m for _, m in docs]
-        chroma.add_texts(texts=texts, metadatas=metadatas)
-        # Persist only if explicitly enabled
-        try:
-            if self._persist_enabled and hasattr(chroma, "persist"):
-                chroma.persist()
-        except Exception:
-            pass
-        return len(texts)
-
-    def query_news(self, query: str, top_k: int = 5) -> List[Tuple[Dict[str, Any], float]]:
-        chroma = self._get_chroma()
-        results = chroma.similarity_search_with_score(query=query, k=top_k)
-        formatted: List[Tuple[Dict[str, Any], float]] = []
-        for doc, score in results:
-            meta = dict(doc.metadata or {})
-            meta["snippet"] = (doc.page_content or "")[:240]
-            formatted.append((meta, _safe_float(score, 0.0)))
-        return formatted
+    def query_many(
+        self, queries: List[str], top_k: int = 5, max_age_days: Optional[float] = None
+    ) -> List[List[Tuple[Dict[str, Any], float]]]:
+        """
+        Per-query top_k news chunks as (metadata + snippet, distance).
+        Queries missing from the result cache are embedded in one batch and scored with
+        one store.query_many call.
+        max_age_days limits results to recent news; partitioned stores only search the
+        partitions inside that window (its start is rounded down to the minute, so repeated
+        lookups hit the cache).
+        """
+        if not queries:
+            return []
+        store = self._get_store()
+        # Read before searching: results that race with a write are cached under the old version
+        version = store.version
+        since: Optional[float] = None
+        where = None
+        if max_age_days is not None and max_age_days > 0:
+            since = float(int(self._now_utc().timestamp() - max_age_days * 86400.0) // 60 * 60)
+            where = {"published_ts": {"$gte": since}}
+        keys = [(q, top_k, since, version) for q in queries]
+        now = time.monotonic()
+        cached: Dict[Any, Any] = {}
+        for key in keys:
+            # (stored at, rows)
+            entry = self._query_cache.get(key)
+            fresh = entry is not None and (self._query_cache_ttl <= 0 or now - entry[0] < self._query_cache_ttl)
+            cached[key] = entry[1] if fresh else None
+        missing = [key for key, rows in cached.items() if rows is None]
+        rag_query_cache_lookups_total.labels(collection=NEWS_COLLECTION, result="hit").inc(len(keys) - len(missing))
+        if missing:
+            rag_query_cache_lookups_total.labels(collection=NEWS_COLLECTION, result="miss").inc(len(missing))
+            texts = [key[0] for key in missing]
+            embeddings = self.embedding_function.embed_documents(texts)
+            if self._hybrid:
+                results = hybrid_search_many(store, self._get_lexical(), texts, embeddings, k=top_k, where=where)
+            else:
+                results = store.query_many(embeddings, k=top_k, where=where)
+            for key, hits in zip(missing, results):
+                rows: List[Tuple[Dict[str, Any], float]] = []
+                for doc, score in hits:
+                    meta = dict(doc.metadata or {})
+                    meta["snippet"] = (doc.page_content or "")[:240]
+                    rows.append((meta, _safe_float(score, 0.0)))
+                cached[key] = rows
+                self._query_cache.put(key, (now, rows))
+        # Copies, so callers cannot edit cached entries
+        return [[(dict(meta), score) for meta, score in cached[key]] for key in keys]
+
+    def _decay_weights(self, metadatas: List[Dict[str, Any]], now: datetime, half_life_days: float) -> np.ndarray:
+        """exp(-age_days / half_life_days) per chunk; 1.0 when the date is unknown or decay is off."""
+        ages = np.zeros(len(metadatas), dtype=np.float32)
+        if half_life_days <= 0:
+            return np.ones_like(ages)
+        for i, meta in enumerate(metadatas):
+            pub_dt = self._parse_dt((meta or {}).get("published_at"))
+            if pub_dt is None:
+                continue
+            try:
+                ages[i] = max(0.0, (now - pub_dt.astimezone(timezone.utc)).total_seconds() / 86400.0)
+            except Exception:
+                pass
+        return np.exp(-ages / half_life_days)
 
     def link_news_to_markets(
         self,
@@ -269,87 +599,84 @@ class NewsRAG:
         min_relevance: float = 0.6,
         half_life_days: float = 5.0,
         output_path: str = "./news_market_links.json",
+        block_size: int = 1024,
     ) -> str:
         """
-        For each news chunk, find top similar market docs and emit links JSON.
+        Links every news article to its most relevant markets and emits links JSON.
+        - News and market vectors are enumerated from the stores (iter_batches); the
+          similarity matrix is computed one news block at a time (block_size x markets matmul)
+        - rel = 0.8 * cosine + 0.2 * time decay, thresholded by min_relevance, vectorized per block
+        - An article keeps the best rel per market over its chunks; it is written to the
+          file as soon as all of its chunks (chunks_total) have been scored
         Returns path to the JSON file.
         """
-        # Prepare vectorstores
-        news_vs = self._get_chroma()
-        from langchain_community.vectorstores.chroma import Chroma as _Chroma
-        markets_vs = _Chroma(
-            persist_directory=markets_persist_dir, embedding_function=self.embedding_function
-        )
-
-        # Heuristic: iterate through news collection items via a keyword list
-        # Chroma doesn't expose raw iteration; we query using a broad term and dedupe
-        seeds = ["news", "market", "crypto", "election", "court", "ai", "stocks"]
-        seen_hashes: set[str] = set()
-        links: Dict[str, Dict[str, Any]] = {}
-        now = self._now_utc()
-
-        for seed in seeds:
-            results = news_vs.similarity_search_with_score(query=seed, k=50)
-            for doc, _ in results:
-                url_hash = (doc.metadata or {}).get("url_hash")
-                if not url_hash or url_hash in seen_hashes:
-                    continue
-                seen_hashes.add(url_hash)
-
-                # Build query from news doc
-                q = "\n\n".join([
-                    (doc.metadata or {}).get("title", ""),
-                    doc.page_content or "",
-                ])[:2000]
-                market_hits = markets_vs.similarity_search_with_score(q, k=top_k)
-
-                # Compute time decay
-                pub = (doc.metadata or {}).get("published_at")
-                pub_dt = self._parse_dt(pub)
-                age_days = 0.0
-                if pub_dt is not None:
-                    try:
-                        age_days = max(
-                            0.0,
-                            (now - pub_dt.astimezone(timezone.utc)).total_seconds() / 86400.0,
-                        )
-                    except Exception:
-                        age_days = 0.0
-                decay = 1.0
-                if half_life_days > 0:
-                    import math
-
-                    decay = math.exp(-age_days / half_life_days)
-
-                linked: List[Dict[str, Any]] = []
-                for mdoc, score in market_hits:
-                    # Convert distance score (smaller is better in some backends) to similarity-like
-                    sim = max(0.0, 1.0 - _safe_float(score, 0.0))
-                    rel = 0.8 * sim + 0.2 * decay
-                    if rel < min_relevance:
-                        continue
-                    linked.append(
-                        {
-                            "market_source": (mdoc.metadata or {}).get("source"),
-                            "market_id": (mdoc.metadata or {}).get("id"),
-                            "question": (mdoc.metadata or {}).get("question"),
-                            "rel": rel,
-                        }
-                    )
-
-                if not linked:
-                    continue
-                linked.sort(key=lambda x: x["rel"], reverse=True)
-                links[url_hash] = {
-                    "title": (doc.metadata or {}).get("title"),
-                    "url": (doc.metadata or {}).get("url"),
-                    "published_at": (doc.metadata or {}).get("published_at"),
-                    "source": (doc.metadata or {}).get("source"),
-                    "top_markets": linked,
+        markets_vs = open_vector_store(MARKETS_COLLECTION, markets_persist_dir)
+        market_blocks: List[np.ndarray] = []
+        market_info: List[Dict[str, Any]] = []
+        for _, vectors, metadatas, _ in markets_vs.iter_batches(4 * block_size):
+            market_blocks.append(vectors)
+            market_info.extend(
+                {
+                    "market_source": (m or {}).get("source"),
+                    "market_id": (m or {}).get("id"),
+                    "question": (m or {}).get("question"),
                 }
+                for m in metadatas
+            )
+        now = self._now_utc()
 
         with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(links, f, ensure_ascii=False, indent=2)
+            written = 0
+
+            def emit(url_hash: str, meta: Dict[str, Any], best: Dict[int, float]) -> None:
+                nonlocal written
+                if not best:
+                    return
+                ranked = sorted(best.items(), key=lambda x: x[1], reverse=True)[:top_k]
+                entry = {
+                    "title": meta.get("title"),
+                    "url": meta.get("url"),
+                    "published_at": meta.get("published_at"),
+                    "source": meta.get("source"),
+                    "top_markets": [dict(market_info[col], rel=rel) for col, rel in ranked],
+                }
+                f.write(("{\n" if written == 0 else ",\n") + f"  {json.dumps(url_hash)}: ")
+                f.write(json.dumps(entry, ensure_ascii=False))
+                written += 1
+
+            if market_info and top_k > 0:
+                markets = np.vstack(market_blocks)
+                k = min(top_k, markets.shape[0])
+                # url_hash -> [metadata, chunks seen, {market row: best rel}]
+                pending: Dict[str, List[Any]] = {}
+                for ids, vectors, metadatas, _ in self._get_store().iter_batches(block_size):
+                    if vectors.shape[1] != markets.shape[1]:
+                        raise ValueError(
+                            f"news vectors have dim {vectors.shape[1]}, markets {markets.shape[1]}: "
+                            "both collections must use the same embeddings"
+                        )
+                    decay = self._decay_weights(metadatas, now, half_life_days)
+                    rel = 0.8 * np.clip(vectors @ markets.T, 0.0, None) + 0.2 * decay[:, None]
+                    if k < rel.shape[1]:
+                        top = np.argpartition(-rel, k - 1, axis=1)[:, :k]
+                    else:
+                        top = np.broadcast_to(np.arange(rel.shape[1]), rel.shape)
+                    top_rel = np.take_along_axis(rel, top, axis=1)
+                    keep = top_rel >= min_relevance
+                    for row, meta in enumerate(metadatas):
+                        meta = meta or {}
+                        url_hash = meta.get("url_hash") or ids[row]
+                        state = pending.setdefault(url_hash, [meta, 0, {}])
+                        state[1] += 1
+                        best = state[2]
+                        for col, value in zip(top[row][keep[row]].tolist(), top_rel[row][keep[row]].tolist()):
+                            if value > best.get(col, -1.0):
+                                best[col] = value
+                        if state[1] >= int(_safe_float(meta.get("chunks_total"), 1.0)):
+                            emit(url_hash, meta, best)
+                            del pending[url_hash]
+                # Articles with chunks missing from the store
+                for url_hash, (meta, _, best) in pending.items():
+                    emit(url_hash, meta, best)
+            f.write("{}\n" if written == 0 else "\n}\n")
         return output_path
-
-
@@ -1,11 +1,12 @@
 import os
 import json
-import asyncio
 import aiohttp
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 import logging
 
+from agents.utils.async_runtime import get_runtime
+
 logger = logging.getLogger(__name__)
 
 class TavilyMCPClient:
@@ -317,42 +318,29 @@ tavily_client = TavilyMCPClient()
 
 # Синхронная обертка для совместимости
 class TavilyMCPSync:
-    """Синхронная обертка для TavilyMCPClient"""
+    """Синхронная обертка для TavilyMCPClient (корутины выполняются на общем фоновом цикле)"""
     
     def __init__(self):
         self.client = tavily_client
+
+    def _run(self, coro: Any) -> Any:
+        return get_runtime().run(coro)
     
     def search_markets(self, query: str, search_depth: str = "basic") -> List[Dict[str, Any]]:
         """Синхронный поиск рынков"""
-        loop = asyncio.new_event_loop()
-        try:
-            return loop.run_until_complete(self.client.search_markets(query, search_depth))
-        finally:
-            loop.close()
+        return self._run(self.client.search_markets(query, search_depth))
     
     def extract_market_data(self, url: str) -> Dict[str, Any]:
         """Синхронное извлечение данных о рынке"""
-        loop = asyncio.new_event_loop()
-        try:
-            return loop.run_until_complete(self.client.extract_market_data(url))
-        finally:
-            loop.close()
+        return self._run(self.client.extract_market_data(url))
     
     def analyze_market_sentiment(self, market_data: Dict[str, Any]) -> Dict[str, Any]:
         """Синхронный анализ настроений"""
-        loop = asyncio.new_event_loop()
-        try:
-            return loop.run_until_complete(self.client.analyze_market_sentiment(market_data))
-        finally:
-            loop.close()
+        return self._run(self.client.analyze_market_sentiment(market_data))
     
     def get_market_news(self, market_keywords: List[str], days_back: int = 7) -> List[Dict[str, Any]]:
         """Синхронное получение новостей"""
-        loop = asyncio.new_event_loop()
-        try:
-            return loop.run_until_complete(self.client.get_market_news(market_keywords, days_back))
-        finally:
-            loop.close()
+        return self._run(self.client.get_market_news(market_keywords, days_back))
     
     def get_mcp_config(self) -> Dict[str, Any]:
         """Получение конфигурации MCP"""
@@ -360,8 +348,4 @@ class TavilyMCPSync:
     
     def health_check(self) -> Dict[str, Any]:
         """Синхронная проверка состояния"""
-        loop = asyncio.new_event_loop()
-        try:
-            return loop.run_until_complete(self.client.health_check())
-        finally:
-            loop.close()
+        return self._run(self.client.health_check())
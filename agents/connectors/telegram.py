@@ -1,15 +1,32 @@
 import os
 import logging
-from typing import Dict, List, Optional, Union
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 from datetime import datetime
 import asyncio
 import aiohttp
 from dotenv import load_dotenv
 
+from agents.utils.async_runtime import get_runtime, is_runtime_loop
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# aiohttp-сессия на общем фоновом цикле, одна на процесс для всех экземпляров TelegramAlerts;
+# хук закрытия регистрируется один раз — вместе с первой сессией на этом цикле
+_runtime_sessions: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def _close_runtime_session() -> None:
+    session = _runtime_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
 class TelegramAlerts:
     """
     Класс для отправки алертов в Telegram о торговых операциях
@@ -38,6 +55,28 @@ class TelegramAlerts:
         if not self.bot_token or not self.chat_id:
             logger.warning("Telegram credentials not configured. Alerts will be disabled.")
             self.alerts_enabled = False
+
+    @asynccontextmanager
+    async def _http(self) -> AsyncIterator[aiohttp.ClientSession]:
+        """
+        aiohttp-сессия: на общем фоновом цикле (async_runtime) одна на весь процесс,
+        соединения с api.telegram.org переиспользуются; на чужом цикле — на один запрос.
+        Таймаут задаётся в каждом запросе (self._timeout()), так как сессия общая
+        """
+        loop = asyncio.get_running_loop()
+        if not is_runtime_loop(loop):
+            async with aiohttp.ClientSession() as session:
+                yield session
+            return
+        session = _runtime_sessions.get(loop)
+        if session is None or session.closed:
+            if session is None:
+                get_runtime().add_shutdown_hook(_close_runtime_session)
+            session = _runtime_sessions[loop] = aiohttp.ClientSession()
+        yield session
+
+    def _timeout(self) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(total=self.request_timeout)
     
     async def send_message(self, message: str, parse_mode: str = "HTML") -> bool:
         """
@@ -54,12 +93,10 @@ class TelegramAlerts:
             "parse_mode": parse_mode,
             "disable_web_page_preview": True,
         }
-        timeout = aiohttp.ClientTimeout(total=self.request_timeout)
-
         for attempt in range(1, self.retry_attempts + 1):
             try:
-                async with aiohttp.ClientSession(timeout=timeout) as session:
-                    async with session.post(url, json=payload) as response:
+                async with self._http() as session:
+                    async with session.post(url, json=payload, timeout=self._timeout()) as response:
                         if response.status == 200:
                             logger.info("Telegram message sent successfully")
                             return True
@@ -95,10 +132,9 @@ class TelegramAlerts:
             "parse_mode": parse_mode,
             "disable_web_page_preview": True,
         }
-        timeout = aiohttp.ClientTimeout(total=self.request_timeout)
         try:
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(url, json=payload) as response:
+            async with self._http() as session:
+                async with session.post(url, json=payload, timeout=self._timeout()) as response:
                     return response.status == 200
         except Exception:
             return False
@@ -311,64 +347,37 @@ class TelegramAlerts:
 
 # Синхронные обертки для совместимости
 class TelegramAlertsSync:
-    """Синхронная обертка для TelegramAlerts"""
+    """Синхронная обертка для TelegramAlerts (корутины выполняются на общем фоновом цикле)"""
     
     def __init__(self):
         self.async_client = TelegramAlerts()
+
+    def _run(self, coro: Any) -> Any:
+        return get_runtime().run(coro)
     
     def send_trade_alert(self, trade_data: Dict) -> bool:
         """Синхронная отправка алерта о торговой операции"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self.async_client.send_trade_alert(trade_data))
-        finally:
-            loop.close()
+        return self._run(self.async_client.send_trade_alert(trade_data))
     
     def send_position_alert(self, position_data: Dict) -> bool:
         """Синхронная отправка алерта о позиции"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self.async_client.send_position_alert(position_data))
-        finally:
-            loop.close()
+        return self._run(self.async_client.send_position_alert(position_data))
     
     def send_risk_alert(self, risk_data: Dict) -> bool:
         """Синхронная отправка алерта о рисках"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self.async_client.send_risk_alert(risk_data))
-        finally:
-            loop.close()
+        return self._run(self.async_client.send_risk_alert(risk_data))
     
     def send_news_alert(self, news_data: Dict) -> bool:
         """Синхронная отправка алерта о новостях"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self.async_client.send_news_alert(news_data))
-        finally:
-            loop.close()
+        return self._run(self.async_client.send_news_alert(news_data))
     
     def send_daily_summary(self, summary_data: Dict) -> bool:
         """Синхронная отправка ежедневного отчета"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self.async_client.send_daily_summary(summary_data))
-        finally:
-            loop.close()
+        return self._run(self.async_client.send_daily_summary(summary_data))
 
     def send_message_to(self, chat_id: str, message: str) -> bool:
         """Синхронная отправка произвольного сообщения на chat_id"""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            return loop.run_until_complete(self.async_client.send_message_to(chat_id, message))
-        finally:
-            loop.close()
+        return self._run(self.async_client.send_message_to(chat_id, message))
 
 
 # Простой long-polling бот (без внешних зависимостей), обрабатывает /positions и /portfolio
@@ -0,0 +1,1435 @@
+"""
+Vector store backends for PolymarketRAG and NewsRAG.
+
+Stores take precomputed embeddings (the RAG classes own the embedding function)
+and return (Document, distance) pairs with distance = 1 - cosine similarity;
+Document.id is the store id.
+
+- NumpyVectorStore: exact search over a normalized float32 matrix
+  (matmul + argpartition), optional .npy persistence opened as a memmap, optional
+  int8 scalar quantization with float re-ranking
+- ChromaVectorStore: chromadb collection in cosine space
+- PartitionedVectorStore: day/week partitions of either backend with retention and
+  recency-window query planning
+- open_vector_store / open_partitioned_store: process-wide shared handles (STORES registry)
+
+The backend is selected by RAG_VECTOR_BACKEND (chroma | numpy | numpy-int8, default chroma).
+"""
+
+from __future__ import annotations
+
+import calendar
+import json
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+Where = Optional[Dict[str, Any]]
+Hit = Tuple[Document, float]
+
+
+def _matches(metadata: Dict[str, Any], where: Where) -> bool:
+    """Evaluates the Chroma-style `where` subset used by the RAG classes."""
+    if not where:
+        return True
+    for key, cond in where.items():
+        if key == "$and":
+            if not all(_matches(metadata, c) for c in cond):
+                return False
+            continue
+        if key == "$or":
+            if not any(_matches(metadata, c) for c in cond):
+                return False
+            continue
+        value = metadata.get(key)
+        if not isinstance(cond, dict):
+            cond = {"$eq": cond}
+        for op, arg in cond.items():
+            if op == "$eq":
+                ok = value == arg
+            elif op == "$ne":
+                ok = value != arg
+            elif op == "$in":
+                ok = value in arg
+            elif op == "$nin":
+                ok = value not in arg
+            elif value is None:
+                ok = False
+            elif op == "$gt":
+                ok = value > arg
+            elif op == "$gte":
+                ok = value >= arg
+            elif op == "$lt":
+                ok = value < arg
+            elif op == "$lte":
+                ok = value <= arg
+            else:
+                raise ValueError(f"unsupported where operator: {op}")
+            if not ok:
+                return False
+    return True
+
+
+def _compile_where(where: Where) -> Where:
+    """Turns $in/$nin lists into frozensets once per query, so _matches is O(1) per row."""
+    if not where:
+        return where
+    compiled: Dict[str, Any] = {}
+    for key, cond in where.items():
+        if key in ("$and", "$or"):
+            compiled[key] = [_compile_where(c) for c in cond]
+        elif isinstance(cond, dict):
+            compiled[key] = {}
+            for op, arg in cond.items():
+                if op in ("$in", "$nin") and not isinstance(arg, frozenset):
+                    try:
+                        arg = frozenset(arg)
+                    except TypeError:  # unhashable members: keep the linear scan
+                        pass
+                compiled[key][op] = arg
+        else:
+            compiled[key] = cond
+    return compiled
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[None, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _top_k(sims: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Row-wise top-k of a (queries, candidates) similarity block, best first."""
+    k = min(k, sims.shape[1])
+    if k <= 0:
+        empty = np.empty((sims.shape[0], 0), dtype=np.int64)
+        return empty, empty.astype(np.float32)
+    if k < sims.shape[1]:
+        idx = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+    else:
+        idx = np.tile(np.arange(sims.shape[1]), (sims.shape[0], 1))
+    part = np.take_along_axis(sims, idx, axis=1)
+    order = np.argsort(-part, axis=1)
+    return np.take_along_axis(idx, order, axis=1), np.take_along_axis(part, order, axis=1)
+
+
+def _quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization: v ~= codes * scale."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _disk_generation(path: Optional[str]) -> Optional[Tuple[int, int, int]]:
+    """
+    (mtime_ns, size) of a numpy store's meta.json, replaced last by a snapshot, plus the
+    size of journal.jsonl, appended last by an incremental persist.
+    """
+    try:
+        st = os.stat(os.path.join(path, "meta.json"))
+    except (OSError, TypeError):
+        return None
+    try:
+        journal = os.stat(os.path.join(path, "journal.jsonl")).st_size
+    except OSError:
+        journal = 0
+    return st.st_mtime_ns, st.st_size, journal
+
+
+def _dequantize(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    return _normalize(codes.astype(np.float32) * scales[:, None])
+
+
+class VectorStore(ABC):
+    """
+    Minimal collection interface shared by the RAG backends.
+    version is bumped by every upsert/delete/drop in this process and whenever
+    refresh() reloads rows another process wrote, so callers can key caches on
+    (store, version).
+    """
+
+    name: str
+    version: int = 0
+
+    @abstractmethod
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        documents: Optional[Sequence[str]] = None,
+    ) -> None: ...
+
+    @abstractmethod
+    def get(self, ids: Optional[Sequence[str]] = None, where: Where = None) -> Dict[str, List[Any]]:
+        """Returns {"ids", "metadatas", "documents"} for existing ids / matching rows."""
+
+    @abstractmethod
+    def update_metadata(self, ids: Sequence[str], metadatas: Sequence[Dict[str, Any]]) -> None:
+        """Replaces the metadata of existing rows, keeping their vectors and documents; unknown ids are skipped."""
+
+    @abstractmethod
+    def delete(self, ids: Sequence[str]) -> None: ...
+
+    @abstractmethod
+    def count(self) -> int: ...
+
+    def ids(self) -> List[str]:
+        """Ids of every row, without metadata or documents."""
+        return self.get()["ids"]
+
+    @abstractmethod
+    def query_many(self, embeddings: Sequence[Sequence[float]], k: int = 4, where: Where = None) -> List[List[Hit]]: ...
+
+    @abstractmethod
+    def iter_batches(
+        self, batch_size: int = 4096
+    ) -> Iterator[Tuple[List[str], np.ndarray, List[Dict[str, Any]], List[str]]]:
+        """Yields (ids, normalized float32 vectors, metadatas, documents) over the whole collection."""
+
+    def query(self, embedding: Sequence[float], k: int = 4, where: Where = None) -> List[Hit]:
+        return self.query_many([embedding], k=k, where=where)[0]
+
+    def persist(self) -> None:
+        """Flushes to disk where the backend needs it explicitly."""
+
+    def refresh(self) -> bool:
+        """Reloads what another process persisted since this handle last read or wrote it; True if it did."""
+        return False
+
+    @abstractmethod
+    def drop(self) -> None:
+        """Deletes the whole collection, including its files."""
+
+    def memory_bytes(self) -> int:
+        return 0
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Exact cosine search over an in-memory float32 matrix.
+    - Rows are L2-normalized on insert, so scoring is one matmul
+    - Deletes swap the last row into the freed slot (matrix stays dense)
+    - With a directory, vectors live in <directory>/<name>/vectors.npy (opened as a
+      read-only memmap, copied on first write) and ids/metadata in meta.json
+    - quantization="int8": rows are kept as int8 codes with a per-row scale (4x less
+      RAM). With a directory the float rows are also written to vectors.f32, a
+      disk-backed memmap used only to re-rank the top rerank * k int8 candidates.
+    - persist() appends the writes made since the previous persist to journal.jsonl
+      (ids, metadata, documents) and journal.f32 (vectors), which loading replays in
+      order; the full snapshot is rewritten only once the journal outgrows it, so a
+      persist costs the rows written, not the collection size
+    - refresh() reloads the files when meta.json or the journal changed on disk
+      (another process persisted), unless this handle has unsaved writes
+    """
+
+    def __init__(
+        self,
+        name: str,
+        directory: Optional[str] = None,
+        quantization: str = "none",
+        rerank: int = 4,
+    ) -> None:
+        if quantization not in ("none", "int8"):
+            raise ValueError(f"unsupported quantization: {quantization}")
+        self.name = name
+        self.path = os.path.join(directory, name) if directory else None
+        self.quantization = quantization
+        self.rerank = max(1, rerank)
+        self._lock = threading.RLock()
+        self._ids: List[str] = []
+        self._row: Dict[str, int] = {}
+        self._metadatas: List[Dict[str, Any]] = []
+        self._documents: List[str] = []
+        self._matrix: Optional[np.ndarray] = None  # float mode
+        self._codes: Optional[np.ndarray] = None  # int8 mode
+        self._scales: Optional[np.ndarray] = None
+        self._floats: Optional[np.memmap] = None  # int8 mode, re-rank source on disk
+        self._n = 0
+        self._dirty = False
+        # meta.json/journal generation last loaded or written by this handle
+        self._generation: Optional[Tuple[int, int, int]] = None
+        # Writes since the last persist, in order: (op, ids, vectors, metadatas, documents)
+        self._ops: List[Tuple[str, List[str], Any, Any, Any]] = []
+        # Snapshot the journal records belong to; None until one is loaded or written
+        self._epoch: Optional[str] = None
+        self._journal_rows = 0
+        self._rewrite = False  # the next persist must write a full snapshot
+        self._replaying = False
+        self._hold_floats = False  # replaying rows vectors.f32 already holds
+        if self.path:
+            self._load()
+
+    @property
+    def dim(self) -> Optional[int]:
+        source = self._codes if self.quantization == "int8" else self._matrix
+        return int(source.shape[1]) if source is not None else None
+
+    # --- persistence -------------------------------------------------------
+
+    def _reset(self) -> None:
+        self._ids, self._row, self._metadatas, self._documents = [], {}, [], []
+        self._matrix = self._codes = self._scales = self._floats = None
+        self._n = 0
+        self._dirty = False
+        self._generation = None
+        self._ops = []
+        self._epoch = None
+        self._journal_rows = 0
+        self._rewrite = False
+
+    def _load(self) -> None:
+        # Taken first: a persist racing with the load shows up as a new generation on the next refresh
+        self._generation = _disk_generation(self.path)
+        meta_path = os.path.join(self.path, "meta.json")
+        vectors_path = os.path.join(self.path, "vectors.npy")
+        codes_path = os.path.join(self.path, "codes.npy")
+        if not os.path.exists(meta_path):
+            return
+        floats_current = False
+        if self.quantization == "int8":
+            if os.path.exists(codes_path):
+                self._codes = np.load(codes_path)
+                self._scales = np.load(os.path.join(self.path, "scales.npy"))
+                had_floats = floats_current = os.path.exists(os.path.join(self.path, "vectors.f32"))
+                self._open_floats(self._codes.shape[0], self._codes.shape[1])
+                if not had_floats and self._floats is not None:
+                    self._floats[: self._codes.shape[0]] = _dequantize(self._codes, self._scales)
+            elif os.path.exists(vectors_path):
+                # Store written in float mode: quantize it once
+                vectors = np.load(vectors_path, mmap_mode="r")
+                self._codes, self._scales = _quantize(vectors)
+                self._open_floats(vectors.shape[0], vectors.shape[1])
+                self._floats[: vectors.shape[0]] = vectors
+                self._rewrite = True
+            else:
+                return
+            rows = self._codes.shape[0]
+        else:
+            if os.path.exists(vectors_path):
+                self._matrix = np.load(vectors_path, mmap_mode="r")
+            elif os.path.exists(codes_path):
+                # Store written in int8 mode: dequantize
+                self._matrix = _dequantize(np.load(codes_path), np.load(os.path.join(self.path, "scales.npy")))
+            else:
+                return
+            rows = self._matrix.shape[0]
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self._ids = list(meta.get("ids") or [])
+        self._metadatas = list(meta.get("metadatas") or [{} for _ in self._ids])
+        self._documents = list(meta.get("documents") or ["" for _ in self._ids])
+        self._n = min(len(self._ids), int(rows))
+        del self._ids[self._n:], self._metadatas[self._n:], self._documents[self._n:]
+        self._row = {i: r for r, i in enumerate(self._ids)}
+        self._epoch = meta.get("journal")
+        self._replay(floats_current)
+        self._dirty = self._rewrite
+
+    def _replay(self, floats_current: bool) -> None:
+        """
+        Applies the journal records of the loaded snapshot, in order.
+        floats_current: vectors.f32 was written along with those records, so it already
+        holds their rows in the resulting layout and must not be touched.
+        """
+        journal_path = os.path.join(self.path, "journal.jsonl")
+        if not self._epoch or not os.path.exists(journal_path):
+            return
+        vectors_path = os.path.join(self.path, "journal.f32")
+        blob = np.empty(0, np.float32)
+        if os.path.exists(vectors_path):
+            blob = np.fromfile(vectors_path, dtype=np.float32)
+        floats, hold = self._floats, floats_current and self._floats is not None
+        if hold:
+            self._floats, self._hold_floats = None, True
+        self._replaying = True
+        try:
+            with open(journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn by a crash mid-append; later records are self-contained
+                    if not isinstance(record, dict) or record.get("epoch") != self._epoch:
+                        continue
+                    ids = list(record.get("ids") or [])
+                    op = record.get("op")
+                    if op == "upsert":
+                        start, dim = int(record["at"]), int(record["dim"])
+                        vectors = blob[start:start + len(ids) * dim]
+                        if vectors.size != len(ids) * dim:
+                            continue
+                        self.upsert(ids, vectors.reshape(len(ids), dim), record["metadatas"], record["documents"])
+                    elif op == "meta":
+                        self.update_metadata(ids, record["metadatas"])
+                    elif op == "delete":
+                        self.delete(ids)
+                    self._journal_rows += len(ids)
+        finally:
+            self._replaying = False
+            if hold:
+                self._floats, self._hold_floats = floats, False
+                if self._codes is not None and self._floats.shape[0] < self._codes.shape[0]:
+                    self._open_floats(self._codes.shape[0], self._codes.shape[1])
+
+    def _record(
+        self, op: str, ids: List[str], vectors: Any = None, metadatas: Any = None, documents: Any = None
+    ) -> None:
+        # Only persistent stores journal their writes; replayed records are already on disk
+        if self.path and not self._replaying:
+            self._ops.append((op, ids, vectors, metadatas, documents))
+
+    def _open_floats(self, capacity: int, dim: int) -> None:
+        """(Re)maps vectors.f32 with room for `capacity` rows (int8 mode, persistent only)."""
+        if not self.path:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, "vectors.f32")
+        size = capacity * dim * 4
+        with open(path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        rows = os.path.getsize(path) // (dim * 4)
+        self._floats = np.memmap(path, dtype=np.float32, mode="r+", shape=(rows, dim)) if rows else None
+
+    def _save(self, filename: str, array: np.ndarray) -> None:
+        tmp = os.path.join(self.path, f"{filename}.tmp.npy")
+        np.save(tmp, np.ascontiguousarray(array))
+        os.replace(tmp, os.path.join(self.path, filename))
+
+    def persist(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(self.path, exist_ok=True)
+            base = "codes.npy" if self.quantization == "int8" else "vectors.npy"
+            journaled = self._journal_rows + sum(len(op[1]) for op in self._ops)
+            if (
+                self._rewrite
+                or self._epoch is None
+                or not os.path.exists(os.path.join(self.path, base))
+                # Another process wrote since: its snapshot may not be the one the journal extends
+                or _disk_generation(self.path) != self._generation
+                # Compaction once the journal outgrows the snapshot keeps persist amortized O(rows written)
+                or journaled > max(self._n, 1024)
+            ):
+                self._write_snapshot()
+            else:
+                self._append_journal()
+            if self._floats is not None:
+                self._floats.flush()
+            self._ops = []
+            self._rewrite = False
+            self._dirty = False
+            self._generation = _disk_generation(self.path)
+
+    def _write_snapshot(self) -> None:
+        dim = self.dim or 0
+        if self.quantization == "int8":
+            codes = self._codes[: self._n] if self._codes is not None else np.empty((0, dim), np.int8)
+            scales = self._scales[: self._n] if self._scales is not None else np.empty(0, np.float32)
+            self._save("codes.npy", codes)
+            self._save("scales.npy", scales)
+        else:
+            vectors = self._matrix[: self._n] if self._matrix is not None else np.empty((0, dim), np.float32)
+            self._save("vectors.npy", vectors)
+        epoch = os.urandom(8).hex()
+        tmp = os.path.join(self.path, "meta.tmp.json")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {"ids": self._ids, "metadatas": self._metadatas, "documents": self._documents, "journal": epoch},
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp, os.path.join(self.path, "meta.json"))
+        # A crash before these removals leaves records of the old epoch, which loading skips
+        for filename in ("journal.jsonl", "journal.f32"):
+            try:
+                os.remove(os.path.join(self.path, filename))
+            except FileNotFoundError:
+                pass
+        self._epoch = epoch
+        self._journal_rows = 0
+
+    def _append_journal(self) -> None:
+        lines: List[str] = []
+        with open(os.path.join(self.path, "journal.f32"), "ab") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() % 4:
+                f.write(b"\0" * (4 - f.tell() % 4))  # realign after a torn append
+            for op, ids, vectors, metadatas, documents in self._ops:
+                record: Dict[str, Any] = {"epoch": self._epoch, "op": op, "ids": ids}
+                if op == "upsert":
+                    record.update(at=f.tell() // 4, dim=int(vectors.shape[1]), metadatas=metadatas, documents=documents)
+                    f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+                elif op == "meta":
+                    record["metadatas"] = metadatas
+                lines.append(json.dumps(record, ensure_ascii=False))
+                self._journal_rows += len(ids)
+        journal_path = os.path.join(self.path, "journal.jsonl")
+        with open(journal_path, "a+b") as f:
+            f.seek(0, os.SEEK_END)
+            prefix = b""
+            if f.tell():
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    prefix = b"\n"  # a torn last line must not swallow the first new record
+            f.write(prefix + ("\n".join(lines) + "\n").encode("utf-8"))
+
+    def refresh(self) -> bool:
+        if not self.path:
+            return False
+        with self._lock:
+            if self._dirty or _disk_generation(self.path) == self._generation:
+                # Unsaved writes of this handle win until they are persisted
+                return False
+            self._reset()
+            self._load()
+            self.version += 1
+            return True
+
+    # --- writes ------------------------------------------------------------
+
+    def _reserve(self, extra: int, dim: int) -> None:
+        """Makes the row storage writable with room for `extra` more rows (geometric growth)."""
+        current = self.dim
+        if current is not None and current != dim:
+            raise ValueError(
+                f"dimension mismatch: store {self.name} has {current}, got {dim}; "
+                "rebuild the collection or restore the embedding dimension it was built with"
+            )
+        needed = self._n + extra
+        if self.quantization == "int8":
+            capacity = self._codes.shape[0] if self._codes is not None else 0
+            if capacity < needed:
+                capacity = max(needed, 2 * capacity, 64)
+                codes = np.zeros((capacity, dim), dtype=np.int8)
+                scales = np.zeros(capacity, dtype=np.float32)
+                if self._n:
+                    codes[: self._n] = self._codes[: self._n]
+                    scales[: self._n] = self._scales[: self._n]
+                self._codes, self._scales = codes, scales
+            if self.path and not self._hold_floats and (
+                self._floats is None or self._floats.shape[0] < self._codes.shape[0]
+            ):
+                self._floats = None
+                self._open_floats(self._codes.shape[0], dim)
+            return
+        m = self._matrix
+        if m is None or isinstance(m, np.memmap) or m.shape[0] < needed:
+            capacity = max(needed, 2 * (m.shape[0] if m is not None else 0), 64)
+            grown = np.empty((capacity, dim), dtype=np.float32)
+            if m is not None and self._n:
+                grown[: self._n] = m[: self._n]
+            self._matrix = grown
+
+    def _write_rows(self, rows: List[int], vectors: np.ndarray) -> None:
+        if self.quantization == "int8":
+            codes, scales = _quantize(vectors)
+            self._codes[rows] = codes
+            self._scales[rows] = scales
+            if self._floats is not None:
+                self._floats[rows] = vectors
+        else:
+            self._matrix[rows] = vectors
+
+    def _move_row(self, src: int, dst: int) -> None:
+        if self.quantization == "int8":
+            self._codes[dst] = self._codes[src]
+            self._scales[dst] = self._scales[src]
+            if self._floats is not None:
+                self._floats[dst] = self._floats[src]
+        else:
+            self._matrix[dst] = self._matrix[src]
+
+    def upsert(self, ids, embeddings, metadatas=None, documents=None) -> None:
+        if not ids:
+            return
+        vectors = _normalize(embeddings)
+        if vectors.shape[0] != len(ids):
+            raise ValueError("ids and embeddings differ in length")
+        metadatas = metadatas or [{} for _ in ids]
+        documents = documents or ["" for _ in ids]
+        with self._lock:
+            new = sum(1 for i in dict.fromkeys(ids) if i not in self._row)
+            self._reserve(new, vectors.shape[1])
+            rows: List[int] = []
+            for j, doc_id in enumerate(ids):
+                row = self._row.get(doc_id)
+                if row is None:
+                    row = self._n
+                    self._n += 1
+                    self._row[doc_id] = row
+                    self._ids.append(doc_id)
+                    self._metadatas.append({})
+                    self._documents.append("")
+                rows.append(row)
+                self._metadatas[row] = dict(metadatas[j] or {})
+                self._documents[row] = documents[j] or ""
+            # Duplicate ids in one call: the last vector wins, as with sequential writes
+            last = {row: j for j, row in enumerate(rows)}
+            self._write_rows(list(last.keys()), vectors[list(last.values())])
+            self._record(
+                "upsert", list(ids), vectors, [dict(m or {}) for m in metadatas], [d or "" for d in documents]
+            )
+            self._dirty = True
+            self.version += 1
+
+    def update_metadata(self, ids, metadatas) -> None:
+        with self._lock:
+            rows = [(self._row[i], m) for i, m in zip(ids, metadatas) if i in self._row]
+            if not rows:
+                return
+            for row, metadata in rows:
+                self._metadatas[row] = dict(metadata or {})
+            self._record(
+                "meta", [self._ids[row] for row, _ in rows], metadatas=[dict(m or {}) for _, m in rows]
+            )
+            self._dirty = True
+            self.version += 1
+
+    def delete(self, ids) -> None:
+        with self._lock:
+            targets = [i for i in ids if i in self._row]
+            if not targets:
+                return
+            self.version += 1
+            self._reserve(0, self.dim)
+            for doc_id in targets:
+                row = self._row.pop(doc_id)
+                last = self._n - 1
+                if row != last:
+                    moved = self._ids[last]
+                    self._move_row(last, row)
+                    self._ids[row] = moved
+                    self._metadatas[row] = self._metadatas[last]
+                    self._documents[row] = self._documents[last]
+                    self._row[moved] = row
+                self._ids.pop()
+                self._metadatas.pop()
+                self._documents.pop()
+                self._n -= 1
+            self._record("delete", targets)
+            self._dirty = True
+
+    # --- reads -------------------------------------------------------------
+
+    def count(self) -> int:
+        return self._n
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._ids)
+
+    def get(self, ids=None, where: Where = None) -> Dict[str, List[Any]]:
+        with self._lock:
+            if ids is None:
+                rows = range(self._n)
+            else:
+                rows = [self._row[i] for i in ids if i in self._row]
+            if where:
+                where = _compile_where(where)
+                rows = [r for r in rows if _matches(self._metadatas[r], where)]
+            return {
+                "ids": [self._ids[r] for r in rows],
+                "metadatas": [self._metadatas[r] for r in rows],
+                "documents": [self._documents[r] for r in rows],
+            }
+
+    def _candidate_rows(self, where: Where) -> Optional[np.ndarray]:
+        if not where:
+            return None
+        where = _compile_where(where)
+        return np.fromiter(
+            (r for r in range(self._n) if _matches(self._metadatas[r], where)), dtype=np.int64
+        )
+
+    def _similarities(self, queries: np.ndarray, rows: Optional[np.ndarray], chunk: int = 8192) -> np.ndarray:
+        """
+        (queries, candidates) cosine similarities. int8 codes are widened into a reused
+        float32 buffer chunk by chunk, so the float copy never exists in full; batch
+        queries through query_many to amortize the widening.
+        """
+        if self.quantization != "int8":
+            matrix = self._matrix[: self._n] if rows is None else self._matrix[rows]
+            return queries @ matrix.T
+        total = self._n if rows is None else len(rows)
+        sims = np.empty((queries.shape[0], total), dtype=np.float32)
+        buf = np.empty((min(chunk, total), self._codes.shape[1]), dtype=np.float32)
+        for start in range(0, total, chunk):
+            end = min(total, start + chunk)
+            sel = slice(start, end) if rows is None else rows[start:end]
+            widened = buf[: end - start]
+            np.copyto(widened, self._codes[sel], casting="unsafe")
+            np.matmul(queries, widened.T, out=sims[:, start:end])
+            sims[:, start:end] *= self._scales[sel]
+        return sims
+
+    def query_many(self, embeddings, k: int = 4, where: Where = None, block_size: int = 1024) -> List[List[Hit]]:
+        queries = _normalize(embeddings)
+        with self._lock:
+            if self.dim is None or self._n == 0:
+                return [[] for _ in range(queries.shape[0])]
+            if queries.shape[1] != self.dim:
+                raise ValueError(
+                    f"dimension mismatch: store {self.name} has {self.dim}, got {queries.shape[1]}; "
+                    "rebuild the collection or restore the embedding dimension it was built with"
+                )
+            rows = self._candidate_rows(where)
+            rerank = self._floats is not None and self.rerank > 1
+            results: List[List[Hit]] = []
+            for start in range(0, queries.shape[0], block_size):
+                block = queries[start:start + block_size]
+                sims = self._similarities(block, rows)
+                idx, scores = _top_k(sims, k * self.rerank if rerank else k)
+                for qi in range(idx.shape[0]):
+                    cand = idx[qi] if rows is None else rows[idx[qi]]
+                    cand_scores = scores[qi]
+                    if rerank and len(cand):
+                        # Exact rescoring of the shortlist from the float memmap
+                        cand = np.sort(cand)
+                        cand_scores = self._floats[cand] @ block[qi]
+                        order = np.argsort(-cand_scores)[:k]
+                        cand, cand_scores = cand[order], cand_scores[order]
+                    hits: List[Hit] = []
+                    for r, score in zip(cand, cand_scores):
+                        r = int(r)
+                        doc = Document(
+                            id=self._ids[r], page_content=self._documents[r], metadata=dict(self._metadatas[r])
+                        )
+                        hits.append((doc, float(1.0 - score)))
+                    results.append(hits)
+            return results
+
+    def drop(self) -> None:
+        import shutil
+
+        with self._lock:
+            self._reset()
+            self.version += 1
+            if self.path:
+                shutil.rmtree(self.path, ignore_errors=True)
+
+    def iter_batches(self, batch_size: int = 4096):
+        with self._lock:
+            n = self._n
+        for start in range(0, n, batch_size):
+            end = min(n, start + batch_size)
+            with self._lock:
+                if self.quantization == "int8" and self._floats is not None:
+                    vectors = np.asarray(self._floats[start:end], dtype=np.float32)
+                elif self.quantization == "int8":
+                    vectors = _dequantize(self._codes[start:end], self._scales[start:end])
+                else:
+                    vectors = np.asarray(self._matrix[start:end], dtype=np.float32)
+                batch = (
+                    self._ids[start:end],
+                    vectors,
+                    self._metadatas[start:end],
+                    self._documents[start:end],
+                )
+            yield batch
+
+    def memory_bytes(self) -> int:
+        """Bytes of vector data for the live rows held in RAM (memmaps excluded)."""
+        if self.dim is None:
+            return 0
+        if self.quantization == "int8":
+            return int(self._n * (self.dim + 4))
+        if isinstance(self._matrix, np.memmap):
+            return 0
+        return int(self._n * self.dim * 4)
+
+
+class ChromaVectorStore(VectorStore):
+    """chromadb collection (cosine space); persistent when a directory is given."""
+
+    def __init__(self, name: str, directory: Optional[str] = None) -> None:
+        import chromadb  # heavy import, only when this backend is selected
+        from chromadb.config import Settings
+
+        self.name = name
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            client = chromadb.PersistentClient(path=directory, settings=Settings(anonymized_telemetry=False))
+        else:
+            client = chromadb.Client(Settings(is_persistent=False, anonymized_telemetry=False))
+        self._client = client
+        self._collection = client.get_or_create_collection(
+            name=name, metadata={"hnsw:space": "cosine"}, embedding_function=None
+        )
+
+    def upsert(self, ids, embeddings, metadatas=None, documents=None) -> None:
+        if not ids:
+            return
+        self._collection.upsert(
+            ids=list(ids),
+            embeddings=[list(map(float, e)) for e in embeddings],
+            metadatas=list(metadatas) if metadatas else None,
+            documents=list(documents) if documents else None,
+        )
+        self.version += 1
+
+    def get(self, ids=None, where: Where = None) -> Dict[str, List[Any]]:
+        res = self._collection.get(
+            ids=list(ids) if ids is not None else None,
+            where=where or None,
+            include=["metadatas", "documents"],
+        )
+        return {
+            "ids": list(res.get("ids") or []),
+            "metadatas": [m or {} for m in (res.get("metadatas") or [])],
+            "documents": [d or "" for d in (res.get("documents") or [])],
+        }
+
+    def update_metadata(self, ids, metadatas) -> None:
+        present = set(self._collection.get(ids=list(ids), include=[]).get("ids") or []) if ids else set()
+        rows = [(i, m) for i, m in zip(ids, metadatas) if i in present]
+        if rows:
+            self._collection.update(ids=[i for i, _ in rows], metadatas=[m for _, m in rows])
+            self.version += 1
+
+    def delete(self, ids) -> None:
+        if ids:
+            self._collection.delete(ids=list(ids))
+            self.version += 1
+
+    def ids(self) -> List[str]:
+        return list(self._collection.get(include=[]).get("ids") or [])
+
+    def drop(self) -> None:
+        self._client.delete_collection(self.name)
+        self.version += 1
+
+    def count(self) -> int:
+        return int(self._collection.count())
+
+    def query_many(self, embeddings, k: int = 4, where: Where = None) -> List[List[Hit]]:
+        embeddings = [list(map(float, e)) for e in embeddings]
+        if not embeddings:
+            return []
+        total = self.count()
+        if total == 0:
+            return [[] for _ in embeddings]
+        res = self._collection.query(
+            query_embeddings=embeddings,
+            n_results=min(k, total),
+            where=where or None,
+            include=["metadatas", "documents", "distances"],
+        )
+        results: List[List[Hit]] = []
+        for ids, metas, docs, dists in zip(res["ids"], res["metadatas"], res["documents"], res["distances"]):
+            results.append(
+                [
+                    (Document(id=i, page_content=d or "", metadata=dict(m or {})), float(dist))
+                    for i, m, d, dist in zip(ids, metas, docs, dists)
+                ]
+            )
+        return results
+
+    def iter_batches(self, batch_size: int = 4096):
+        offset = 0
+        while True:
+            res = self._collection.get(
+                limit=batch_size, offset=offset, include=["embeddings", "metadatas", "documents"]
+            )
+            ids = list(res.get("ids") or [])
+            if not ids:
+                return
+            yield (
+                ids,
+                _normalize(res["embeddings"]),
+                [m or {} for m in res["metadatas"]],
+                [d or "" for d in res["documents"]],
+            )
+            offset += len(ids)
+
+
+BACKENDS = {"numpy": NumpyVectorStore, "chroma": ChromaVectorStore}
+
+
+def create_vector_store(
+    name: str,
+    directory: Optional[str] = None,
+    backend: Optional[str] = None,
+    quantization: Optional[str] = None,
+) -> VectorStore:
+    """
+    Opens collection `name` with the configured backend; directory=None keeps it in memory.
+    - backend: RAG_VECTOR_BACKEND (chroma | numpy | numpy-int8)
+    - quantization (numpy only): RAG_VECTOR_QUANTIZATION (none | int8),
+      re-rank factor RAG_VECTOR_RERANK (default 4)
+    """
+    backend, quantization = _resolve_backend(backend, quantization)
+    # Chroma collection names: 3-63 chars of [a-zA-Z0-9._-]
+    safe = re.sub(r"[^A-Za-z0-9._-]+", "_", name)[:63].ljust(3, "_")
+    if backend == "numpy":
+        try:
+            rerank = int(os.getenv("RAG_VECTOR_RERANK", "4"))
+        except Exception:
+            rerank = 4
+        return NumpyVectorStore(safe, directory, quantization=quantization, rerank=rerank)
+    return BACKENDS[backend](safe, directory)
+
+
+def _resolve_backend(backend: Optional[str], quantization: Optional[str]) -> Tuple[str, Optional[str]]:
+    """(backend, quantization) after env defaults; quantization is None for non-numpy backends."""
+    backend = (backend or os.getenv("RAG_VECTOR_BACKEND", "chroma")).lower()
+    if backend == "numpy-int8":
+        backend, quantization = "numpy", "int8"
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown RAG_VECTOR_BACKEND: {backend}")
+    if backend != "numpy":
+        return backend, None
+    return backend, (quantization or os.getenv("RAG_VECTOR_QUANTIZATION", "none")).lower()
+
+
+def list_collections(directory: Optional[str], backend: Optional[str] = None) -> List[str]:
+    """Names of the collections persisted under `directory` for the configured backend."""
+    if not directory or not os.path.isdir(directory):
+        return []
+    backend = (backend or os.getenv("RAG_VECTOR_BACKEND", "chroma")).lower()
+    if backend.startswith("numpy"):
+        return sorted(
+            d for d in os.listdir(directory) if os.path.exists(os.path.join(directory, d, "meta.json"))
+        )
+    import chromadb
+    from chromadb.config import Settings
+
+    client = chromadb.PersistentClient(path=directory, settings=Settings(anonymized_telemetry=False))
+    return sorted(getattr(c, "name", str(c)) for c in client.list_collections())
+
+
+_PARTITION_SPANS = {"d": 86400.0, "w": 7 * 86400.0}
+
+
+def _time_lower_bound(where: Where, field: str) -> Optional[float]:
+    """Tightest $gt/$gte bound on `field` implied by `where` (top level or inside $and)."""
+    if not where:
+        return None
+    bounds: List[float] = []
+    for key, cond in where.items():
+        if key == "$and":
+            bounds.extend(b for b in (_time_lower_bound(c, field) for c in cond) if b is not None)
+        elif key == field and isinstance(cond, dict):
+            bounds.extend(float(cond[op]) for op in ("$gt", "$gte") if op in cond)
+    return max(bounds) if bounds else None
+
+
+class PartitionedVectorStore(VectorStore):
+    """
+    Time-partitioned collection: each row goes to <name>__dYYYYMMDD (day) or
+    <name>__wYYYYMMDD (week starting Monday, UTC) by its numeric metadata field
+    `time_field` (unix seconds; rows without it use the write time).
+    - query_many/get only open partitions that can satisfy a $gt/$gte bound on
+      time_field in `where`, so a recency window costs the same however much
+      history is kept
+    - expire() drops whole partitions older than retention_days (0 keeps everything)
+    - An id -> partition map, built from the partitions' ids on the first write,
+      delete, count or get by ids, lets those touch only the partitions that hold
+      the rows, so ingest cost does not grow with history
+    - An unpartitioned collection <name> left from before partitioning is always
+      searched and never expired
+    """
+
+    def __init__(
+        self,
+        name: str,
+        directory: Optional[str] = None,
+        granularity: str = "week",
+        retention_days: float = 0.0,
+        time_field: str = "published_ts",
+        backend: Optional[str] = None,
+        quantization: Optional[str] = None,
+    ) -> None:
+        if granularity not in ("day", "week"):
+            raise ValueError(f"unsupported partition granularity: {granularity}")
+        self.name = name
+        self.directory = directory
+        self.granularity = granularity
+        self.retention_days = max(0.0, retention_days)
+        self.time_field = time_field
+        self._backend = backend
+        self._quantization = quantization
+        self._lock = threading.RLock()
+        # partition name -> (start unix seconds, span seconds)
+        self._ranges: Dict[str, Tuple[float, float]] = {}
+        self._stores: Dict[str, VectorStore] = {}
+        self._legacy: Optional[VectorStore] = None
+        # id -> partition name (self.name for the legacy collection); None until first needed
+        self._locations: Optional[Dict[str, str]] = None
+        self._pattern = re.compile(rf"^{re.escape(name)}__([dw])(\d{{8}})$")
+        # Other processes' writes are only detectable for numpy stores on disk
+        self._watch = bool(directory) and _resolve_backend(backend, quantization)[0] == "numpy"
+        self._ranges, has_legacy = self._scan()
+        if has_legacy:
+            self._legacy = create_vector_store(name, directory, backend, quantization)
+        # collection name -> meta.json generation, as last seen or written here
+        self._disk = self._snapshot(self._ranges, has_legacy)
+
+    # --- partitions --------------------------------------------------------
+
+    def _scan(self) -> Tuple[Dict[str, Tuple[float, float]], bool]:
+        """(partition ranges, whether the legacy collection exists) as listed in the directory."""
+        ranges: Dict[str, Tuple[float, float]] = {}
+        has_legacy = False
+        for existing in list_collections(self.directory, self._backend):
+            m = self._pattern.match(existing)
+            if m:
+                start = float(calendar.timegm(time.strptime(m.group(2), "%Y%m%d")))
+                ranges[existing] = (start, _PARTITION_SPANS[m.group(1)])
+            elif existing == self.name:
+                has_legacy = True
+        return ranges, has_legacy
+
+    def _snapshot(self, ranges: Dict[str, Tuple[float, float]], has_legacy: bool) -> Dict[str, Any]:
+        if not self._watch:
+            return {}
+        names = list(ranges) + ([self.name] if has_legacy else [])
+        return {n: _disk_generation(os.path.join(self.directory, n)) for n in names}
+
+    def _partition_for(self, ts: float) -> Tuple[str, float, float]:
+        day = int(ts // 86400) * 86400
+        if self.granularity == "week":
+            # 1970-01-01 was a Thursday: shift to the Monday that starts the week
+            day -= ((day // 86400 + 3) % 7) * 86400
+            prefix, span = "w", _PARTITION_SPANS["w"]
+        else:
+            prefix, span = "d", _PARTITION_SPANS["d"]
+        return f"{self.name}__{prefix}{time.strftime('%Y%m%d', time.gmtime(day))}", float(day), span
+
+    def _open(self, partition: str) -> VectorStore:
+        store = self._stores.get(partition)
+        if store is None:
+            store = self._stores[partition] = create_vector_store(
+                partition, self.directory, self._backend, self._quantization
+            )
+        return store
+
+    def _store_for(self, partition: str) -> Optional[VectorStore]:
+        if partition == self.name:
+            return self._legacy
+        return self._open(partition) if partition in self._ranges else None
+
+    def _index(self) -> Dict[str, str]:
+        """The id -> partition map (call under self._lock); partitions not open yet are read and released."""
+        if self._locations is None:
+            locations: Dict[str, str] = {}
+            if self._legacy is not None:
+                locations.update(dict.fromkeys(self._legacy.ids(), self.name))
+            for partition in sorted(self._ranges, key=lambda p: self._ranges[p][0]):
+                store = self._stores.get(partition) or create_vector_store(
+                    partition, self.directory, self._backend, self._quantization
+                )
+                locations.update(dict.fromkeys(store.ids(), partition))
+            self._locations = locations
+        return self._locations
+
+    def _by_partition(self, ids: Sequence[str]) -> Dict[str, List[str]]:
+        """Present ids grouped by the partition holding them (call under self._lock)."""
+        locations = self._index()
+        groups: Dict[str, List[str]] = {}
+        for doc_id in dict.fromkeys(ids):
+            partition = locations.get(doc_id)
+            if partition is not None:
+                groups.setdefault(partition, []).append(doc_id)
+        return groups
+
+    def _planned(self, where: Where = None) -> List[VectorStore]:
+        """Stores whose time range can contain rows matching `where`, newest first."""
+        bound = _time_lower_bound(where, self.time_field)
+        with self._lock:
+            names = [
+                n
+                for n, (start, span) in sorted(self._ranges.items(), key=lambda x: x[1][0], reverse=True)
+                if bound is None or start + span > bound
+            ]
+            stores = [self._open(n) for n in names]
+        if self._legacy is not None:
+            stores.append(self._legacy)
+        return stores
+
+    def partitions(self) -> List[str]:
+        with self._lock:
+            return sorted(self._ranges)
+
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        """Drops partitions that ended more than retention_days ago; returns the ids they held."""
+        if not self.retention_days:
+            return []
+        cutoff = (now if now is not None else time.time()) - self.retention_days * 86400.0
+        removed: List[str] = []
+        with self._lock:
+            for partition, (start, span) in list(self._ranges.items()):
+                if start + span > cutoff:
+                    continue
+                store = self._open(partition)
+                dropped = store.ids()
+                store.drop()
+                del self._ranges[partition]
+                del self._stores[partition]
+                self._disk.pop(partition, None)
+                if self._locations is not None:
+                    for doc_id in dropped:
+                        self._locations.pop(doc_id, None)
+                removed.extend(dropped)
+                self.version += 1
+        return removed
+
+    # --- VectorStore -------------------------------------------------------
+
+    def upsert(self, ids, embeddings, metadatas=None, documents=None) -> None:
+        if not ids:
+            return
+        metadatas = metadatas or [{} for _ in ids]
+        documents = documents or ["" for _ in ids]
+        now = time.time()
+        groups: Dict[str, List[int]] = {}
+        # old partition -> ids moving out of it: a row whose timestamp changed must not stay behind
+        moved: Dict[str, List[str]] = {}
+        with self._lock:
+            locations = self._index()
+            for j, meta in enumerate(metadatas):
+                try:
+                    ts = float((meta or {}).get(self.time_field))
+                except (TypeError, ValueError):
+                    ts = now
+                partition, start, span = self._partition_for(ts)
+                self._ranges.setdefault(partition, (start, span))
+                groups.setdefault(partition, []).append(j)
+                previous = locations.get(ids[j])
+                if previous is not None and previous != partition:
+                    moved.setdefault(previous, []).append(ids[j])
+            targets = {p: self._open(p) for p in groups}
+            sources = {p: self._store_for(p) for p in moved}
+        for partition, rows in groups.items():
+            targets[partition].upsert(
+                [ids[j] for j in rows],
+                [embeddings[j] for j in rows],
+                [metadatas[j] for j in rows],
+                [documents[j] for j in rows],
+            )
+        for partition, moved_ids in moved.items():
+            if sources[partition] is not None:
+                sources[partition].delete(moved_ids)
+        with self._lock:
+            for partition, rows in groups.items():
+                for j in rows:
+                    locations[ids[j]] = partition
+            self.version += 1
+
+    def get(self, ids=None, where: Where = None) -> Dict[str, List[Any]]:
+        out: Dict[str, List[Any]] = {"ids": [], "metadatas": [], "documents": []}
+        if ids is None:
+            lookups = [(store, None) for store in self._planned(where)]
+        else:
+            with self._lock:
+                lookups = [(self._store_for(p), present) for p, present in self._by_partition(ids).items()]
+        for store, present in lookups:
+            if store is None:
+                continue
+            got = store.get(ids=present, where=where)
+            for key in out:
+                out[key].extend(got[key])
+        return out
+
+    def update_metadata(self, ids, metadatas) -> None:
+        """Rows stay in their partition: a changed time_field needs an upsert to move them."""
+        by_id = dict(zip(ids, metadatas))
+        with self._lock:
+            groups = self._by_partition(list(by_id))
+            stores = {p: self._store_for(p) for p in groups}
+        for partition, present in groups.items():
+            if stores[partition] is not None:
+                stores[partition].update_metadata(present, [by_id[i] for i in present])
+        with self._lock:
+            self.version += 1
+
+    def delete(self, ids) -> None:
+        with self._lock:
+            groups = self._by_partition(ids)
+            stores = {p: self._store_for(p) for p in groups}
+        for partition, present in groups.items():
+            if stores[partition] is not None:
+                stores[partition].delete(present)
+        with self._lock:
+            for present in groups.values():
+                for doc_id in present:
+                    self._locations.pop(doc_id, None)
+            self.version += 1
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._index())
+
+    def ids(self) -> List[str]:
+        with self._lock:
+            return list(self._index())
+
+    def query_many(self, embeddings, k: int = 4, where: Where = None) -> List[List[Hit]]:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        merged: List[List[Hit]] = [[] for _ in range(len(embeddings))]
+        if not len(embeddings):
+            return merged
+        for store in self._planned(where):
+            for hits, found in zip(merged, store.query_many(embeddings, k=k, where=where)):
+                hits.extend(found)
+        return [sorted(hits, key=lambda h: h[1])[:k] for hits in merged]
+
+    def iter_batches(self, batch_size: int = 4096):
+        for store in self._planned():
+            yield from store.iter_batches(batch_size)
+
+    def persist(self) -> None:
+        # Partitions never opened have nothing to flush
+        with self._lock:
+            stores = list(self._stores.values()) + ([self._legacy] if self._legacy is not None else [])
+        for store in stores:
+            store.persist()
+        if self._watch:
+            with self._lock:
+                # Own writes must not look like another process's on the next refresh()
+                for store in stores:
+                    self._disk[store.name] = _disk_generation(os.path.join(self.directory, store.name))
+
+    def refresh(self) -> bool:
+        """
+        Picks up partitions another process created, persisted or expired (numpy on disk):
+        open partitions reload, new ones become searchable and the id map is rebuilt.
+        """
+        if not self._watch:
+            return False
+        ranges, has_legacy = self._scan()
+        disk = self._snapshot(ranges, has_legacy)
+        with self._lock:
+            if disk == self._disk:
+                return False
+            for store in self._stores.values():
+                store.refresh()
+            for partition in list(self._ranges):
+                store = self._stores.get(partition)
+                # Gone from disk (expired elsewhere); keep partitions holding unsaved rows
+                if partition not in ranges and (store is None or not store.count()):
+                    del self._ranges[partition]
+                    self._stores.pop(partition, None)
+            self._ranges.update(ranges)
+            if self._legacy is not None:
+                self._legacy.refresh()
+            elif has_legacy:
+                self._legacy = create_vector_store(self.name, self.directory, self._backend, self._quantization)
+            self._disk = disk
+            self._locations = None
+            self.version += 1
+            return True
+
+    def drop(self) -> None:
+        for store in self._planned():
+            store.drop()
+        with self._lock:
+            self._ranges.clear()
+            self._stores.clear()
+            self._legacy = None
+            self._locations = {}
+            self._disk = {}
+            self.version += 1
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            stores = list(self._stores.values()) + ([self._legacy] if self._legacy is not None else [])
+        return sum(store.memory_bytes() for store in stores)
+
+
+class StoreRegistry:
+    """
+    Process-wide, thread-safe get-or-create cache of opened stores and the state
+    derived from them (BM25 indexes, ingest ledgers, LSH indexes).
+    - Each key is created once by the first caller's factory; concurrent callers
+      for the same key wait for it instead of opening a second handle
+    - Factories for different keys run in parallel
+    - State derived from a store is keyed (kind, store), so discard_derived() can
+      drop it when the store reloads from disk
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._items: Dict[Any, Any] = {}
+        self._creating: Dict[Any, threading.Lock] = {}
+
+    def get_or_create(self, key: Any, factory: Any) -> Any:
+        with self._lock:
+            if key in self._items:
+                return self._items[key]
+            creating = self._creating.setdefault(key, threading.Lock())
+        with creating:
+            with self._lock:
+                if key in self._items:
+                    return self._items[key]
+            value = factory()
+            with self._lock:
+                self._items[key] = value
+                self._creating.pop(key, None)
+            return value
+
+    def get(self, key: Any) -> Any:
+        """The cached value, or None if nobody created it yet (does not create)."""
+        with self._lock:
+            return self._items.get(key)
+
+    def discard(self, key: Any) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def discard_derived(self, store: Any) -> None:
+        """Drops the (kind, store) entries built from `store`, so they are rebuilt from its new contents."""
+        with self._lock:
+            for key in [k for k in self._items if isinstance(k, tuple) and len(k) == 2 and k[1] is store]:
+                del self._items[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+
+STORES = StoreRegistry()
+
+
+def _directory_key(directory: Optional[str]) -> Optional[str]:
+    return os.path.realpath(directory) if directory else None
+
+
+def _refreshed(store: VectorStore) -> VectorStore:
+    """Reloads a shared handle that another process wrote to since, dropping the state derived from it."""
+    if store.refresh():
+        STORES.discard_derived(store)
+    return store
+
+
+def open_vector_store(
+    name: str,
+    directory: Optional[str] = None,
+    backend: Optional[str] = None,
+    quantization: Optional[str] = None,
+) -> VectorStore:
+    """
+    Shared handle of collection `name`: every caller in the process (CLI, traders, API)
+    gets the same store for the same backend/directory/name, so in-memory collections
+    are visible across instances and on-disk ones are not opened twice.
+    The handle is refreshed on every call, so rows persisted by another process
+    (e.g. a CLI ingest) show up in long-running ones.
+    """
+    backend, quantization = _resolve_backend(backend, quantization)
+    key = ("store", name, _directory_key(directory), backend, quantization)
+    return _refreshed(STORES.get_or_create(key, lambda: create_vector_store(name, directory, backend, quantization)))
+
+
+def open_partitioned_store(
+    name: str,
+    directory: Optional[str] = None,
+    granularity: str = "week",
+    retention_days: float = 0.0,
+    time_field: str = "published_ts",
+    backend: Optional[str] = None,
+    quantization: Optional[str] = None,
+) -> PartitionedVectorStore:
+    """Shared, refreshed PartitionedVectorStore (see open_vector_store); retention_days is that of the latest caller."""
+    backend, quantization = _resolve_backend(backend, quantization)
+    key = ("partitioned", name, _directory_key(directory), backend, quantization, granularity, time_field)
+    store = STORES.get_or_create(
+        key,
+        lambda: PartitionedVectorStore(
+            name, directory, granularity, retention_days, time_field, backend, quantization
+        ),
+    )
+    store.retention_days = max(0.0, retention_days)
+    return _refreshed(store)
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return 0
+
+
+def benchmark_backends(
+    n: int = 5000,
+    dim: int = 1536,
+    n_queries: int = 100,
+    k: int = 10,
+    backends: Sequence[str] = ("numpy", "numpy-int8", "numpy-int8-rerank", "chroma"),
+    seed: int = 0,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Builds each backend on the same random corpus and reports build time, query
+    latency (single and batched), memory and recall@k against exact search.
+    A "-rerank" suffix runs the backend on a temporary directory, so int8 stores
+    re-rank candidates against the float memmap.
+    """
+    import shutil
+    import tempfile
+
+    rng = np.random.default_rng(seed)
+    corpus = rng.standard_normal((n, dim), dtype=np.float32)
+    queries = corpus[rng.integers(0, n, n_queries)] + 0.1 * rng.standard_normal((n_queries, dim), dtype=np.float32)
+    ids = [str(i) for i in range(n)]
+    metadatas = [{"doc_key": i} for i in ids]
+    exact_idx, _ = _top_k(_normalize(queries) @ _normalize(corpus).T, k)
+    exact = [set(map(str, row)) for row in exact_idx]
+
+    report: Dict[str, Dict[str, Any]] = {}
+    float_bytes = n * dim * 4
+    for backend in backends:
+        directory = tempfile.mkdtemp(prefix="vs_bench_") if backend.endswith("-rerank") else None
+        rss_before = _rss_bytes()
+        started = time.perf_counter()
+        try:
+            store = create_vector_store(
+                f"bench_{backend}_{int(started * 1000)}", directory, backend=backend.replace("-rerank", "")
+            )
+            for s in range(0, n, 1000):
+                store.upsert(ids[s:s + 1000], corpus[s:s + 1000], metadatas[s:s + 1000])
+        except Exception as e:
+            report[backend] = {"error": str(e)}
+            continue
+        build = time.perf_counter() - started
+
+        started = time.perf_counter()
+        single = [store.query(q, k=k) for q in queries]
+        single_latency = (time.perf_counter() - started) / n_queries
+        started = time.perf_counter()
+        store.query_many(queries, k=k)
+        batch_latency = (time.perf_counter() - started) / n_queries
+
+        recall = float(
+            np.mean([len({d.metadata["doc_key"] for d, _ in hits} & truth) / k for hits, truth in zip(single, exact)])
+        )
+        report[backend] = {
+            "build_s": round(build, 3),
+            "query_ms": round(single_latency * 1000, 3),
+            "batched_query_ms": round(batch_latency * 1000, 3),
+            "recall_at_k": round(recall, 4),
+            "rss_delta_mb": round((_rss_bytes() - rss_before) / 2**20, 1),
+            "vector_mb": round(store.memory_bytes() / 2**20, 1) if store.memory_bytes() else None,
+            "saved_pct": round(100.0 * (1 - store.memory_bytes() / float_bytes), 1) if store.memory_bytes() else None,
+        }
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
+    return report
@@ -7,21 +7,37 @@ MCP клиент для The Verge News
 import os
 import asyncio
 import logging
-from typing import Dict, List, Any, Optional
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterator, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import json
 
+from agents.connectors.mcp_cache import MCPToolCache, tool_cache
+from agents.connectors.mcp_pool import Connect, MCPSessionPool
+from agents.utils.async_runtime import get_runtime, is_runtime_loop
+
 logger = logging.getLogger(__name__)
 
 class VergeNewsMCPClient:
     """
     MCP клиент для The Verge News
+    - Сессии долгоживущие: пул MCPSessionPool на каждый event loop (MCP_POOL_SIZE,
+      MCP_IDLE_TIMEOUT_SECS, MCP_HEALTH_CHECK_SECS), handshake не повторяется на каждый вызов
+    - connect: фабрика сессий (async context manager), по умолчанию streamable HTTP к Smithery;
+      в тестах подменяется локальным MCP-сервером
+    - Результаты инструментов кешируются в общем для процесса MCPToolCache (TTL по инструменту,
+      при ошибке отдаётся устаревший результат)
     """
     
-    def __init__(self, api_key: str = None):
+    def __init__(
+        self, api_key: str = None, connect: Optional[Connect] = None, cache: Optional[MCPToolCache] = None
+    ):
         self.api_key = api_key or os.getenv("SMITHERY_API_KEY", "970828f0-e3a7-4778-a72f-2cc44656511d")
         self.base_url = "https://server.smithery.ai/@manimohans/verge-news-mcp/mcp"
-        self._session = None
+        self.connect = connect or self._connect
+        self.cache = cache or tool_cache
+        self._pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, MCPSessionPool]" = weakref.WeakKeyDictionary()
         # retry params
         try:
             self.retry_attempts = int(os.getenv("SMITHERY_RETRY_ATTEMPTS", "3"))
@@ -31,41 +47,73 @@ class VergeNewsMCPClient:
             self.retry_backoff = float(os.getenv("SMITHERY_RETRY_BACKOFF_SECS", "1.5"))
         except Exception:
             self.retry_backoff = 1.5
-        
-    async def _get_session(self):
-        """Получает MCP сессию"""
         try:
-            from mcp import ClientSession
-            from mcp.client.streamable_http import streamablehttp_client
-            from urllib.parse import urlencode
-            
-            # Формируем URL с аутентификацией
-            params = {"api_key": self.api_key}
-            url = f"{self.base_url}?{urlencode(params)}"
-            
-            # Ретраим установку соединения
-            last_err = None
-            for attempt in range(1, self.retry_attempts + 1):
-                try:
-                    client = streamablehttp_client(url)
-                    read, write, _ = await client.__aenter__()
-                    session = ClientSession(read, write)
-                    await session.__aenter__()
-                    await session.initialize()
-                    return session, client
-                except Exception as e:
-                    last_err = e
-                    logger.warning(
-                        f"MCP session connect failed (attempt {attempt}/{self.retry_attempts}): {e}"
-                    )
-                    # simple backoff
-                    await asyncio.sleep(self.retry_backoff * attempt)
-            logger.error(f"Failed to create MCP session after retries: {last_err}")
-            return None, None
-            
-        except Exception as e:
-            logger.error(f"Error creating MCP session: {e}")
-            return None, None
+            self.search_concurrency = int(os.getenv("NEWS_SEARCH_CONCURRENCY", "5"))
+        except Exception:
+            self.search_concurrency = 5
+        try:
+            self.pool_size = int(os.getenv("MCP_POOL_SIZE", "2"))
+        except Exception:
+            self.pool_size = 2
+        try:
+            self.idle_timeout = float(os.getenv("MCP_IDLE_TIMEOUT_SECS", "300"))
+        except Exception:
+            self.idle_timeout = 300.0
+        try:
+            self.health_interval = float(os.getenv("MCP_HEALTH_CHECK_SECS", "60"))
+        except Exception:
+            self.health_interval = 60.0
+
+    @asynccontextmanager
+    async def _connect(self):
+        """Открывает MCP сессию (streamable HTTP + initialize)"""
+        from mcp import ClientSession
+        from mcp.client.streamable_http import streamablehttp_client
+        from urllib.parse import urlencode
+
+        # Формируем URL с аутентификацией
+        params = {"api_key": self.api_key}
+        url = f"{self.base_url}?{urlencode(params)}"
+        async with streamablehttp_client(url) as (read, write, _):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                yield session
+
+    def _get_pool(self) -> MCPSessionPool:
+        """Пул сессий текущего event loop (сессии нельзя переносить между циклами)"""
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            pool = self._pools[loop] = MCPSessionPool(
+                self.connect,
+                size=self.pool_size,
+                idle_timeout=self.idle_timeout,
+                health_interval=self.health_interval,
+                retry_attempts=self.retry_attempts,
+                retry_backoff=self.retry_backoff,
+                name="verge-news",
+            )
+            if is_runtime_loop(loop):
+                get_runtime().add_shutdown_hook(pool.close)
+        return pool
+
+    async def _call_tool(
+        self, name: str, arguments: Dict[str, Any], unavailable: Optional[Exception] = None
+    ) -> Any:
+        """call_tool через кеш результатов и пул сессий; unavailable: сервер недоступен, только кеш"""
+
+        async def fetch() -> Any:
+            if unavailable is not None:
+                raise unavailable
+            return await self._get_pool().call_tool(name, arguments)
+
+        return await self.cache.call("verge-news", name, arguments, fetch)
+
+    async def aclose(self) -> None:
+        """Закрывает сессии пула текущего event loop"""
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.close()
     
     async def get_daily_news(self) -> List[Dict[str, Any]]:
         """
@@ -75,36 +123,27 @@ class VergeNewsMCPClient:
             Список новостей
         """
         try:
-            session, client = await self._get_session()
-            if not session:
-                return self._fallback_daily_news()
+            # Вызываем get-daily-news
+            result = await self._call_tool("get-daily-news", {})
             
-            try:
-                # Вызываем get-daily-news
-                result = await session.call_tool("get-daily-news", {})
-                
-                if result.content:
-                    parsed_items = self._parse_tool_content(result.content)
-                    news_items: List[Dict[str, Any]] = []
-                    for item in parsed_items:
-                        news_items.append({
-                            "title": item.get("title", "No title"),
-                            "description": item.get("description", item.get("summary", "No description")),
-                            "url": item.get("url", item.get("link", "")),
-                            "published_at": item.get("published_at", item.get("publishedAt", item.get("pubDate", ""))),
-                            "source": item.get("source", "The Verge"),
-                            "relevance_score": float(item.get("relevance_score", 0.9)),
-                            "category": item.get("category", "Technology News")
-                        })
-                    logger.info(f"Retrieved {len(news_items)} daily news items from The Verge")
-                    return news_items
-                else:
-                    logger.warning("No content in daily news response")
-                    return self._fallback_daily_news()
-                    
-            finally:
-                await session.__aexit__(None, None, None)
-                await client.__aexit__(None, None, None)
+            if result.content:
+                parsed_items = self._parse_tool_content(result.content)
+                news_items: List[Dict[str, Any]] = []
+                for item in parsed_items:
+                    news_items.append({
+                        "title": item.get("title", "No title"),
+                        "description": item.get("description", item.get("summary", "No description")),
+                        "url": item.get("url", item.get("link", "")),
+                        "published_at": item.get("published_at", item.get("publishedAt", item.get("pubDate", ""))),
+                        "source": item.get("source", "The Verge"),
+                        "relevance_score": float(item.get("relevance_score", 0.9)),
+                        "category": item.get("category", "Technology News")
+                    })
+                logger.info(f"Retrieved {len(news_items)} daily news items from The Verge")
+                return news_items
+            else:
+                logger.warning("No content in daily news response")
+                return self._fallback_daily_news()
                 
         except Exception as e:
             logger.error(f"Error getting daily news: {e}")
@@ -118,41 +157,60 @@ class VergeNewsMCPClient:
             Список новостей
         """
         try:
-            session, client = await self._get_session()
-            if not session:
-                return self._fallback_weekly_news()
+            # Вызываем get-weekly-news
+            result = await self._call_tool("get-weekly-news", {})
             
-            try:
-                # Вызываем get-weekly-news
-                result = await session.call_tool("get-weekly-news", {})
-                
-                if result.content:
-                    parsed_items = self._parse_tool_content(result.content)
-                    news_items: List[Dict[str, Any]] = []
-                    for item in parsed_items:
-                        news_items.append({
-                            "title": item.get("title", "No title"),
-                            "description": item.get("description", item.get("summary", "No description")),
-                            "url": item.get("url", item.get("link", "")),
-                            "published_at": item.get("published_at", item.get("publishedAt", item.get("pubDate", ""))),
-                            "source": item.get("source", "The Verge"),
-                            "relevance_score": float(item.get("relevance_score", 0.8)),
-                            "category": item.get("category", "Technology News")
-                        })
-                    logger.info(f"Retrieved {len(news_items)} weekly news items from The Verge")
-                    return news_items
-                else:
-                    logger.warning("No content in weekly news response")
-                    return self._fallback_weekly_news()
-                    
-            finally:
-                await session.__aexit__(None, None, None)
-                await client.__aexit__(None, None, None)
+            if result.content:
+                parsed_items = self._parse_tool_content(result.content)
+                news_items: List[Dict[str, Any]] = []
+                for item in parsed_items:
+                    news_items.append({
+                        "title": item.get("title", "No title"),
+                        "description": item.get("description", item.get("summary", "No description")),
+                        "url": item.get("url", item.get("link", "")),
+                        "published_at": item.get("published_at", item.get("publishedAt", item.get("pubDate", ""))),
+                        "source": item.get("source", "The Verge"),
+                        "relevance_score": float(item.get("relevance_score", 0.8)),
+                        "category": item.get("category", "Technology News")
+                    })
+                logger.info(f"Retrieved {len(news_items)} weekly news items from The Verge")
+                return news_items
+            else:
+                logger.warning("No content in weekly news response")
+                return self._fallback_weekly_news()
                 
         except Exception as e:
             logger.error(f"Error getting weekly news: {e}")
             return self._fallback_weekly_news()
     
+    async def _call_search(
+        self, keyword: str, days_back: int, unavailable: Optional[Exception] = None
+    ) -> List[Dict[str, Any]]:
+        """Один вызов search-news"""
+        result = await self._call_tool("search-news", {
+            "keyword": keyword,
+            "days": days_back
+        }, unavailable)
+
+        if result.content:
+            parsed_items = self._parse_tool_content(result.content)
+            news_items: List[Dict[str, Any]] = []
+            for item in parsed_items:
+                news_items.append({
+                    "title": item.get("title", "No title"),
+                    "description": item.get("description", item.get("summary", "No description")),
+                    "url": item.get("url", item.get("link", "")),
+                    "published_at": item.get("published_at", item.get("publishedAt", item.get("pubDate", ""))),
+                    "source": item.get("source", "The Verge"),
+                    "relevance_score": float(item.get("relevance_score", 0.85)),
+                    "category": item.get("category", "Technology News"),
+                    "search_keyword": keyword
+                })
+            logger.info(f"Found {len(news_items)} news items for keyword '{keyword}'")
+            return news_items
+        logger.warning(f"No content in search response for keyword '{keyword}'")
+        return self._fallback_search_news(keyword)
+
     async def search_news(self, keyword: str, days_back: int = 30) -> List[Dict[str, Any]]:
         """
         Ищет новости по ключевому слову
@@ -165,45 +223,51 @@ class VergeNewsMCPClient:
             Список найденных новостей
         """
         try:
-            session, client = await self._get_session()
-            if not session:
-                return self._fallback_search_news(keyword)
-            
-            try:
-                # Вызываем search-news
-                result = await session.call_tool("search-news", {
-                    "keyword": keyword,
-                    "days": days_back
-                })
-                
-                if result.content:
-                    parsed_items = self._parse_tool_content(result.content)
-                    news_items: List[Dict[str, Any]] = []
-                    for item in parsed_items:
-                        news_items.append({
-                            "title": item.get("title", "No title"),
-                            "description": item.get("description", item.get("summary", "No description")),
-                            "url": item.get("url", item.get("link", "")),
-                            "published_at": item.get("published_at", item.get("publishedAt", item.get("pubDate", ""))),
-                            "source": item.get("source", "The Verge"),
-                            "relevance_score": float(item.get("relevance_score", 0.85)),
-                            "category": item.get("category", "Technology News"),
-                            "search_keyword": keyword
-                        })
-                    logger.info(f"Found {len(news_items)} news items for keyword '{keyword}'")
-                    return news_items
-                else:
-                    logger.warning(f"No content in search response for keyword '{keyword}'")
-                    return self._fallback_search_news(keyword)
-                    
-            finally:
-                await session.__aexit__(None, None, None)
-                await client.__aexit__(None, None, None)
-                
+            return await self._call_search(keyword, days_back)
         except Exception as e:
             logger.error(f"Error searching news for '{keyword}': {e}")
             return self._fallback_search_news(keyword)
 
+    async def search_many(
+        self, keywords: List[str], days_back: int = 30, concurrency: Optional[int] = None
+    ) -> AsyncIterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Параллельный поиск по нескольким ключевым словам через пул MCP-сессий
+        - Запросы мультиплексируются по уже открытым сессиям (handshake и ретраи не повторяются)
+        - Не больше concurrency запросов одновременно (NEWS_SEARCH_CONCURRENCY)
+        - Отдаёт (keyword, items) по мере завершения; ошибка по слову даёт fallback
+        """
+        keywords = list(dict.fromkeys(k for k in keywords if k))
+        if not keywords:
+            return
+        unavailable: Optional[Exception] = None
+        if not all(self.cache.fresh("verge-news", "search-news", {"keyword": kw, "days": days_back}) for kw in keywords):
+            try:
+                await self._get_pool().warm()
+            except Exception as e:
+                # Дальше только кеш (в том числе устаревший) или fallback, без повторных подключений
+                logger.error(f"MCP session unavailable for search: {e}")
+                unavailable = e
+
+        semaphore = asyncio.Semaphore(max(1, concurrency or self.search_concurrency))
+
+        async def one(kw: str) -> Tuple[str, List[Dict[str, Any]]]:
+            async with semaphore:
+                try:
+                    return kw, await self._call_search(kw, days_back, unavailable)
+                except Exception as e:
+                    logger.error(f"Error searching news for '{kw}': {e}")
+                    return kw, self._fallback_search_news(kw)
+
+        tasks = [asyncio.ensure_future(one(kw)) for kw in keywords]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                yield await fut
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
     def _parse_tool_content(self, content_items: List[Any]) -> List[Dict[str, Any]]:
         """Универсальный парсер содержимого MCP-ответа (TextContent/JSON/словарь).
         Преобразует список элементов в список словарей новостей.
@@ -253,21 +317,12 @@ class VergeNewsMCPClient:
             Список названий инструментов
         """
         try:
-            session, client = await self._get_session()
-            if not session:
-                return ["get-daily-news", "get-weekly-news", "search-news"]
+            # Получаем список инструментов
+            tools_result = await self._get_pool().list_tools()
+            tool_names = [tool.name for tool in tools_result.tools]
             
-            try:
-                # Получаем список инструментов
-                tools_result = await session.list_tools()
-                tool_names = [tool.name for tool in tools_result.tools]
-                
-                logger.info(f"Available tools: {', '.join(tool_names)}")
-                return tool_names
-                
-            finally:
-                await session.__aexit__(None, None, None)
-                await client.__aexit__(None, None, None)
+            logger.info(f"Available tools: {', '.join(tool_names)}")
+            return tool_names
                 
         except Exception as e:
             logger.error(f"Error getting available tools: {e}")
@@ -281,19 +336,15 @@ class VergeNewsMCPClient:
             Статус сервера
         """
         try:
-            # Проверяем доступность
-            loop = asyncio.new_event_loop()
-            try:
-                tools = loop.run_until_complete(self.get_available_tools())
-                return {
-                    "status": "healthy",
-                    "available_tools": tools,
-                    "api_key_configured": bool(self.api_key),
-                    "timestamp": datetime.now().isoformat(),
-                    "source": "verge-news-mcp"
-                }
-            finally:
-                loop.close()
+            # Проверяем доступность (на общем цикле, через пул сессий)
+            tools = get_runtime().run(self.get_available_tools())
+            return {
+                "status": "healthy",
+                "available_tools": tools,
+                "api_key_configured": bool(self.api_key),
+                "timestamp": datetime.now().isoformat(),
+                "source": "verge-news-mcp"
+            }
                 
         except Exception as e:
             return {
@@ -349,42 +400,47 @@ class VergeNewsMCPClient:
 
 # Синхронная обертка
 class VergeNewsMCPSync:
-    """Синхронная обертка для VergeNewsMCPClient"""
+    """
+    Синхронная обертка для VergeNewsMCPClient
+    Корутины выполняются на общем фоновом цикле (agents.utils.async_runtime), поэтому
+    сессии пула живут между вызовами; без аргументов используется общий verge_news_client
+    """
     
-    def __init__(self, api_key: str = None):
-        self.client = VergeNewsMCPClient(api_key)
+    def __init__(
+        self, api_key: str = None, connect: Optional[Connect] = None, cache: Optional[MCPToolCache] = None
+    ):
+        if api_key is None and connect is None and cache is None:
+            self.client = verge_news_client
+        else:
+            self.client = VergeNewsMCPClient(api_key, connect=connect, cache=cache)
+
+    def _run(self, coro: Any) -> Any:
+        return get_runtime().run(coro)
     
     def get_daily_news(self) -> List[Dict[str, Any]]:
         """Синхронное получение дневных новостей"""
-        loop = asyncio.new_event_loop()
-        try:
-            return loop.run_until_complete(self.client.get_daily_news())
-        finally:
-            loop.close()
+        return self._run(self.client.get_daily_news())
     
     def get_weekly_news(self) -> List[Dict[str, Any]]:
         """Синхронное получение недельных новостей"""
-        loop = asyncio.new_event_loop()
-        try:
-            return loop.run_until_complete(self.client.get_weekly_news())
-        finally:
-            loop.close()
+        return self._run(self.client.get_weekly_news())
     
     def search_news(self, keyword: str, days_back: int = 30) -> List[Dict[str, Any]]:
         """Синхронный поиск новостей"""
-        loop = asyncio.new_event_loop()
-        try:
-            return loop.run_until_complete(self.client.search_news(keyword, days_back))
-        finally:
-            loop.close()
+        return self._run(self.client.search_news(keyword, days_back))
     
+    def iter_search_many(
+        self, keywords: List[str], days_back: int = 30, concurrency: Optional[int] = None
+    ) -> Iterator[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        Синхронный параллельный поиск: search_many крутится на общем фоновом цикле,
+        результаты отдаются по мере готовности. Прерывание итерации отменяет оставшиеся запросы.
+        """
+        yield from get_runtime().iterate(self.client.search_many(keywords, days_back, concurrency))
+
     def get_available_tools(self) -> List[str]:
         """Синхронное получение доступных инструментов"""
-        loop = asyncio.new_event_loop()
-        try:
-            return loop.run_until_complete(self.client.get_available_tools())
-        finally:
-            loop.close()
+        return self._run(self.client.get_available_tools())
     
     def health_check(self) -> Dict[str, Any]:
         """Синхронная проверка состояния"""
@@ -0,0 +1,179 @@
+"""
+Process-wide background event loop for synchronous callers.
+
+The *Sync wrappers used to build and close an event loop per call, so nothing
+bound to a loop (MCP sessions, aiohttp sessions) could outlive a call. Now one
+daemon thread runs one loop for the whole process and the wrappers submit
+coroutines to it with run_coroutine_threadsafe:
+
+- run(coro): blocks the calling thread until the coroutine finishes on the loop
+- iterate(agen): consumes an async generator from sync code; closing the
+  iterator early cancels the generator
+- add_shutdown_hook(fn): async cleanup (closing pooled sessions) run at exit
+
+Never call run()/iterate() from a coroutine running on the runtime loop: it would
+wait for itself. That raises RuntimeError instead of deadlocking.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import concurrent.futures
+import logging
+import queue
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Coroutine, Iterator, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class _Raised:
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+class AsyncRuntime:
+    """Daemon thread running one event loop; see the module docstring."""
+
+    def __init__(self, name: str = "async-runtime") -> None:
+        self.loop = asyncio.new_event_loop()
+        self._hooks: List[Callable[[], Awaitable[Any]]] = []
+        self._hooks_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run_loop, name=name, daemon=True)
+        self._thread.start()
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def _check_thread(self) -> None:
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("blocking call on the async runtime loop; await the coroutine instead")
+
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive() and not self.loop.is_closed()
+
+    def submit(self, coro: Coroutine[Any, Any, T]) -> "concurrent.futures.Future[T]":
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+        self._check_thread()
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def iterate(self, agen: AsyncIterator[T]) -> Iterator[T]:
+        self._check_thread()
+        items: "queue.Queue[Any]" = queue.Queue()
+        finished = threading.Event()
+        tasks: List["asyncio.Task[None]"] = []
+
+        async def pump() -> None:
+            try:
+                async for item in agen:
+                    items.put(item)
+            except BaseException as e:
+                items.put(_Raised(e))
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+            finally:
+                aclose = getattr(agen, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+                items.put(_DONE)
+
+        def start() -> None:
+            task = self.loop.create_task(pump())
+            task.add_done_callback(lambda _: finished.set())
+            tasks.append(task)
+
+        def cancel() -> None:
+            for task in tasks:
+                task.cancel()
+
+        self.loop.call_soon_threadsafe(start)
+        try:
+            while True:
+                item = items.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _Raised):
+                    if not isinstance(item.error, asyncio.CancelledError):
+                        raise item.error
+                    continue
+                yield item
+        finally:
+            # Runs after start(): call_soon_threadsafe callbacks keep their order
+            self.loop.call_soon_threadsafe(cancel)
+            finished.wait()
+
+    def add_shutdown_hook(self, hook: Callable[[], Awaitable[Any]]) -> None:
+        with self._hooks_lock:
+            self._hooks.append(hook)
+
+    async def _shutdown(self) -> None:
+        with self._hooks_lock:
+            hooks, self._hooks = self._hooks, []
+        for hook in hooks:
+            try:
+                await asyncio.wait_for(hook(), timeout=5.0)
+            except BaseException as e:
+                logger.debug(f"async runtime shutdown hook failed: {e!r}")
+        current = asyncio.current_task()
+        pending = [t for t in asyncio.all_tasks() if t is not current]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Runs the shutdown hooks, cancels what is left and stops the loop."""
+        if not self.running:
+            return
+        try:
+            self.submit(self._shutdown()).result(timeout)
+        except Exception as e:
+            logger.debug(f"async runtime shutdown: {e!r}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+
+
+_runtime: Optional[AsyncRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> AsyncRuntime:
+    """The process-wide runtime, started on first use."""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None or not _runtime.running:
+            _runtime = AsyncRuntime()
+            atexit.register(_runtime.shutdown)
+        return _runtime
+
+
+def is_runtime_loop(loop: Optional[asyncio.AbstractEventLoop] = None) -> bool:
+    """Whether `loop` (default: the running one) is the runtime's; does not start the runtime."""
+    if loop is None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+    runtime = _runtime
+    return runtime is not None and runtime.loop is loop
+
+
+def run_sync(coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+    return get_runtime().run(coro, timeout)
+
+
+def iterate_sync(agen: AsyncIterator[T]) -> Iterator[T]:
+    return get_runtime().iterate(agen)
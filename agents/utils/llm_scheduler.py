@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from agents.utils.metrics import (
+    llm_rate_limited_total,
+    llm_scheduler_queue_depth,
+    llm_scheduler_wait_seconds,
+)
+
+# Priority classes: lower value is served first
+PRIORITY_POSITIONS = 0  # trade/position-maintenance decisions
+PRIORITY_FORECAST = 1  # superforecaster / analyst calls feeding a decision
+PRIORITY_FILTER = 2  # event/market filtering and bulk exploration
+PRIORITY_CREATE = 3  # new-market ideas from Creator
+
+PRIORITY_NAMES = {
+    PRIORITY_POSITIONS: "positions",
+    PRIORITY_FORECAST: "forecast",
+    PRIORITY_FILTER: "filter",
+    PRIORITY_CREATE: "create",
+}
+
+CALL_SITE_PRIORITY = {
+    "one_best_trade": PRIORITY_POSITIONS,
+    "superforecaster": PRIORITY_FORECAST,
+    "market_analyst": PRIORITY_FORECAST,
+    "filter_events": PRIORITY_FILTER,
+    "polymarket_llm": PRIORITY_FILTER,
+    "create_new_market": PRIORITY_CREATE,
+}
+
+
+def priority_for(call_site: str) -> int:
+    return CALL_SITE_PRIORITY.get(call_site, PRIORITY_FILTER)
+
+
+def retry_after_seconds(headers: Optional[Mapping[str, str]], default: float = 1.0) -> float:
+    """Parses retry-after-ms / retry-after (seconds or HTTP date) from a 429 response."""
+    if not headers:
+        return default
+    try:
+        ms = headers.get("retry-after-ms")
+        if ms is not None:
+            return max(0.0, float(ms) / 1000.0)
+    except Exception:
+        pass
+    value = headers.get("retry-after")
+    if value is None:
+        return default
+    try:
+        return max(0.0, float(value))
+    except Exception:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return default
+
+
+class TokenBucket:
+    """Classic token bucket refilled continuously at rate_per_minute."""
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate_per_minute = float(rate_per_minute)
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self._clock = clock
+        self._level = self.capacity
+        self._updated = clock()
+        self.scale = 1.0
+
+    @property
+    def rate_per_second(self) -> float:
+        return max(1e-9, self.rate_per_minute * self.scale / 60.0)
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = max(0.0, now - self._updated)
+        self._level = min(self.capacity, self._level + elapsed * self.rate_per_second)
+        self._updated = now
+
+    def clamp(self, amount: float) -> float:
+        # A single request larger than the bucket would otherwise never be admitted
+        return min(float(amount), self.capacity)
+
+    def time_until(self, amount: float) -> float:
+        self._refill()
+        missing = self.clamp(amount) - self._level
+        return 0.0 if missing <= 0 else missing / self.rate_per_second
+
+    def consume(self, amount: float) -> None:
+        self._refill()
+        self._level -= self.clamp(amount)
+
+    def adjust(self, delta: float) -> None:
+        """Returns (delta > 0) or charges (delta < 0) tokens after the fact."""
+        self._refill()
+        self._level = min(self.capacity, self._level + delta)
+
+
+class _LoopWaiters:
+    """Queue, wake-up event and dispatcher of one event loop."""
+
+    def __init__(self) -> None:
+        self.heap: List[Tuple[int, int, float, asyncio.Future]] = []
+        self.wakeup = asyncio.Event()
+        self.dispatcher: Optional[asyncio.Task] = None
+
+
+class LLMScheduler:
+    """
+    Priority-aware admission control in front of chat completions.
+    - Two token buckets: requests per minute and (estimated) tokens per minute
+    - Waiters are served strictly by (priority, arrival order)
+    - 429 responses pause admission for retry-after and halve the effective rate;
+      each success recovers it gradually
+    - Shared by every loop and thread: each running loop gets its own queue and
+      dispatcher, while the buckets are shared under a threading.Lock
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._clock = clock
+        self.requests = TokenBucket(requests_per_minute, clock=clock)
+        self.tokens = TokenBucket(tokens_per_minute, clock=clock)
+        self._lock = threading.Lock()
+        # A plain dict pruned of closed loops: the queued futures reference their loop,
+        # so a WeakKeyDictionary entry would never be collected
+        self._loops: Dict[asyncio.AbstractEventLoop, _LoopWaiters] = {}
+        self._seq = itertools.count()
+        self._blocked_until = 0.0
+        self.min_scale = 0.1
+        self.recovery_step = 0.05
+
+    @property
+    def queue_depth(self) -> int:
+        with self._lock:
+            return sum(len(q.heap) for q in self._loops.values())
+
+    def _set_scale(self, scale: float) -> None:
+        scale = max(self.min_scale, min(1.0, scale))
+        self.requests.scale = scale
+        self.tokens.scale = scale
+
+    def _delay_for(self, tokens: float) -> float:
+        blocked = max(0.0, self._blocked_until - self._clock())
+        return max(blocked, self.requests.time_until(1), self.tokens.time_until(tokens))
+
+    def _update_depth_metric(self) -> None:
+        # Called under self._lock
+        counts = {name: 0 for name in PRIORITY_NAMES.values()}
+        for queue in self._loops.values():
+            for priority, _, _, _ in queue.heap:
+                name = PRIORITY_NAMES.get(priority, str(priority))
+                counts[name] = counts.get(name, 0) + 1
+        for name, count in counts.items():
+            llm_scheduler_queue_depth.labels(priority=name).set(count)
+
+    def _queue_for(self, loop: asyncio.AbstractEventLoop) -> _LoopWaiters:
+        # Called under self._lock, from a coroutine running on `loop`
+        queue = self._loops.get(loop)
+        if queue is None:
+            for closed in [other for other in self._loops if other.is_closed()]:
+                del self._loops[closed]
+            queue = self._loops[loop] = _LoopWaiters()
+        return queue
+
+    async def acquire(self, priority: int, estimated_tokens: float) -> None:
+        """Waits until the request may be sent; consumes one request and estimated_tokens."""
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future = loop.create_future()
+        with self._lock:
+            queue = self._queue_for(loop)
+            heapq.heappush(queue.heap, (priority, next(self._seq), float(estimated_tokens), fut))
+            self._update_depth_metric()
+        queue.wakeup.set()
+        if queue.dispatcher is None or queue.dispatcher.done():
+            queue.dispatcher = loop.create_task(self._dispatch(queue))
+        started = self._clock()
+        try:
+            await fut
+        finally:
+            llm_scheduler_wait_seconds.labels(
+                priority=PRIORITY_NAMES.get(priority, str(priority))
+            ).observe(max(0.0, self._clock() - started))
+
+    async def _dispatch(self, queue: _LoopWaiters) -> None:
+        while queue.heap:
+            with self._lock:
+                _, _, tokens, fut = queue.heap[0]
+                delay = 0.0 if fut.done() else self._delay_for(tokens)
+                if delay <= 0:
+                    heapq.heappop(queue.heap)
+                    if not fut.done():
+                        self.requests.consume(1)
+                        self.tokens.consume(tokens)
+                        fut.set_result(None)
+                    self._update_depth_metric()
+            if delay > 0:
+                # Sleep until capacity refills, or until a new (possibly higher priority) waiter arrives
+                queue.wakeup.clear()
+                try:
+                    await asyncio.wait_for(queue.wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    def record_usage(self, estimated_tokens: float, actual_tokens: Optional[float]) -> None:
+        """Reconciles the token bucket with real usage and recovers the adaptive rate."""
+        with self._lock:
+            if actual_tokens is not None:
+                self.tokens.adjust(float(estimated_tokens) - float(actual_tokens))
+            self._set_scale(self.requests.scale + self.recovery_step)
+
+    def refund(self, estimated_tokens: float) -> None:
+        """Returns the token estimate of a request rejected with 429 before it queues again."""
+        with self._lock:
+            self.tokens.adjust(float(estimated_tokens))
+
+    def on_rate_limited(self, retry_after: float) -> None:
+        llm_rate_limited_total.inc()
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self._clock() + max(0.0, retry_after))
+            self._set_scale(self.requests.scale * 0.5)
+        # Dispatchers wake up by their own timeout and recompute the (now longer) delay
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Process-wide scheduler: all executors share the same OpenAI quota."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            try:
+                rpm = float(os.getenv("LLM_RPM", "500"))
+            except Exception:
+                rpm = 500.0
+            try:
+                tpm = float(os.getenv("LLM_TPM", "200000"))
+            except Exception:
+                tpm = 200000.0
+            _scheduler = LLMScheduler(requests_per_minute=rpm, tokens_per_minute=tpm)
+        return _scheduler
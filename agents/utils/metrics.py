@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 # Gamma API metrics
 gamma_requests_total = Counter(
@@ -28,4 +28,129 @@ pnl_histogram = Histogram(
     buckets=(-100.0, -50.0, -20.0, -10.0, -5.0, -2.0, -1.0, -0.5, -0.1, 0.0, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0),
 )
 
+# LLM scheduler metrics
+llm_scheduler_queue_depth = Gauge(
+    "llm_scheduler_queue_depth",
+    "LLM requests waiting for rate-limit admission",
+    labelnames=("priority",),
+)
+
+llm_scheduler_wait_seconds = Histogram(
+    "llm_scheduler_wait_seconds",
+    "Time LLM requests spent queued in the scheduler",
+    labelnames=("priority",),
+    buckets=(0.0, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+llm_rate_limited_total = Counter(
+    "llm_rate_limited_total",
+    "HTTP 429 responses received from the LLM provider",
+)
+
+# LLM / embedding call metrics (labelled by call site and model)
+llm_requests_total = Counter(
+    "llm_requests_total",
+    "LLM and embedding API calls",
+    labelnames=("call_site", "model", "status"),
+)
+
+llm_request_latency_seconds = Histogram(
+    "llm_request_latency_seconds",
+    "LLM and embedding API call latency",
+    labelnames=("call_site", "model"),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0, 120.0),
+)
+
+llm_prompt_tokens_total = Counter(
+    "llm_prompt_tokens_total",
+    "Prompt (input) tokens sent to the LLM provider",
+    labelnames=("call_site", "model"),
+)
+
+llm_completion_tokens_total = Counter(
+    "llm_completion_tokens_total",
+    "Completion (output) tokens returned by the LLM provider",
+    labelnames=("call_site", "model"),
+)
+
+llm_cost_usd_total = Counter(
+    "llm_cost_usd_total",
+    "Estimated LLM spend in USD",
+    labelnames=("call_site", "model"),
+)
+
+# RAG indexing metrics
+rag_index_documents_total = Counter(
+    "rag_index_documents_total",
+    "Documents offered to a RAG collection, by whether they had to be (re-)embedded or were near-duplicates",
+    labelnames=("collection", "action"),
+)
+
+rag_query_cache_lookups_total = Counter(
+    "rag_query_cache_lookups_total",
+    "RAG query result cache lookups by result (hit/miss)",
+    labelnames=("collection", "result"),
+)
+
+# MCP session pool metrics
+mcp_session_connects_total = Counter(
+    "mcp_session_connects_total",
+    "MCP session connects (transport + initialize handshake) by result",
+    labelnames=("server", "result"),
+)
+
+mcp_sessions_open = Gauge(
+    "mcp_sessions_open",
+    "Pooled MCP sessions currently open",
+    labelnames=("server",),
+)
+
+mcp_tool_cache_lookups_total = Counter(
+    "mcp_tool_cache_lookups_total",
+    "MCP tool result cache lookups by result (hit/miss/stale)",
+    labelnames=("server", "tool", "result"),
+)
+
+# Embedding cache metrics
+embedding_cache_lookups_total = Counter(
+    "embedding_cache_lookups_total",
+    "Embedding cache lookups by result (hit/miss)",
+    labelnames=("model", "result"),
+)
+
+# USD per 1K tokens: (prompt, completion). Unknown models are counted at zero cost.
+LLM_PRICES_PER_1K = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-3.5-turbo-16k": (0.003, 0.004),
+    "gpt-4-1106-preview": (0.01, 0.03),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "text-embedding-3-small": (0.00002, 0.0),
+    "text-embedding-3-large": (0.00013, 0.0),
+}
+
+
+def estimate_llm_cost(model: str, prompt_tokens: int, completion_tokens: int = 0) -> float:
+    prompt_price, completion_price = LLM_PRICES_PER_1K.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000.0
+
 
+def observe_llm_call(
+    call_site: str,
+    model: str,
+    latency: float,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    status: str = "ok",
+) -> None:
+    """Records one LLM/embedding call; token counts come from the API usage block."""
+    llm_requests_total.labels(call_site=call_site, model=model, status=status).inc()
+    llm_request_latency_seconds.labels(call_site=call_site, model=model).observe(latency)
+    if prompt_tokens:
+        llm_prompt_tokens_total.labels(call_site=call_site, model=model).inc(prompt_tokens)
+    if completion_tokens:
+        llm_completion_tokens_total.labels(call_site=call_site, model=model).inc(completion_tokens)
+    cost = estimate_llm_cost(model, prompt_tokens, completion_tokens)
+    if cost:
+        llm_cost_usd_total.labels(call_site=call_site, model=model).inc(cost)
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline stage running in its own thread.
+    - fn(item) returns an iterable of outputs for the next stage (zero, one or many)
+    - flush() is called once the input is exhausted and may emit the remaining outputs
+      (e.g. a partially filled batch)
+    """
+
+    name: str
+    fn: Callable[[Any], Iterable[Any]]
+    flush: Optional[Callable[[], Iterable[Any]]] = None
+
+
+@dataclass
+class StageStats:
+    name: str
+    items: int = 0
+    busy_secs: float = 0.0
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "items": self.items,
+            "busy_secs": round(self.busy_secs, 4),
+            "per_sec": round(self.items / self.busy_secs, 2) if self.busy_secs > 0 else 0.0,
+        }
+
+
+class Pipeline:
+    """
+    Thread-per-stage pipeline connected by bounded queues.
+    - A full queue blocks its producer, so at most maxsize items wait between two stages
+      and memory stays flat whatever the source size
+    - The first exception in any stage stops all stages and is re-raised by run()
+    - close_source() stops pulling from the source; items already queued are still processed
+    - Stats count items taken per stage (produced, for the source) and the time spent
+      working on them, excluding time blocked on queues
+    """
+
+    def __init__(self, source: Iterable[Any], stages: Sequence[Stage], maxsize: int = 64, source_name: str = "fetch") -> None:
+        self.source = source
+        self.stages = list(stages)
+        self.maxsize = max(1, maxsize)
+        self.stats: List[StageStats] = [StageStats(source_name)] + [StageStats(s.name) for s in self.stages]
+        self.wall_secs = 0.0
+        self._stop = threading.Event()
+        self._source_closed = threading.Event()
+        self._errors: List[BaseException] = []
+
+    def close_source(self) -> None:
+        self._source_closed.set()
+
+    def _fail(self, error: BaseException) -> None:
+        self._errors.append(error)
+        self._stop.set()
+
+    def _put(self, q: "queue.Queue[Any]", item: Any) -> bool:
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: "queue.Queue[Any]") -> Any:
+        while True:
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return _DONE
+
+    def _drain(self, produce: Callable[[], Iterable[Any]], stats: StageStats, out: Optional["queue.Queue[Any]"]) -> bool:
+        """Times the production of each output (not the wait for queue space)."""
+        started = time.perf_counter()
+        it = iter(produce())
+        stats.busy_secs += time.perf_counter() - started
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                stats.busy_secs += time.perf_counter() - started
+                return True
+            stats.busy_secs += time.perf_counter() - started
+            if out is not None and not self._put(out, item):
+                return False
+
+    def _run_source(self, out: "queue.Queue[Any]") -> None:
+        stats = self.stats[0]
+        it = iter(self.source)
+        try:
+            while not self._stop.is_set() and not self._source_closed.is_set():
+                started = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    break
+                finally:
+                    stats.busy_secs += time.perf_counter() - started
+                stats.items += 1
+                if not self._put(out, item):
+                    break
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            close = getattr(it, "close", None)
+            if close is not None:
+                try:
+                    close()
+                except Exception:
+                    pass
+            self._put(out, _DONE)
+
+    def _run_stage(self, index: int, inp: "queue.Queue[Any]", out: Optional["queue.Queue[Any]"]) -> None:
+        stage, stats = self.stages[index], self.stats[index + 1]
+        try:
+            while True:
+                item = self._get(inp)
+                if item is _DONE:
+                    if stage.flush is not None and not self._stop.is_set():
+                        self._drain(stage.flush, stats, out)
+                    break
+                stats.items += 1
+                if not self._drain(lambda: stage.fn(item), stats, out):
+                    break
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            if out is not None:
+                self._put(out, _DONE)
+
+    def run(self) -> Dict[str, Dict[str, float]]:
+        """Runs to completion and returns per-stage stats."""
+        started = time.perf_counter()
+        queues: List["queue.Queue[Any]"] = [queue.Queue(self.maxsize) for _ in self.stages]
+        threads = [threading.Thread(target=self._run_source, args=(queues[0],), name="pipeline-source", daemon=True)]
+        for i, stage in enumerate(self.stages):
+            out = queues[i + 1] if i + 1 < len(queues) else None
+            threads.append(
+                threading.Thread(target=self._run_stage, args=(i, queues[i], out), name=f"pipeline-{stage.name}", daemon=True)
+            )
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.wall_secs = time.perf_counter() - started
+        if self._errors:
+            raise self._errors[0]
+        return self.report()
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {s.name: s.as_dict() for s in self.stats}
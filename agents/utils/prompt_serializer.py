@@ -0,0 +1,214 @@
+"""
+Compact prompt serialization for Gamma events/markets.
+
+Instead of `str(list_of_dicts)` (images, addresses, timestamps, Python repr noise),
+records are projected to the handful of fields a prompt needs and rendered as a
+TSV (or markdown) table with short column keys and a one-line legend.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# (short key, candidate source keys, formatter name, legend)
+FieldSpec = Tuple[str, Tuple[str, ...], str, str]
+
+EVENT_FIELDS: List[FieldSpec] = [
+    ("id", ("id",), "raw", "event id"),
+    ("t", ("title", "ticker"), "text", "title"),
+    ("d", ("description",), "desc", "description"),
+    ("end", ("end", "endDate"), "date", "end date"),
+    ("vol", ("volume",), "num", "volume USD"),
+    ("liq", ("liquidity",), "num", "liquidity USD"),
+    ("mk", ("markets",), "ids", "market ids"),
+]
+
+MARKET_FIELDS: List[FieldSpec] = [
+    ("id", ("id",), "raw", "market id"),
+    ("q", ("question",), "text", "question"),
+    ("o", ("outcomes", "outcome"), "list", "outcomes"),
+    ("p", ("outcomePrices", "outcome_prices"), "prices", "outcome prices"),
+    ("sp", ("spread",), "price", "spread"),
+    ("vol", ("volume", "volumeNum"), "num", "volume USD"),
+    ("liq", ("liquidity", "liquidityNum"), "num", "liquidity USD"),
+    ("end", ("endDate", "end", "endDateIso"), "date", "end date"),
+    ("d", ("description",), "desc", "description"),
+]
+
+
+def to_record(obj: Any) -> Dict[str, Any]:
+    """Accepts dicts, pydantic models (v1/v2) and (Document, score) tuples."""
+    if isinstance(obj, dict):
+        return obj
+    if isinstance(obj, (list, tuple)) and obj and hasattr(obj[0], "metadata"):
+        doc = obj[0]
+        record = dict(doc.metadata or {})
+        record.setdefault("description", getattr(doc, "page_content", ""))
+        return record
+    for attr in ("model_dump", "dict"):
+        fn = getattr(obj, attr, None)
+        if callable(fn):
+            try:
+                return fn()
+            except Exception:
+                continue
+    return {}
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    if isinstance(value, str):
+        s = value.strip()
+        if s.startswith("["):
+            try:
+                parsed = json.loads(s)
+                if isinstance(parsed, list):
+                    return parsed
+            except Exception:
+                pass
+        return [x.strip() for x in s.split(",") if x.strip()]
+    return [value]
+
+
+def _fmt_ids(value: Any) -> str:
+    # Raw Gamma events nest full market dicts under "markets"; only their ids go in the prompt
+    ids = [x.get("id") if isinstance(x, dict) else x for x in _as_list(value)]
+    return ",".join(str(i) for i in ids if i not in (None, ""))
+
+
+def _clean(text: Any) -> str:
+    # Tabs/newlines would break the row layout
+    return " ".join(str(text).split())
+
+
+def _fmt_num(value: Any) -> str:
+    try:
+        v = float(value)
+    except Exception:
+        return ""
+    for div, suffix in ((1e9, "B"), (1e6, "M"), (1e3, "k")):
+        if abs(v) >= div:
+            return f"{v / div:.3g}{suffix}"
+    return f"{v:.3g}"
+
+
+def _fmt_price(value: Any) -> str:
+    try:
+        return f"{float(value):.3f}".rstrip("0").rstrip(".") or "0"
+    except Exception:
+        return ""
+
+
+def _fmt_date(value: Any) -> str:
+    if not value:
+        return ""
+    s = str(value)
+    try:
+        return datetime.fromisoformat(s.replace("Z", "+00:00")).strftime("%Y-%m-%d")
+    except Exception:
+        return s[:10]
+
+
+class PromptSerializer:
+    """
+    Renders records as compact tables.
+    - fmt: "tsv" (default, cheapest) or "md"
+    - max_desc_chars: descriptions are truncated, they dominate the token count
+    """
+
+    def __init__(self, fmt: str = "tsv", max_desc_chars: int = 160) -> None:
+        self.fmt = fmt
+        self.max_desc_chars = max_desc_chars
+        self._formatters: Dict[str, Callable[[Any], str]] = {
+            "raw": lambda v: "" if v is None else str(v),
+            "text": lambda v: _clean(v or ""),
+            "desc": self._fmt_desc,
+            "date": _fmt_date,
+            "num": _fmt_num,
+            "price": _fmt_price,
+            "list": lambda v: "/".join(_clean(x) for x in _as_list(v)),
+            "prices": lambda v: "/".join(_fmt_price(x) for x in _as_list(v)),
+            "ids": _fmt_ids,
+        }
+
+    def _fmt_desc(self, value: Any) -> str:
+        text = _clean(value or "")
+        if self.max_desc_chars and len(text) > self.max_desc_chars:
+            return text[: self.max_desc_chars - 1].rstrip() + "…"
+        return text
+
+    def project(self, obj: Any, fields: Sequence[FieldSpec]) -> List[str]:
+        record = to_record(obj)
+        row: List[str] = []
+        for _, sources, formatter, _ in fields:
+            value = None
+            for key in sources:
+                if record.get(key) not in (None, ""):
+                    value = record.get(key)
+                    break
+            row.append(self._formatters[formatter](value))
+        return row
+
+    def table(self, records: Optional[Iterable[Any]], fields: Sequence[FieldSpec]) -> str:
+        rows = [self.project(r, fields) for r in (records or [])]
+        # Drop columns that are empty for every row
+        keep = [i for i in range(len(fields)) if any(row[i] for row in rows)] or list(range(len(fields)))
+        header = [fields[i][0] for i in keep]
+        legend = "; ".join(f"{fields[i][0]}={fields[i][3]}" for i in keep)
+        body = [[row[i] for i in keep] for row in rows]
+        if self.fmt == "md":
+            lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+            lines += ["| " + " | ".join(c.replace("|", "/") for c in r) + " |" for r in body]
+        else:
+            lines = ["\t".join(header)] + ["\t".join(r) for r in body]
+        return f"({legend})\n" + "\n".join(lines)
+
+    def events_table(self, events: Optional[Iterable[Any]]) -> str:
+        return self.table(events, EVENT_FIELDS)
+
+    def markets_table(self, markets: Optional[Iterable[Any]]) -> str:
+        return self.table(markets, MARKET_FIELDS)
+
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """Exact count via tiktoken when installed, otherwise the 4-chars-per-token estimate."""
+    try:
+        import tiktoken
+
+        try:
+            enc = tiktoken.encoding_for_model(model)
+        except Exception:
+            enc = tiktoken.get_encoding("cl100k_base")
+        return len(enc.encode(text))
+    except Exception:
+        return len(text) // 4
+
+
+def token_savings_report(
+    events: List[Any],
+    markets: List[Any],
+    token_limit: int = 15000,
+    model: str = "gpt-3.5-turbo",
+) -> Dict[str, Any]:
+    """Compares legacy str() serialization with compact tables on the same universe."""
+    legacy = f"{[to_record(e) for e in events]}\n{[to_record(m) for m in markets]}"
+    compact = f"{default_serializer.events_table(events)}\n{default_serializer.markets_table(markets)}"
+    legacy_tokens = count_tokens(legacy, model)
+    compact_tokens = count_tokens(compact, model)
+    return {
+        "events": len(events),
+        "markets": len(markets),
+        "legacy_tokens": legacy_tokens,
+        "compact_tokens": compact_tokens,
+        "saved_pct": round(100.0 * (1 - compact_tokens / legacy_tokens), 1) if legacy_tokens else 0.0,
+        "legacy_chunks": legacy_tokens // token_limit + 1,
+        "compact_chunks": compact_tokens // token_limit + 1,
+    }
+
+
+default_serializer = PromptSerializer()
@@ -1,4 +1,5 @@
 import os
+import json
 import logging
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
@@ -40,6 +41,12 @@ class TradingConfig:
         self.llm_temperature = float(os.getenv("LLM_TEMPERATURE", "0.0"))
         self.max_tokens = int(os.getenv("MAX_TOKENS", "15000"))
         
+        # Маршрутизация моделей по стадиям (опционально: дешёвые стадии → малая модель,
+        # остальные остаются на модели исполнителя)
+        self.llm_routing_enabled = os.getenv("LLM_ROUTING", "false").lower() == "true"
+        self.llm_small_model = os.getenv("LLM_SMALL_MODEL", "gpt-4o-mini")
+        self.llm_routes = self._parse_llm_routes(os.getenv("LLM_ROUTES", ""))
+        
         # Логирование
         self.log_level = os.getenv("LOG_LEVEL", "INFO")
         self.log_file = os.getenv("LOG_FILE", "./logs/trading.log")
@@ -61,6 +68,30 @@ class TradingConfig:
         
         logger.info(f"Trading config loaded: mode={self.trading_mode}, balance=${self.dry_run_balance/100:.2f}")
     
+    def _parse_llm_routes(self, raw: str) -> Dict[str, Any]:
+        """
+        Разбирает LLM_ROUTES (JSON): {call_site: model | {model, context_limit, timeout} | [..]}.
+        Список задаёт цепочку эскалации по размеру входа.
+        """
+        if not raw:
+            return {}
+        try:
+            routes = json.loads(raw)
+            if isinstance(routes, dict):
+                return routes
+            logger.warning("LLM_ROUTES must be a JSON object, ignoring")
+        except Exception as e:
+            logger.warning(f"Invalid LLM_ROUTES JSON, ignoring: {e}")
+        return {}
+    
+    def get_llm_routing_config(self) -> Dict[str, Any]:
+        """Возвращает конфигурацию маршрутизации LLM"""
+        return {
+            "enabled": self.llm_routing_enabled,
+            "small_model": self.llm_small_model,
+            "routes": self.llm_routes,
+        }
+    
     def is_dry_run(self) -> bool:
         """Проверяет, включен ли режим dry-run"""
         return self.trading_mode == "dry_run"
@@ -190,7 +221,8 @@ class TradingConfig:
             "ai_model": {
                 "model": self.default_llm_model,
                 "temperature": self.llm_temperature,
-                "max_tokens": self.max_tokens
+                "max_tokens": self.max_tokens,
+                "routing": self.get_llm_routing_config()
             },
             "environment": self.environment,
             "debug_mode": self.debug_mode,
@@ -1021,6 +1021,89 @@ def ask_polymarket_llm(user_input: str) -> None:
     print(f"LLM + current markets&events response: {response}")
 
 
+@app.command()
+def prompt_token_report(events_file: str = "", markets_file: str = "", record_dir: str = "") -> None:
+    """
+    Compare prompt tokens of legacy str() dumps vs compact tables.
+    Uses recorded Gamma JSON files if given, otherwise fetches the live universe
+    (and optionally records it into --record-dir for later replays).
+    """
+    from agents.utils.prompt_serializer import token_savings_report
+
+    if events_file and markets_file:
+        with open(events_file, "r", encoding="utf-8") as f:
+            events = json.load(f)
+        with open(markets_file, "r", encoding="utf-8") as f:
+            markets = json.load(f)
+    else:
+        from agents.polymarket.gamma import GammaMarketClient
+
+        gamma = GammaMarketClient()
+        events = gamma.get_events(querystring_params={"active": True, "closed": False, "limit": 100})
+        markets = gamma.get_all_current_markets(limit=100)
+        if record_dir:
+            os.makedirs(record_dir, exist_ok=True)
+            with open(os.path.join(record_dir, "events.json"), "w", encoding="utf-8") as f:
+                json.dump(events, f)
+            with open(os.path.join(record_dir, "markets.json"), "w", encoding="utf-8") as f:
+                json.dump(markets, f)
+            print(f"💾 Universe recorded to {record_dir}")
+
+    report = token_savings_report(events, markets)
+    print(f"📏 events={report['events']} markets={report['markets']}")
+    print(f"   legacy:  {report['legacy_tokens']} tokens, {report['legacy_chunks']} chunk(s)")
+    print(f"   compact: {report['compact_tokens']} tokens, {report['compact_chunks']} chunk(s)")
+    print(f"   saved:   {report['saved_pct']}%")
+
+
+@app.command()
+def benchmark_vector_stores(n: int = 5000, dim: int = 1536, queries: int = 100, k: int = 10, backends: str = "numpy,numpy-int8,numpy-int8-rerank,chroma") -> None:
+    """
+    Compare vector store backends on a synthetic corpus:
+    build time, query latency (single/batched), memory and recall@k vs exact search.
+    numpy-int8 is the quantized store; "-rerank" adds the float memmap re-ranking pass.
+    """
+    from agents.connectors.vectorstores import benchmark_backends
+
+    names = [b.strip() for b in backends.split(",") if b.strip()]
+    report = benchmark_backends(n=n, dim=dim, n_queries=queries, k=k, backends=names)
+    print(f"📐 n={n} dim={dim} queries={queries} k={k}")
+    for name, r in report.items():
+        if "error" in r:
+            print(f"   {name}: ❌ {r['error']}")
+            continue
+        print(
+            f"   {name}: build {r['build_s']}s | query {r['query_ms']}ms | batched {r['batched_query_ms']}ms/q"
+            f" | recall@{k} {r['recall_at_k']} | rss +{r['rss_delta_mb']}MB"
+            + (f" | vectors {r['vector_mb']}MB (-{r['saved_pct']}% vs float32)" if r.get("vector_mb") else "")
+        )
+
+
+@app.command()
+def compare_llm_routes(recorded_file: str, models: str = "gpt-4o-mini,gpt-4o", call_sites: str = "", limit: int = 20, timeout: float = 60.0) -> None:
+    """
+    Replay prompts recorded with LLM_RECORD_PROMPTS through candidate models
+    and report latency and agreement with the recorded answers.
+    """
+    import asyncio
+    from openai import AsyncOpenAI
+    from agents.application.model_router import compare_routes, load_recorded_prompts
+
+    sites = [c.strip() for c in call_sites.split(",") if c.strip()]
+    records = load_recorded_prompts(recorded_file, call_sites=sites, limit=limit)
+    if not records:
+        print("❌ Нет записанных промптов")
+        return
+    candidates = [m.strip() for m in models.split(",") if m.strip()]
+    report = asyncio.run(compare_routes(AsyncOpenAI(), records, candidates, timeout=timeout))
+    print(f"🧪 {len(records)} prompts replayed")
+    for model, r in report.items():
+        p50 = f"{r['p50_latency']:.2f}s" if r["p50_latency"] is not None else "n/a"
+        p95 = f"{r['p95_latency']:.2f}s" if r["p95_latency"] is not None else "n/a"
+        agreement = f"{r['agreement']*100:.0f}%" if r["agreement"] is not None else "n/a"
+        print(f"   {model}: p50={p50} p95={p95} agreement={agreement} errors={r['errors']}")
+
+
 @app.command()
 def run_autonomous_trader() -> None:
     """
@@ -1198,6 +1281,14 @@ def scan_fresh_markets(
         except Exception as e:
             print(f"⚠️ NewsRAG недоступен: {e}")
             newsrag = None
+    # Один батч эмбеддингов и один поиск на все вопросы
+    news_by_market: list = [None] * len(top)
+    news_error = None
+    if newsrag is not None:
+        try:
+            news_by_market = newsrag.query_many([r.get("question", "") for r in top], top_k=news_topk)
+        except Exception as e:
+            news_error = e
 
     for i, r in enumerate(top, 1):
         print(f"{i}. {r['question'][:80]}" )
@@ -1209,8 +1300,9 @@ def scan_fresh_markets(
         # Attach top news from RAG
         if newsrag is not None:
             try:
-                q = r.get("question", "")
-                news_hits = newsrag.query_news(q, top_k=news_topk)
+                if news_error is not None:
+                    raise news_error
+                news_hits = news_by_market[i - 1]
                 if news_hits:
                     print("   📰 Топ новости:")
                     for j, (meta, _) in enumerate(news_hits, 1):
@@ -1239,19 +1331,25 @@ def create_news_rag(persist_dir: str = "./local_news_db", days: int = 14, max_it
         rag = NewsRAG(persist_directory=persist_dir)
         n = rag.ingest_news(days=days, max_items=max_items, keywords_csv=keywords)
         print(f"✅ Проиндексировано чанков новостей: {n} (директория: {persist_dir})")
+        report = rag.last_ingest_report
+        if report:
+            print(f"   новых: {report['new']} | обновлено: {report['updated']} | без изменений: {report['skipped']}")
+            for stage, st in (report.get("stages") or {}).items():
+                print(f"   {stage}: {st['items']} шт., {st['busy_secs']:.2f}s ({st['per_sec']:.1f}/s)")
     except Exception as e:
         print(f"❌ Ошибка индексации новостей: {e}")
 
 
 @app.command()
-def query_news_rag(persist_dir: str, query: str, top_k: int = 5) -> None:
+def query_news_rag(persist_dir: str, query: str, top_k: int = 5, max_age_days: float = 0.0) -> None:
     """
     Семантический поиск по новостям в локальной базе RAG.
+    max_age_days > 0 — искать только в новостях не старше N дней (только свежие партиции).
     """
     try:
         from agents.connectors.news_rag import NewsRAG
         rag = NewsRAG(persist_directory=persist_dir)
-        results = rag.query_news(query=query, top_k=top_k)
+        results = rag.query_news(query=query, top_k=top_k, max_age_days=max_age_days or None)
         if not results:
             print("❌ Ничего не найдено")
             return
@@ -4,6 +4,8 @@ from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from fastapi.responses import Response
 
 from agents.utils.portfolio import PortfolioManager
+# Registers Gamma/trading/LLM series on the default registry served by /metrics
+import agents.utils.metrics  # noqa: F401
 
 app = FastAPI()
 
@@ -0,0 +1,75 @@
+import asyncio
+import threading
+import unittest
+
+from agents.connectors import telegram
+from agents.utils.async_runtime import get_runtime, iterate_sync, run_sync
+
+
+class TestAsyncRuntime(unittest.TestCase):
+    def test_one_loop_for_every_call(self):
+        async def where():
+            return asyncio.get_running_loop(), threading.current_thread()
+
+        (loop_a, thread_a), (loop_b, thread_b) = run_sync(where()), run_sync(where())
+        self.assertIs(loop_a, loop_b)
+        self.assertIs(loop_a, get_runtime().loop)
+        self.assertIsNot(thread_a, threading.current_thread())
+        self.assertIs(thread_a, thread_b)
+
+    def test_errors_propagate_and_nested_blocking_is_refused(self):
+        async def boom():
+            raise ValueError("bad")
+
+        with self.assertRaises(ValueError):
+            run_sync(boom())
+
+        async def nested():
+            coro = asyncio.sleep(0)
+            try:
+                run_sync(coro)
+            finally:
+                coro.close()
+
+        with self.assertRaises(RuntimeError):
+            run_sync(nested())
+
+    def test_iterate_and_cancel_on_early_close(self):
+        cleaned = []
+
+        async def numbers():
+            try:
+                for i in range(100):
+                    await asyncio.sleep(0.001)
+                    yield i
+            finally:
+                cleaned.append(True)
+
+        self.assertEqual(list(iterate_sync(numbers())), list(range(100)))
+        it = iterate_sync(numbers())
+        self.assertEqual([next(it), next(it)], [0, 1])
+        it.close()
+        self.assertEqual(cleaned, [True, True])
+
+        async def failing():
+            yield 1
+            raise KeyError("x")
+
+        with self.assertRaises(KeyError):
+            list(iterate_sync(failing()))
+
+    def test_telegram_alerts_share_one_session_and_hook(self):
+        runtime = get_runtime()
+
+        async def session_of(alerts):
+            async with alerts._http() as session:
+                return session
+
+        sessions = [run_sync(session_of(telegram.TelegramAlerts())) for _ in range(3)]
+        self.assertIs(sessions[0], sessions[1])
+        self.assertIs(sessions[0], sessions[2])
+        self.assertEqual(runtime._hooks.count(telegram._close_runtime_session), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
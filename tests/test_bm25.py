@@ -0,0 +1,63 @@
+import unittest
+
+from agents.connectors.bm25 import BM25Index, hybrid_search, hybrid_search_many, reciprocal_rank_fusion, tokenize
+from agents.connectors.embeddings import LocalHashingEmbeddings
+from agents.connectors.vectorstores import NumpyVectorStore
+
+
+class TestBM25Index(unittest.TestCase):
+    def setUp(self):
+        self.index = BM25Index()
+        self.index.add_many([
+            ("btc", "Will BTC close above $100,000 by March 31?"),
+            ("eth", "Will ETH close above $5,000 by March 31?"),
+            ("fed", "Will the Fed cut rates in March?"),
+        ])
+
+    def test_tokenize_numbers(self):
+        self.assertEqual(tokenize("BTC above $100,000?"), ["btc", "above", "100000"])
+
+    def test_entities_and_numbers_rank_first(self):
+        self.assertEqual(self.index.search("btc 100000", k=2)[0][0], "btc")
+        self.assertEqual({i for i, _ in self.index.search("march", k=5, allowed={"fed", "eth"})}, {"fed", "eth"})
+        self.assertGreater(self.index.coverage("BTC above 100000", "btc"), 0.99)
+        self.assertLess(self.index.coverage("BTC above 100000", "fed"), 0.01)
+
+    def test_update_remove_and_compaction(self):
+        self.index.add("btc", "Bitcoin halving date")
+        self.assertEqual(self.index.search("halving")[0][0], "btc")
+        self.assertEqual(self.index.search("100000"), [])
+        for i in range(200):
+            self.index.add(f"tmp{i}", "temporary market")
+        for i in range(200):
+            self.index.remove(f"tmp{i}")
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.search("temporary"), [])
+        self.assertEqual(self.index.search("fed rates")[0][0], "fed")
+
+    def test_rrf(self):
+        fused = reciprocal_rank_fusion([["a", "b"], ["b", "c"]])
+        self.assertEqual(fused[0][0], "b")
+        self.assertEqual({i for i, _ in fused}, {"a", "b", "c"})
+
+    def test_hybrid_search_many_matches_single_queries(self):
+        texts = {
+            "btc": "Will BTC close above $100,000 by March 31?",
+            "eth": "Will ETH close above $5,000 by March 31?",
+            "fed": "Will the Fed cut rates in March?",
+        }
+        embeddings = LocalHashingEmbeddings(dim=256)
+        store = NumpyVectorStore("markets")
+        store.upsert(list(texts), embeddings.embed_documents(list(texts.values())), documents=list(texts.values()))
+        queries = ["BTC 100k", "rate cut", "ether price"]
+        vectors = embeddings.embed_documents(queries)
+        batched = hybrid_search_many(store, self.index, queries, vectors, k=2, allowed={"btc", "fed"})
+        for query, vector, hits in zip(queries, vectors, batched):
+            single = hybrid_search(store, self.index, query, vector, k=2, allowed={"btc", "fed"})
+            self.assertEqual([(d.id, round(s, 6)) for d, s in hits], [(d.id, round(s, 6)) for d, s in single])
+        self.assertEqual(batched[0][0][0].id, "btc")
+        self.assertEqual(batched[1][0][0].id, "fed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from agents.connectors.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0, 0.5] for t in texts]
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_put_get_and_reopen(self):
+        cache = EmbeddingCache(self.tmp.name, "m", dtype="float32")
+        self.assertEqual(cache.put_many(["a", "b", "a"], [[1, 2], [3, 4], [1, 2]]), 2)
+        self.assertEqual(cache.put_many(["a"], [[9, 9]]), 0)
+        hit, miss = cache.get_many(["b", "c"])
+        np.testing.assert_array_equal(hit, [3, 4])
+        self.assertIsNone(miss)
+        # Another instance (or process) maps the same files
+        other = EmbeddingCache(self.tmp.name, "m")
+        np.testing.assert_array_equal(other.get("a"), [1, 2])
+        self.assertEqual(other.dtype, np.float32)
+        self.assertIsNone(EmbeddingCache(self.tmp.name, "other-model").get("a"))
+
+    def test_wrapper_embeds_only_misses(self):
+        inner = CountingEmbeddings()
+        emb = CachedEmbeddings(inner, EmbeddingCache(self.tmp.name, "m"))
+        first = emb.embed_documents(["xx", "y", "xx"])
+        second = emb.embed_documents(["y", "zzz", "xx"])
+        self.assertEqual(inner.calls, [["xx", "y"], ["zzz"]])
+        self.assertEqual(first[0], second[2])
+        self.assertEqual(second[1][0], 3.0)
+        self.assertAlmostEqual(emb.cache.stats()["hit_rate"], 2 / 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import threading
+import unittest
+from types import SimpleNamespace
+
+from agents.connectors.embeddings import MAX_INPUT_TOKENS, BatchedOpenAIEmbeddings
+
+
+class FlakyClient:
+    """Embeds text as [len(text)]; fails the first call that contains "boom"."""
+
+    def __init__(self):
+        self.calls = []
+        self.failed = False
+        self._lock = threading.Lock()
+        self.embeddings = SimpleNamespace(create=self.create)
+
+    def create(self, model, input):
+        with self._lock:
+            self.calls.append(list(input))
+            if "boom" in input and not self.failed:
+                self.failed = True
+                raise RuntimeError("transient")
+        data = [SimpleNamespace(index=i, embedding=[float(len(t))]) for i, t in enumerate(input)]
+        return SimpleNamespace(data=list(reversed(data)), usage=None)
+
+
+class TestBatchedOpenAIEmbeddings(unittest.TestCase):
+    def test_splits_preserves_order_and_retries_failed_batch_only(self):
+        client = FlakyClient()
+        emb = BatchedOpenAIEmbeddings(
+            client=client, max_batch_items=2, max_concurrency=3, max_retries=1, retry_backoff=0
+        )
+        texts = ["a", "bb", "boom", "dddd", "eeeee"]
+        self.assertEqual(emb.embed_documents(texts), [[1.0], [2.0], [4.0], [4.0], [5.0]])
+        # 3 batches + one retry of the failed batch
+        self.assertEqual(len(client.calls), 4)
+        self.assertEqual(client.calls.count(["boom", "dddd"]), 2)
+
+    def test_token_budget_and_truncation(self):
+        emb = BatchedOpenAIEmbeddings(client=FlakyClient(), max_batch_items=100, max_batch_tokens=MAX_INPUT_TOKENS)
+        long_text = "word " * (MAX_INPUT_TOKENS * 2)
+        batches = emb._batches([long_text, "short", "text"])
+        self.assertEqual([len(b) for b in batches], [1, 2])
+        self.assertLessEqual(emb._fit(long_text)[1], MAX_INPUT_TOKENS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+import asyncio
+import os
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import httpx
+from openai import RateLimitError
+from prometheus_client import REGISTRY
+
+from agents.application.executor import Executor
+from agents.application.model_router import ModelRouter
+from agents.utils.llm_scheduler import LLMScheduler
+
+
+def _response(content):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(prompt_tokens=10, completion_tokens=2, total_tokens=12),
+    )
+
+
+def _rate_limited():
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after-ms": "10"}, request=request)
+    return RateLimitError("rate limited", response=response, body=None)
+
+
+class StubCompletions:
+    """chat.completions stand-in: records peak concurrency, fails the first `rate_limits` calls with 429."""
+
+    def __init__(self, delay=0.02, rate_limits=0):
+        self.delay = delay
+        self.rate_limits = rate_limits
+        self.calls = 0
+        self.in_flight = 0
+        self.peak = 0
+        self.prompts = []
+
+    async def create(self, model, messages, **kwargs):
+        self.calls += 1
+        self.prompts.append(messages[0]["content"])
+        if self.rate_limits:
+            self.rate_limits -= 1
+            raise _rate_limited()
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        return _response(f"{model}: {messages[0]['content']}")
+
+
+def _make_executor(completions, max_concurrency=2):
+    env = {"OPENAI_API_KEY": "test", "LLM_MAX_CONCURRENCY": str(max_concurrency), "LLM_MAX_RETRIES": "2"}
+    with mock.patch.dict(os.environ, env), \
+            mock.patch("agents.application.executor.Gamma"), \
+            mock.patch("agents.application.executor.Polymarket"):
+        executor = Executor(default_model="gpt-3.5-turbo-16k")
+    inner = executor.async_executor
+    inner.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    inner.scheduler = LLMScheduler(requests_per_minute=1e6, tokens_per_minute=1e9)
+    return executor
+
+
+class TestAsyncExecutor(unittest.TestCase):
+    def test_concurrency_is_bounded(self):
+        completions = StubCompletions()
+        inner = _make_executor(completions, max_concurrency=2).async_executor
+
+        async def scenario():
+            return await asyncio.gather(*(inner._chat(f"p{i}") for i in range(6)))
+
+        results = asyncio.run(scenario())
+        self.assertEqual(len(results), 6)
+        self.assertEqual(completions.peak, 2)
+
+    def test_rate_limit_is_retried(self):
+        completions = StubCompletions(rate_limits=1)
+        inner = _make_executor(completions).async_executor
+        result = asyncio.run(inner._chat("hello", call_site="superforecaster"))
+        self.assertTrue(result.endswith("hello"))
+        self.assertEqual(completions.calls, 2)
+
+    def test_retried_request_is_charged_once(self):
+        completions = StubCompletions(rate_limits=2)
+        inner = _make_executor(completions).async_executor
+        inner.scheduler = LLMScheduler(requests_per_minute=1e6, tokens_per_minute=60000)
+        asyncio.run(inner._chat("hello"))
+        # 513 tokens estimated per attempt; only the 12 tokens actually used stay charged
+        self.assertGreater(inner.scheduler.tokens._level, 60000 - 100)
+
+    def test_calls_are_instrumented(self):
+        inner = _make_executor(StubCompletions()).async_executor
+        labels = {"call_site": "market_analyst", "model": inner.router.route("market_analyst").model}
+
+        def sample(name, **extra):
+            return REGISTRY.get_sample_value(name, {**labels, **extra}) or 0.0
+
+        before = (sample("llm_requests_total", status="ok"), sample("llm_prompt_tokens_total"))
+        asyncio.run(inner._chat("hello", call_site="market_analyst"))
+        self.assertEqual(sample("llm_requests_total", status="ok") - before[0], 1)
+        self.assertEqual(sample("llm_prompt_tokens_total") - before[1], 10)
+
+    def test_rate_limit_gives_up_after_max_retries(self):
+        completions = StubCompletions(rate_limits=5)
+        inner = _make_executor(completions).async_executor
+        with self.assertRaises(RateLimitError):
+            asyncio.run(inner._chat("hello"))
+        self.assertEqual(completions.calls, 3)
+
+    def test_chunked_prompt_keeps_event_titles_and_markets(self):
+        completions = StubCompletions()
+        inner = _make_executor(completions).async_executor
+        # Shaped like raw Gamma responses: events nest full market dicts
+        markets = [
+            {
+                "id": 100 + i,
+                "question": f"Question {i}?",
+                "outcomes": '["Yes", "No"]',
+                "image": f"https://polymarket-upload.s3.amazonaws.com/{i}.png",
+                "marketMakerAddress": "0x0000000000000000000000000000000000000000",
+            }
+            for i in range(8)
+        ]
+        events = [
+            {"id": i, "title": f"Event {i}", "description": "x" * 200, "markets": [markets[i]]}
+            for i in range(8)
+        ]
+        inner.gamma.get_current_events.return_value = events
+        inner.gamma.get_current_markets.return_value = markets
+        inner.router = ModelRouter("gpt-3.5-turbo-16k", routes={"polymarket_llm": {"model": "m", "context_limit": 300}})
+        asyncio.run(inner.get_polymarket_llm("what to trade?"))
+        self.assertGreater(len(completions.prompts), 1)
+        for prompt in completions.prompts:
+            lines = prompt.split("tab-separated):\n", 1)[1].split("\n")
+            header = lines[1].split("\t")
+            self.assertIn("t", header)
+            self.assertIn("mk", header)
+            row = dict(zip(header, lines[2].split("\t")))
+            self.assertEqual(row["mk"], str(100 + int(row["id"])))
+            self.assertNotIn("0x000", prompt)
+            self.assertNotIn("s3.amazonaws", prompt)
+        self.assertIn("Event 7", completions.prompts[-1])
+
+
+class TestExecutor(unittest.TestCase):
+    def test_sync_calls_share_the_runtime_loop(self):
+        completions = StubCompletions()
+        executor = _make_executor(completions, max_concurrency=1)
+        self.assertTrue(executor.get_llm_response("first").endswith("first"))
+        # A second executor shares the runtime loop; each keeps its own bound
+        other = _make_executor(completions, max_concurrency=1)
+        self.assertTrue(other._chat("second").endswith("second"))
+        self.assertEqual(completions.calls, 2)
+
+    def test_semaphore_is_created_per_loop(self):
+        inner = _make_executor(StubCompletions(), max_concurrency=1).async_executor
+
+        async def scenario():
+            await asyncio.gather(inner._chat("a"), inner._chat("b"))
+            return inner._get_semaphore()
+
+        # Each asyncio.run is a new loop; a semaphore bound to the first must not be reused
+        first = asyncio.run(scenario())
+        second = asyncio.run(scenario())
+        self.assertIsNot(first, second)
+
+
+if __name__ == "__main__":
+    unittest.main()
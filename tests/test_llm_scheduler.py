@@ -0,0 +1,84 @@
+import asyncio
+import time
+import unittest
+
+from agents.utils.llm_scheduler import (
+    PRIORITY_CREATE,
+    PRIORITY_POSITIONS,
+    LLMScheduler,
+    TokenBucket,
+    retry_after_seconds,
+)
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_refill_and_wait(self):
+        now = [0.0]
+        bucket = TokenBucket(60, capacity=2, clock=lambda: now[0])
+        bucket.consume(2)
+        self.assertAlmostEqual(bucket.time_until(1), 1.0)
+        now[0] = 1.0
+        self.assertEqual(bucket.time_until(1), 0.0)
+
+    def test_oversized_request_is_clamped(self):
+        bucket = TokenBucket(60, capacity=10)
+        self.assertEqual(bucket.time_until(1000), 0.0)
+
+
+class TestLLMScheduler(unittest.TestCase):
+    def test_high_priority_served_first(self):
+        async def scenario():
+            # 1 request per 50ms, no burst: everything after the first one queues
+            scheduler = LLMScheduler(requests_per_minute=1200, tokens_per_minute=1e9)
+            scheduler.requests.capacity = 1
+            scheduler.requests._level = 1
+            order = []
+
+            async def call(name, priority):
+                await scheduler.acquire(priority, 10)
+                order.append(name)
+
+            first = asyncio.create_task(call("first", PRIORITY_CREATE))
+            await asyncio.sleep(0)
+            low = asyncio.create_task(call("create", PRIORITY_CREATE))
+            await asyncio.sleep(0)
+            high = asyncio.create_task(call("positions", PRIORITY_POSITIONS))
+            await asyncio.gather(first, low, high)
+            return order
+
+        self.assertEqual(asyncio.run(scenario()), ["first", "positions", "create"])
+
+    def test_rate_limit_pauses_and_slows_down(self):
+        async def scenario():
+            scheduler = LLMScheduler(requests_per_minute=6000, tokens_per_minute=1e9)
+            scheduler.on_rate_limited(0.2)
+            self.assertEqual(scheduler.requests.scale, 0.5)
+            started = time.monotonic()
+            await scheduler.acquire(PRIORITY_POSITIONS, 1)
+            return time.monotonic() - started
+
+        self.assertGreaterEqual(asyncio.run(scenario()), 0.15)
+
+    def test_one_scheduler_serves_several_loops(self):
+        # 1 request per 10ms, no burst: every run has to queue behind the bucket
+        scheduler = LLMScheduler(requests_per_minute=6000, tokens_per_minute=1e9)
+        scheduler.requests.capacity = 1
+
+        async def scenario():
+            await asyncio.wait_for(
+                asyncio.gather(*(scheduler.acquire(PRIORITY_CREATE, 10) for _ in range(3))), timeout=2.0
+            )
+
+        asyncio.run(scenario())
+        asyncio.run(scenario())
+        self.assertEqual(scheduler.queue_depth, 0)
+        self.assertEqual(len(scheduler._loops), 1)
+
+    def test_retry_after_headers(self):
+        self.assertEqual(retry_after_seconds({"retry-after-ms": "250"}), 0.25)
+        self.assertEqual(retry_after_seconds({"retry-after": "3"}), 3.0)
+        self.assertEqual(retry_after_seconds(None, default=1.5), 1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
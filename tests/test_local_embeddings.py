@@ -0,0 +1,40 @@
+import os
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from agents.connectors.embeddings import LocalHashingEmbeddings
+from agents.connectors.vectorstores import NumpyVectorStore
+
+
+class TestLocalHashingEmbeddings(unittest.TestCase):
+    def test_deterministic_normalized_and_meaningful(self):
+        emb = LocalHashingEmbeddings(dim=512)
+        q, near, far = emb.embed_documents([
+            "Will Bitcoin close above $100k in March?",
+            "Bitcoin price above 100k by end of March",
+            "Who will win the Senate election in Ohio?",
+        ])
+        self.assertEqual(q, LocalHashingEmbeddings(dim=512).embed_query("Will Bitcoin close above $100k in March?"))
+        self.assertAlmostEqual(float(np.linalg.norm(q)), 1.0, places=5)
+        self.assertGreater(np.dot(q, near), np.dot(q, far) + 0.2)
+
+    def test_empty_text(self):
+        self.assertEqual(LocalHashingEmbeddings(dim=64).embed_query(""), [0.0] * 64)
+
+    def test_default_dimension_matches_older_collections(self):
+        with mock.patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("LOCAL_EMBEDDING_DIM", None)
+            emb = LocalHashingEmbeddings()
+        self.assertEqual(len(emb.embed_query("x")), 1536)
+        store = NumpyVectorStore("old")
+        store.upsert(["a"], [[1.0] * 1024])
+        with self.assertRaisesRegex(ValueError, "rebuild the collection"):
+            store.query(emb.embed_query("x"))
+        with self.assertRaisesRegex(ValueError, "rebuild the collection"):
+            store.upsert(["b"], [emb.embed_query("x")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import asyncio
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from agents.connectors.mcp_cache import MCPToolCache
+
+
+class TestMCPToolCache(unittest.TestCase):
+    def setUp(self):
+        self.calls = 0
+        self.fail = False
+
+    async def fetch(self):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("server down")
+        return {"n": self.calls}
+
+    def call(self, cache, tool="search-news", args=None):
+        return asyncio.run(cache.call("verge-news", tool, args or {"keyword": "ai"}, self.fetch))
+
+    def test_ttl_per_tool_and_argument_order(self):
+        cache = MCPToolCache(ttls={"search-news": 60, "live": 0}, default_ttl=5, stale_secs=0)
+        self.assertEqual(self.call(cache, args={"keyword": "ai", "days": 3}), {"n": 1})
+        self.assertEqual(self.call(cache, args={"days": 3, "keyword": "ai"}), {"n": 1})
+        self.assertEqual(self.call(cache, args={"keyword": "ml", "days": 3}), {"n": 2})
+        self.assertEqual(self.call(cache, tool="live"), {"n": 3})
+        self.assertEqual(self.call(cache, tool="live"), {"n": 4})
+        # Callers get copies
+        self.call(cache, args={"keyword": "ai", "days": 3})["n"] = 99
+        self.assertEqual(self.call(cache, args={"keyword": "ai", "days": 3}), {"n": 1})
+
+    def test_expired_entries_are_served_stale_on_error(self):
+        cache = MCPToolCache(ttls={}, default_ttl=10, stale_secs=100)
+        with mock.patch("agents.connectors.mcp_cache.time.monotonic", return_value=1000.0):
+            self.call(cache)
+        self.fail = True
+        with mock.patch("agents.connectors.mcp_cache.time.monotonic", return_value=1050.0):
+            self.assertEqual(self.call(cache), {"n": 1})
+        with mock.patch("agents.connectors.mcp_cache.time.monotonic", return_value=1200.0):
+            with self.assertRaises(ConnectionError):
+                self.call(cache)
+        self.assertEqual(self.calls, 3)
+
+    def test_error_results_are_not_cached(self):
+        cache = MCPToolCache(ttls={}, default_ttl=60, stale_secs=0)
+
+        async def tool_error():
+            self.calls += 1
+            return SimpleNamespace(isError=True, content=[])
+
+        asyncio.run(cache.call("verge-news", "search-news", {}, tool_error))
+        asyncio.run(cache.call("verge-news", "search-news", {}, tool_error))
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+import asyncio
+import unittest
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from agents.connectors.mcp_pool import MCPSessionPool, MCPUnavailableError
+
+
+class _StandInServer:
+    """In-process MCP stand-in: counts handshakes, serves echo calls, can drop sessions."""
+
+    def __init__(self):
+        self.handshakes = 0
+        self.open_sessions = 0
+        self.max_in_flight = 0
+        self.in_flight = 0
+        self.drop_next = False
+        self.ping_fails = False
+
+    @asynccontextmanager
+    async def connect(self):
+        self.handshakes += 1
+        self.open_sessions += 1
+        try:
+            yield _StandInSession(self, self.handshakes)
+        finally:
+            self.open_sessions -= 1
+
+
+class _StandInSession:
+    def __init__(self, server, number):
+        self.server = server
+        self.number = number
+        self.dropped = False
+
+    async def call_tool(self, name, args):
+        server = self.server
+        if self.dropped or server.drop_next:
+            server.drop_next = False
+            self.dropped = True
+            raise ConnectionError("connection reset")
+        if name == "fail":
+            raise ValueError("tool error")
+        server.in_flight += 1
+        server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            return SimpleNamespace(session=self.number, echo=args)
+        finally:
+            server.in_flight -= 1
+
+    async def list_tools(self):
+        return SimpleNamespace(tools=[SimpleNamespace(name="echo")])
+
+    async def send_ping(self):
+        if self.server.ping_fails:
+            raise ConnectionError("no pong")
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class TestMCPSessionPool(unittest.TestCase):
+    def test_concurrent_calls_share_sessions(self):
+        server = _StandInServer()
+
+        async def scenario():
+            pool = MCPSessionPool(server.connect, size=2, retry_backoff=0)
+            results = await asyncio.gather(*(pool.call_tool("echo", {"i": i}) for i in range(20)))
+            again = await pool.call_tool("echo", {"i": 20})
+            tools = await pool.list_tools()
+            await pool.close()
+            return results, again, tools
+
+        results, again, tools = _run(scenario())
+        self.assertEqual([r.echo["i"] for r in results], list(range(20)))
+        self.assertEqual(server.handshakes, 2)
+        self.assertGreater(server.max_in_flight, 2)
+        self.assertIn(again.session, (1, 2))
+        self.assertEqual(tools.tools[0].name, "echo")
+        self.assertEqual(server.open_sessions, 0)
+
+    def test_reconnects_after_drop_and_failed_health_check(self):
+        server = _StandInServer()
+
+        async def scenario():
+            pool = MCPSessionPool(server.connect, size=1, health_interval=0.0, retry_backoff=0)
+            first = await pool.call_tool("echo", {})
+            server.drop_next = True
+            second = await pool.call_tool("echo", {})
+            with self.assertRaises(ValueError):
+                await pool.call_tool("fail", {})
+            server.ping_fails = True
+            third = await pool.call_tool("echo", {})
+            await pool.close()
+            return first, second, third
+
+        first, second, third = _run(scenario())
+        self.assertEqual((first.session, second.session, third.session), (1, 2, 3))
+        self.assertEqual(server.open_sessions, 0)
+
+    def test_idle_sessions_are_closed(self):
+        server = _StandInServer()
+
+        async def scenario():
+            pool = MCPSessionPool(server.connect, size=1, idle_timeout=0.05, health_interval=0.05)
+            await pool.call_tool("echo", {})
+            self.assertEqual(len(pool), 1)
+            await asyncio.sleep(0.2)
+            self.assertEqual(len(pool), 0)
+            self.assertEqual(server.open_sessions, 0)
+            await pool.call_tool("echo", {})
+            await pool.close()
+
+        _run(scenario())
+        self.assertEqual(server.handshakes, 2)
+
+    def test_slow_connect_does_not_block_a_live_session(self):
+        server = _StandInServer()
+
+        async def scenario():
+            gate = asyncio.Event()
+
+            @asynccontextmanager
+            async def connect():
+                if server.handshakes:
+                    await gate.wait()
+                async with server.connect() as session:
+                    yield session
+
+            pool = MCPSessionPool(connect, size=2, retry_backoff=0)
+            await pool.call_tool("echo", {})
+            async with pool.session():
+                # The first session is busy, so this call starts a second connect that hangs
+                opening = asyncio.ensure_future(pool.call_tool("echo", {"i": "new"}))
+                await asyncio.sleep(0.01)
+                served = await asyncio.wait_for(pool.call_tool("echo", {"i": "live"}), timeout=1.0)
+            self.assertFalse(opening.done())
+            gate.set()
+            fresh = await opening
+            await pool.close()
+            return served, fresh
+
+        served, fresh = _run(scenario())
+        self.assertEqual(served.session, 1)
+        self.assertEqual(fresh.session, 2)
+        self.assertEqual(server.open_sessions, 0)
+
+    def test_connect_failure_raises_after_retries(self):
+        attempts = []
+
+        @asynccontextmanager
+        async def refuse():
+            attempts.append(1)
+            raise OSError("connection refused")
+            yield
+
+        async def scenario():
+            pool = MCPSessionPool(refuse, retry_attempts=3, retry_backoff=0)
+            with self.assertRaises(MCPUnavailableError):
+                await pool.call_tool("echo", {})
+
+        _run(scenario())
+        self.assertEqual(len(attempts), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
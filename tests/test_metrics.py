@@ -0,0 +1,51 @@
+import unittest
+
+from prometheus_client import REGISTRY
+
+from agents.utils.metrics import estimate_llm_cost, observe_llm_call
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+class TestObserveLLMCall(unittest.TestCase):
+    def test_counts_tokens_cost_and_latency(self):
+        labels = {"call_site": "metrics_test", "model": "gpt-4o-mini"}
+        before = {
+            "requests": sample("llm_requests_total", status="ok", **labels),
+            "prompt": sample("llm_prompt_tokens_total", **labels),
+            "completion": sample("llm_completion_tokens_total", **labels),
+            "cost": sample("llm_cost_usd_total", **labels),
+            "latency_count": sample("llm_request_latency_seconds_count", **labels),
+            "latency_sum": sample("llm_request_latency_seconds_sum", **labels),
+            "fast_bucket": sample("llm_request_latency_seconds_bucket", le="0.5", **labels),
+        }
+        observe_llm_call("metrics_test", "gpt-4o-mini", 0.3, prompt_tokens=1000, completion_tokens=500)
+
+        self.assertEqual(sample("llm_requests_total", status="ok", **labels) - before["requests"], 1)
+        self.assertEqual(sample("llm_prompt_tokens_total", **labels) - before["prompt"], 1000)
+        self.assertEqual(sample("llm_completion_tokens_total", **labels) - before["completion"], 500)
+        self.assertAlmostEqual(
+            sample("llm_cost_usd_total", **labels) - before["cost"],
+            estimate_llm_cost("gpt-4o-mini", 1000, 500),
+        )
+        self.assertEqual(sample("llm_request_latency_seconds_count", **labels) - before["latency_count"], 1)
+        self.assertAlmostEqual(sample("llm_request_latency_seconds_sum", **labels) - before["latency_sum"], 0.3)
+        self.assertEqual(sample("llm_request_latency_seconds_bucket", le="0.5", **labels) - before["fast_bucket"], 1)
+
+    def test_errors_are_counted_by_status(self):
+        labels = {"call_site": "metrics_test_error", "model": "unknown-model"}
+        observe_llm_call("metrics_test_error", "unknown-model", 1.0, status="APITimeoutError")
+        self.assertEqual(sample("llm_requests_total", status="APITimeoutError", **labels), 1)
+        # No usage block and an unpriced model: no token or cost samples
+        self.assertEqual(sample("llm_prompt_tokens_total", **labels), 0)
+        self.assertEqual(sample("llm_cost_usd_total", **labels), 0)
+
+    def test_estimate_llm_cost(self):
+        self.assertAlmostEqual(estimate_llm_cost("gpt-4o", 2000, 1000), 0.015)
+        self.assertEqual(estimate_llm_cost("unknown-model", 2000, 1000), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
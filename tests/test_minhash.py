@@ -0,0 +1,30 @@
+import unittest
+
+from agents.connectors.minhash import MinHashLSH, estimate_jaccard, minhash_signature
+
+
+class TestMinHash(unittest.TestCase):
+    def setUp(self):
+        self.text = " ".join(f"token{i % 97} filler{i}" for i in range(300))
+
+    def test_signature_is_stable_and_estimates_jaccard(self):
+        self.assertTrue((minhash_signature(self.text) == minhash_signature(self.text)).all())
+        edited = self.text.replace("filler150", "changed") + " updated at noon"
+        self.assertGreater(estimate_jaccard(minhash_signature(self.text), minhash_signature(edited)), 0.85)
+        other = " ".join(f"other{i}" for i in range(300))
+        self.assertLess(estimate_jaccard(minhash_signature(self.text), minhash_signature(other)), 0.1)
+        self.assertIsNone(minhash_signature("  ...  "))
+
+    def test_lsh_insert_query_remove(self):
+        lsh = MinHashLSH(threshold=0.8)
+        lsh.insert("a", minhash_signature(self.text))
+        lsh.insert("b", minhash_signature("completely unrelated text about elections and polls"))
+        hits = lsh.query(minhash_signature(self.text + " extra"))
+        self.assertEqual([k for k, _ in hits], ["a"])
+        lsh.remove("a")
+        self.assertEqual(lsh.query(minhash_signature(self.text)), [])
+        self.assertEqual(len(lsh), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
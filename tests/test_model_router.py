@@ -0,0 +1,100 @@
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from agents.application.model_router import (
+    ModelRouter,
+    answers_agree,
+    compare_routes,
+    load_recorded_prompts,
+)
+from agents.utils.trading_config import trading_config
+
+
+class TestModelRouter(unittest.TestCase):
+    def test_default_model_is_kept_when_routing_is_off(self):
+        router = ModelRouter("gpt-4o", small_model="gpt-4o-mini")
+        for site in ("filter_events", "polymarket_llm", "superforecaster", "unknown"):
+            self.assertEqual(router.route(site).model, "gpt-4o")
+
+    def test_small_stages_escalate_to_the_default_model(self):
+        router = ModelRouter("gpt-4-turbo", small_model="gpt-3.5-turbo", enabled=True)
+        self.assertEqual(router.route("filter_events", 1000).model, "gpt-3.5-turbo")
+        # Too large for the small model's 15k context: the caller's model takes it
+        self.assertEqual(router.route("filter_events", 50000).model, "gpt-4-turbo")
+        self.assertEqual(router.route("superforecaster", 1000).model, "gpt-4-turbo")
+        # Nothing fits: the largest context in the chain is used
+        self.assertEqual(router.route("filter_events", 10**6).model, "gpt-4-turbo")
+
+    def test_explicit_routes(self):
+        routes = {
+            "superforecaster": {"model": "gpt-4o", "timeout": 90},
+            "polymarket_llm": ["gpt-3.5-turbo", {"model": "gpt-4o", "context_limit": 50000}],
+            "filter_events": {"timeout": 5},
+        }
+        router = ModelRouter("gpt-3.5-turbo-16k", default_timeout=30, routes=routes)
+        forecast = router.route("superforecaster")
+        self.assertEqual((forecast.model, forecast.timeout), ("gpt-4o", 90.0))
+        self.assertEqual(router.route("polymarket_llm", 20000).context_limit, 50000)
+        # A spec without a model is ignored
+        self.assertEqual(router.route("filter_events"), router.default_route)
+
+    def test_llm_routes_parsing(self):
+        raw = json.dumps({"superforecaster": "gpt-4o"})
+        self.assertEqual(trading_config._parse_llm_routes(raw), {"superforecaster": "gpt-4o"})
+        self.assertEqual(trading_config._parse_llm_routes("[1, 2]"), {})
+        self.assertEqual(trading_config._parse_llm_routes("{not json"), {})
+        self.assertEqual(trading_config._parse_llm_routes(""), {})
+
+
+class TestAnswersAgree(unittest.TestCase):
+    def test_side_and_value(self):
+        self.assertTrue(answers_agree("BUY at price 0.62, size 0.1", "buy, price:0.60, size 0.2"))
+        self.assertFalse(answers_agree("BUY at 0.62", "SELL at 0.62"))
+        self.assertFalse(answers_agree("likelihood 0.30", "likelihood 0.50"))
+
+    def test_plain_text(self):
+        self.assertTrue(answers_agree("Yes", " yes "))
+        self.assertFalse(answers_agree("Yes", "No"))
+
+
+class StubCompletions:
+    def __init__(self, answers):
+        self.answers = answers
+
+    async def create(self, model, messages, **kwargs):
+        answer = self.answers[model]
+        if isinstance(answer, Exception):
+            raise answer
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=answer))])
+
+
+class TestCompareRoutes(unittest.TestCase):
+    def test_report(self):
+        records = [{"call_site": "one_best_trade", "prompt": "p", "response": "BUY price 0.5"}] * 3
+        client = SimpleNamespace(chat=SimpleNamespace(completions=StubCompletions({
+            "same": "buy at 0.52",
+            "other": "sell at 0.5",
+            "down": TimeoutError("timed out"),
+        })))
+        report = asyncio.run(compare_routes(client, records, ["same", "other", "down"]))
+        self.assertEqual(report["same"]["agreement"], 1.0)
+        self.assertEqual(report["other"]["agreement"], 0.0)
+        self.assertEqual(report["down"]["errors"], 3)
+        self.assertIsNone(report["down"]["agreement"])
+
+    def test_load_recorded_prompts(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "prompts.jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"call_site": "filter_events", "prompt": "a"}) + "\n\nnot json\n")
+                f.write(json.dumps({"call_site": "superforecaster", "prompt": "b"}) + "\n")
+            self.assertEqual(len(load_recorded_prompts(path)), 2)
+            self.assertEqual(load_recorded_prompts(path, call_sites=["superforecaster"])[0]["prompt"], "b")
+
+
+if __name__ == "__main__":
+    unittest.main()
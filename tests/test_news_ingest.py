@@ -0,0 +1,174 @@
+import os
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+from agents.connectors.news_rag import NewsRAG
+from agents.connectors.vectorstores import STORES, StoreRegistry
+
+
+class _FakeVerge:
+    articles = []
+
+    def get_daily_news(self):
+        return list(self.articles)
+
+    def search_news(self, keyword, days_back=7):
+        return []
+
+
+def _article(i, body="body"):
+    return {"url": f"https://example.com/{i}", "title": f"Story {i}", "content": body, "published_at": "2026-10-01"}
+
+
+class TestIncrementalIngest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = mock.patch.dict(
+            os.environ, {"RAG_VECTOR_BACKEND": "numpy", "RAG_PERSIST": "true", "RAG_EMBEDDINGS": "local"}
+        )
+        self.env.start()
+        self.verge = mock.patch("agents.connectors.verge_news_mcp.VergeNewsMCPSync", _FakeVerge)
+        self.verge.start()
+
+    def tearDown(self):
+        STORES.clear()
+        self.verge.stop()
+        self.env.stop()
+        self.tmp.cleanup()
+
+    @staticmethod
+    def _counts(rag):
+        return {k: rag.last_ingest_report[k] for k in ("new", "updated", "skipped", "chunks_embedded")}
+
+    def test_rerun_skips_unchanged_and_replaces_changed(self):
+        _FakeVerge.articles = [_article(1), _article(2, "x" * 9000)]
+        rag = NewsRAG(self.tmp.name)
+        rag.ingest_news()
+        self.assertEqual(self._counts(rag), {"new": 2, "updated": 0, "skipped": 0, "chunks_embedded": 4})
+
+        # A new process reuses the on-disk ledger and store
+        STORES.clear()
+        _FakeVerge.articles = [_article(1), _article(2, "short now"), _article(3)]
+        rag = NewsRAG(self.tmp.name)
+        self.assertEqual(rag.ingest_news(), 2)
+        self.assertEqual(self._counts(rag), {"new": 1, "updated": 1, "skipped": 1, "chunks_embedded": 2})
+        # The shortened article's extra chunks are gone
+        self.assertEqual(rag._get_store().count(), 3)
+
+        rag.ingest_news()
+        self.assertEqual(rag.last_ingest_report["skipped"], 3)
+        self.assertEqual(rag.last_ingest_report["chunks_embedded"], 0)
+
+    def test_failed_run_resumes_from_last_checkpoint(self):
+        _FakeVerge.articles = [_article(i) for i in range(4)]
+        rag = NewsRAG(self.tmp.name)
+        inner = rag.embedding_function
+        calls = []
+
+        class Flaky:
+            def embed_documents(self, texts):
+                calls.append(texts)
+                if len(calls) == 3:
+                    raise RuntimeError("embedding backend down")
+                return inner.embed_documents(texts)
+
+        rag.embedding_function = Flaky()
+        with self.assertRaises(RuntimeError):
+            rag.ingest_news(batch_size=1, checkpoint_every=1)
+
+        STORES.clear()
+        rag = NewsRAG(self.tmp.name)
+        rag.ingest_news()
+        self.assertEqual(self._counts(rag), {"new": 2, "updated": 0, "skipped": 2, "chunks_embedded": 2})
+        self.assertEqual(set(rag.last_ingest_report["stages"]), {"fetch", "normalize", "chunk", "embed", "upsert"})
+
+    def test_syndicated_copies_are_not_embedded_again(self):
+        story = " ".join(f"word{i}" for i in range(400))
+        _FakeVerge.articles = [_article(1, story)]
+        NewsRAG(self.tmp.name).ingest_news()
+
+        # Same story under another URL with a changed byline, in a later run
+        copy = dict(_article(2, story + " reporting by someone else"), title="Story 1")
+        _FakeVerge.articles = [_article(1, story), copy, _article(3, "something different entirely")]
+        rag = NewsRAG(self.tmp.name)
+        rag.ingest_news()
+        self.assertEqual(rag.last_ingest_report["chunks_near_duplicate"], 1)
+        self.assertEqual(rag.last_ingest_report["chunks_embedded"], 1)
+        self.assertEqual({m["url"] for m, _ in rag.query_news("word10 word11", top_k=5)}, {_article(1)["url"], _article(3)["url"]})
+
+        # The all-duplicate article is recorded, so the next run skips it
+        rag.ingest_news()
+        self.assertEqual(rag.last_ingest_report["skipped"], 3)
+
+    def test_retention_and_recency_window(self):
+        now = datetime.now(timezone.utc)
+        _FakeVerge.articles = [
+            dict(_article(i, f"election poll update {i}"), published_at=(now - timedelta(days=d)).isoformat())
+            for i, d in ((1, 1), (2, 10), (3, 40))
+        ]
+        with mock.patch.dict(os.environ, {"NEWS_PARTITION": "week", "NEWS_RETENTION_DAYS": "30"}):
+            rag = NewsRAG(self.tmp.name)
+            rag.ingest_news()
+        self.assertEqual(rag.last_ingest_report["expired"], 1)
+        self.assertEqual(rag.last_ingest_report["new"], 2)
+        recent = rag.query_news("election poll", top_k=5, max_age_days=5)
+        self.assertEqual([m["url"] for m, _ in recent], [_article(1)["url"]])
+        self.assertEqual(len(rag.query_news("election poll", top_k=5)), 2)
+
+    def test_in_memory_store_is_shared_across_instances(self):
+        _FakeVerge.articles = [_article(1, "central bank raises rates")]
+        with mock.patch.dict(os.environ, {"RAG_PERSIST": "false"}):
+            NewsRAG(self.tmp.name).ingest_news()
+            other = NewsRAG(os.path.join(self.tmp.name, "other"))
+            self.assertEqual([m["url"] for m, _ in other.query_news("central bank")], [_article(1)["url"]])
+            self.assertIs(other._get_store(), NewsRAG()._get_store())
+            # The shared ledger already knows the article
+            other.ingest_news()
+            self.assertEqual(other.last_ingest_report["skipped"], 1)
+
+    def test_query_cache_until_the_collection_changes(self):
+        _FakeVerge.articles = [_article(1, "central bank raises rates")]
+        rag = NewsRAG(self.tmp.name)
+        rag.ingest_news()
+        first = rag.query_news("central bank", top_k=5)
+        with mock.patch.object(rag.embedding_function, "embed_documents", side_effect=AssertionError("not cached")):
+            self.assertEqual(rag.query_news("central bank", top_k=5), first)
+        first[0][0]["title"] = "edited by caller"
+        self.assertEqual(rag.query_news("central bank", top_k=5)[0][0]["title"], "Story 1")
+
+        _FakeVerge.articles.append(_article(2, "central bank holds rates"))
+        rag.ingest_news()
+        self.assertEqual(len(rag.query_news("central bank", top_k=5)), 2)
+
+    def test_query_cache_sees_writes_from_another_process(self):
+        _FakeVerge.articles = [_article(1, "central bank raises rates")]
+        rag = NewsRAG(self.tmp.name)
+        rag.ingest_news()
+        self.assertEqual(len(rag.query_news("central bank", top_k=5)), 1)
+
+        # A CLI ingest in another process: its own registry, so its own handles on the same files
+        other = StoreRegistry()
+        with mock.patch("agents.connectors.vectorstores.STORES", other), \
+                mock.patch("agents.connectors.news_rag.STORES", other):
+            _FakeVerge.articles = [_article(2, "central bank holds rates")]
+            NewsRAG(self.tmp.name).ingest_news()
+
+        self.assertEqual(len(rag.query_news("central bank", top_k=5)), 2)
+
+    def test_query_cache_ttl(self):
+        _FakeVerge.articles = [_article(1, "central bank raises rates")]
+        with mock.patch.dict(os.environ, {"NEWS_QUERY_CACHE_TTL_SECS": "0.05"}):
+            rag = NewsRAG(self.tmp.name)
+        rag.ingest_news()
+        rag.query_news("central bank")
+        with mock.patch("agents.connectors.news_rag.time.monotonic", return_value=time.monotonic() + 1):
+            with mock.patch.object(rag.embedding_function, "embed_documents", side_effect=AssertionError("expired")):
+                with self.assertRaises(AssertionError):
+                    rag.query_news("central bank")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from agents.connectors.chroma import MARKETS_COLLECTION
+from agents.connectors.news_rag import NewsRAG
+from agents.connectors.vectorstores import STORES, NumpyVectorStore
+
+
+class TestLinkNewsToMarkets(unittest.TestCase):
+    def setUp(self):
+        # In-memory collections are process-wide
+        STORES.clear()
+        self.addCleanup(STORES.clear)
+
+    def test_links_every_article_across_blocks(self):
+        rng = np.random.default_rng(0)
+        markets = np.eye(8, 16, dtype=np.float32)
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(
+            os.environ, {"RAG_VECTOR_BACKEND": "numpy", "RAG_PERSIST": "false"}
+        ):
+            store = NumpyVectorStore(MARKETS_COLLECTION, tmp)
+            store.upsert(
+                [str(i) for i in range(8)],
+                markets,
+                [{"id": i, "question": f"market {i}"} for i in range(8)],
+                [f"market {i}" for i in range(8)],
+            )
+            store.persist()
+
+            rag = NewsRAG(os.path.join(tmp, "news"))
+            # 30 articles x 2 chunks; article a matches market a % 8 through its second chunk only
+            ids, vectors, metadatas = [], [], []
+            for a in range(30):
+                for c in range(2):
+                    target = markets[a % 8] if c == 1 else rng.standard_normal(16).astype(np.float32) * 0.01
+                    ids.append(f"h{a}:{c}")
+                    vectors.append(target)
+                    metadatas.append({"url_hash": f"h{a}", "title": f"news {a}", "chunks_total": 2})
+            rag._get_store().upsert(ids, vectors, metadatas, ["text"] * len(ids))
+
+            out = rag.link_news_to_markets(
+                markets_persist_dir=tmp,
+                top_k=3,
+                min_relevance=0.9,
+                output_path=os.path.join(tmp, "links.json"),
+                block_size=7,
+            )
+            with open(out, "r", encoding="utf-8") as f:
+                links = json.load(f)
+
+        self.assertEqual(len(links), 30)
+        for a in range(30):
+            top = links[f"h{a}"]["top_markets"]
+            self.assertEqual([m["market_id"] for m in top], [a % 8])
+            self.assertAlmostEqual(top[0]["rel"], 1.0, places=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import threading
+import time
+import unittest
+
+from agents.utils.pipeline import Pipeline, Stage
+
+
+class TestPipeline(unittest.TestCase):
+    def test_batches_flush_and_backpressure(self):
+        produced = []
+        lock = threading.Lock()
+        consumed = []
+
+        def source():
+            for i in range(200):
+                with lock:
+                    produced.append(i)
+                yield i
+
+        buffer = []
+
+        def batch(item):
+            buffer.append(item)
+            if len(buffer) == 16:
+                yield list(buffer)
+                buffer.clear()
+
+        def flush():
+            if buffer:
+                yield list(buffer)
+
+        lead = []
+
+        def sink(items):
+            time.sleep(0.002)
+            with lock:
+                # How far the source ran ahead of the slow consumer
+                lead.append(len(produced) - len(consumed) * 16)
+            consumed.append(items)
+            return ()
+
+        pipeline = Pipeline(source(), [Stage("batch", batch, flush=flush), Stage("sink", sink)], maxsize=2)
+        report = pipeline.run()
+        self.assertEqual(sum(consumed, []), list(range(200)))
+        self.assertEqual(report["sink"]["items"], 13)
+        # source -> queue(2) -> batch (16 buffered + 1 in hand) -> queue(2 batches) -> sink
+        self.assertLessEqual(max(lead), 2 + 17 + 3 * 16)
+
+    def test_error_stops_everything(self):
+        def boom(item):
+            if item == 5:
+                raise ValueError("bad item")
+            yield item
+
+        pipeline = Pipeline(iter(range(10**9)), [Stage("boom", boom), Stage("sink", lambda x: ())])
+        with self.assertRaises(ValueError):
+            pipeline.run()
+
+    def test_close_source(self):
+        taken = []
+
+        def take(item):
+            taken.append(item)
+            if len(taken) == 3:
+                pipeline.close_source()
+            return ()
+
+        pipeline = Pipeline(iter(range(10**9)), [Stage("take", take)], maxsize=1)
+        report = pipeline.run()
+        self.assertLess(report["fetch"]["items"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+
+from agents.connectors.chroma import PolymarketRAG, market_documents
+from agents.connectors.vectorstores import NumpyVectorStore
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0, 0.5] for t in texts]
+
+
+def _markets(prices):
+    return [
+        {"id": i, "question": f"Question {i}?", "description": f"Market {i}", "outcomePrices": price}
+        for i, price in enumerate(prices)
+    ]
+
+
+class TestPolymarketRAGUpsert(unittest.TestCase):
+    def setUp(self):
+        self.embeddings = CountingEmbeddings()
+        self.rag = PolymarketRAG(embedding_function=self.embeddings)
+        self.store = NumpyVectorStore("markets")
+
+    def upsert(self, markets):
+        return self.rag._upsert_documents(self.store, market_documents(markets), "markets")
+
+    def test_price_changes_update_metadata_without_embedding(self):
+        self.upsert(_markets(['["0.4", "0.6"]', '["0.1", "0.9"]']))
+        self.assertEqual(len(self.embeddings.calls), 1)
+        version = self.store.version
+
+        keys = self.upsert(_markets(['["0.5", "0.5"]', '["0.1", "0.9"]']))
+        self.assertEqual(keys, ["0", "1"])
+        self.assertEqual(len(self.embeddings.calls), 1)
+        self.assertGreater(self.store.version, version)
+        self.assertEqual(self.store.get(ids=["0"])["metadatas"][0]["outcome_prices"], '["0.5", "0.5"]')
+
+    def test_changed_text_is_embedded_again(self):
+        self.upsert(_markets(['["0.4", "0.6"]']))
+        markets = _markets(['["0.4", "0.6"]'])
+        markets[0]["description"] = "Market 0, amended rules"
+        self.upsert(markets)
+        self.assertEqual(self.embeddings.calls[-1], ["Market 0, amended rules"])
+        self.assertEqual(self.store.get(ids=["0"])["documents"], ["Market 0, amended rules"])
+
+
+if __name__ == "__main__":
+    unittest.main()
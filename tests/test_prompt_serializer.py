@@ -0,0 +1,47 @@
+import unittest
+
+from agents.utils.prompt_serializer import PromptSerializer, token_savings_report
+
+
+MARKET = {
+    "id": 12,
+    "question": "Will BTC close above $100k?",
+    "outcomes": '["Yes", "No"]',
+    "outcomePrices": '["0.455", "0.545"]',
+    "volume": "9876.5",
+    "endDate": "2026-03-31T12:00:00Z",
+    "image": "https://polymarket-upload.s3.amazonaws.com/btc.png",
+    "marketMakerAddress": "0x0000000000000000000000000000000000000000",
+    "description": "Resolves\tYes if\nthe daily close is above $100,000.",
+}
+
+
+class TestPromptSerializer(unittest.TestCase):
+    def test_projects_and_formats_market_row(self):
+        table = PromptSerializer().markets_table([MARKET])
+        legend, header, row = table.split("\n")
+        self.assertTrue(legend.startswith("(id=market id"))
+        self.assertEqual(header.split("\t"), ["id", "q", "o", "p", "vol", "end", "d"])
+        cells = row.split("\t")
+        self.assertEqual(cells[2:6], ["Yes/No", "0.455/0.545", "9.88k", "2026-03-31"])
+        self.assertNotIn("0x000", table)
+        self.assertNotIn("s3.amazonaws", table)
+
+    def test_event_markets_are_reduced_to_ids(self):
+        event = {"id": 7, "title": "Bitcoin in March", "markets": [MARKET, dict(MARKET, id=13)]}
+        row = PromptSerializer().events_table([event]).split("\n")[2]
+        self.assertEqual(row.split("\t")[-1], "12,13")
+        self.assertNotIn("0x000", row)
+
+    def test_markdown_and_truncation(self):
+        table = PromptSerializer(fmt="md", max_desc_chars=10).markets_table([MARKET])
+        self.assertIn("| id | q |", table)
+        self.assertIn("Resolves…", table)
+
+    def test_compact_is_smaller(self):
+        report = token_savings_report([], [MARKET] * 50)
+        self.assertLess(report["compact_tokens"], report["legacy_tokens"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,298 @@
+import os
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+
+from agents.connectors.vectorstores import (
+    STORES,
+    NumpyVectorStore,
+    PartitionedVectorStore,
+    create_vector_store,
+    open_partitioned_store,
+    open_vector_store,
+)
+
+
+class TestNumpyVectorStore(unittest.TestCase):
+    def setUp(self):
+        self.store = NumpyVectorStore("t")
+        self.store.upsert(
+            ["a", "b", "c"],
+            [[1, 0, 0], [0, 1, 0], [1, 1, 0]],
+            [{"doc_key": "a", "ts": 1}, {"doc_key": "b", "ts": 2}, {"doc_key": "c", "ts": 3}],
+            ["doc a", "doc b", "doc c"],
+        )
+
+    def test_query_order_distance_and_filter(self):
+        hits = self.store.query([1, 0, 0], k=2)
+        self.assertEqual([d.page_content for d, _ in hits], ["doc a", "doc c"])
+        self.assertAlmostEqual(hits[0][1], 0.0, places=6)
+        self.assertAlmostEqual(hits[1][1], 1 - 1 / np.sqrt(2), places=6)
+        filtered = self.store.query([1, 0, 0], k=5, where={"ts": {"$gte": 2}})
+        self.assertEqual([d.metadata["doc_key"] for d, _ in filtered], ["c", "b"])
+        batched = self.store.query_many([[0, 1, 0], [1, 0, 0]], k=1)
+        self.assertEqual([h[0][0].metadata["doc_key"] for h in batched], ["b", "a"])
+
+    def test_upsert_delete_keep_rows_consistent(self):
+        self.store.upsert(["a"], [[0, 0, 1]], [{"doc_key": "a"}], ["new a"])
+        self.store.delete(["b"])
+        self.assertEqual(self.store.count(), 2)
+        self.assertEqual(self.store.get(ids=["a", "b"])["documents"], ["new a"])
+        self.assertEqual(self.store.query([0, 0, 1], k=1)[0][0].page_content, "new a")
+
+    def test_in_and_nin_filters(self):
+        in_keys = {"doc_key": {"$in": ["a", "c", "zz"]}}
+        hits = self.store.query([1, 0, 0], k=5, where=in_keys)
+        self.assertEqual([d.id for d, _ in hits], ["a", "c"])
+        # The caller's filter is left as given
+        self.assertEqual(in_keys, {"doc_key": {"$in": ["a", "c", "zz"]}})
+        keys = in_keys["doc_key"]["$in"]
+        where = {"$and": [{"doc_key": {"$nin": ("a",)}}, {"$or": [{"ts": 2}, {"doc_key": {"$in": keys}}]}]}
+        self.assertEqual(sorted(self.store.get(where=where)["ids"]), ["b", "c"])
+        self.assertEqual(self.store.get(where={"doc_key": {"$in": [["unhashable"]]}})["ids"], [])
+
+    def test_update_metadata_keeps_vectors(self):
+        version = self.store.version
+        self.store.update_metadata(["a", "missing"], [{"doc_key": "a", "ts": 9}, {"doc_key": "missing"}])
+        self.assertGreater(self.store.version, version)
+        self.assertEqual(self.store.get(ids=["a"])["metadatas"], [{"doc_key": "a", "ts": 9}])
+        self.assertEqual(self.store.get(ids=["a"])["documents"], ["doc a"])
+        self.assertEqual(self.store.query([1, 0, 0], k=1)[0][0].metadata["ts"], 9)
+        self.assertEqual(self.store.count(), 3)
+
+    def test_persist_and_reload(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = NumpyVectorStore("t", tmp)
+            store.upsert(["x", "y"], [[1, 0], [0, 1]], [{"k": 1}, {"k": 2}], ["x", "y"])
+            store.persist()
+            reopened = NumpyVectorStore("t", tmp)
+            self.assertEqual(reopened.count(), 2)
+            self.assertEqual(reopened.query([0, 1], k=1)[0][0].metadata, {"k": 2})
+            # First write after a memmap load copies the matrix
+            reopened.upsert(["z"], [[1, 1]], [{"k": 3}], ["z"])
+            ids, vectors, _, _ = next(reopened.iter_batches())
+            self.assertEqual(ids, ["x", "y", "z"])
+            self.assertEqual(vectors.shape, (3, 2))
+
+    def test_persist_appends_to_a_journal(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = NumpyVectorStore("t", tmp)
+            store.upsert(["x", "y", "z"], [[1, 0], [0, 1], [1, 1]], [{"k": 1}, {"k": 2}, {"k": 3}], ["x", "y", "z"])
+            store.persist()
+            snapshot = os.stat(os.path.join(tmp, "t", "meta.json")).st_mtime_ns
+            store.upsert(["w"], [[-1, 0]], [{"k": 4}], ["w"])
+            store.delete(["x"])
+            store.update_metadata(["y"], [{"k": 20}])
+            store.persist()
+            # Only the journal grew: the snapshot was not rewritten
+            self.assertEqual(os.stat(os.path.join(tmp, "t", "meta.json")).st_mtime_ns, snapshot)
+            with open(os.path.join(tmp, "t", "journal.jsonl"), "a", encoding="utf-8") as f:
+                f.write('{"torn": ')
+            store.upsert(["v"], [[0, -1]], [{"k": 5}], ["v"])
+            store.persist()
+
+            reopened = NumpyVectorStore("t", tmp)
+            self.assertEqual(sorted(reopened.ids()), ["v", "w", "y", "z"])
+            self.assertEqual(reopened.get(ids=["y"])["metadatas"], [{"k": 20}])
+            self.assertEqual(reopened.query([-1, 0], k=1)[0][0].id, "w")
+            self.assertEqual(reopened.query([0, -1], k=1)[0][0].id, "v")
+
+    def test_journal_is_compacted_into_the_snapshot(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = NumpyVectorStore("t", tmp)
+            ids = [f"n{i}" for i in range(1100)]
+            store.upsert(ids, [[1, i] for i in range(1100)])
+            store.persist()
+            journal = os.path.join(tmp, "t", "journal.jsonl")
+            store.upsert(ids[:600], [[i, 1] for i in range(600)])
+            store.persist()
+            self.assertTrue(os.path.exists(journal))
+            # Rewriting the same rows again pushes the journal past the snapshot size
+            store.upsert(ids[:600], [[i, 2] for i in range(600)])
+            store.persist()
+            self.assertFalse(os.path.exists(journal))
+            reopened = NumpyVectorStore("t", tmp)
+            self.assertEqual(reopened.count(), 1100)
+            batch_ids, vectors, _, _ = next(reopened.iter_batches())
+            np.testing.assert_allclose(vectors[batch_ids.index("n0")], [0, 1])
+
+
+class TestInt8Quantization(unittest.TestCase):
+    def _corpus(self, n=500, dim=64):
+        rng = np.random.default_rng(1)
+        corpus = rng.standard_normal((n, dim)).astype(np.float32)
+        return [str(i) for i in range(n)], corpus, corpus[:20] + 0.05 * rng.standard_normal((20, dim))
+
+    def test_recall_and_memory(self):
+        ids, corpus, queries = self._corpus()
+        exact = NumpyVectorStore("f")
+        quant = NumpyVectorStore("q", quantization="int8")
+        for store in (exact, quant):
+            store.upsert(ids, corpus)
+        truth = [{d.id for d, _ in hits} for hits in exact.query_many(queries, k=10)]
+        got = [{d.id for d, _ in hits} for hits in quant.query_many(queries, k=10)]
+        recall = np.mean([len(a & b) / 10 for a, b in zip(truth, got)])
+        self.assertGreater(recall, 0.9)
+        self.assertLess(quant.memory_bytes(), exact.memory_bytes() / 3)
+
+    def test_rerank_persist_and_mode_switch(self):
+        ids, corpus, queries = self._corpus()
+        with tempfile.TemporaryDirectory() as tmp:
+            store = NumpyVectorStore("q", tmp, quantization="int8")
+            store.upsert(ids, corpus, [{"i": i} for i in ids])
+            store.delete(["0"])
+            store.persist()
+            reopened = NumpyVectorStore("q", tmp, quantization="int8")
+            self.assertEqual(reopened.count(), len(ids) - 1)
+            top = reopened.query(corpus[5], k=1)[0]
+            self.assertEqual(top[0].id, "5")
+            self.assertAlmostEqual(top[1], 0.0, places=5)  # re-ranked on float vectors
+            as_float = NumpyVectorStore("q", tmp)
+            self.assertEqual(as_float.query(corpus[7], k=1)[0][0].id, "7")
+
+            # Journaled deletes move rows; vectors.f32 must still line up after a replay
+            reopened.delete(["1"])
+            reopened.upsert(["new"], corpus[9:10] * -1)
+            reopened.delete(["2"])
+            reopened.persist()
+            replayed = NumpyVectorStore("q", tmp, quantization="int8")
+            self.assertEqual(replayed.count(), len(ids) - 2)
+            for i in (5, len(ids) - 1, len(ids) - 2):
+                top = replayed.query(corpus[i], k=1)[0]
+                self.assertEqual(top[0].id, str(i))
+                self.assertAlmostEqual(top[1], 0.0, places=5)
+            self.assertEqual(replayed.query(-corpus[9], k=1)[0][0].id, "new")
+
+
+class TestPartitionedVectorStore(unittest.TestCase):
+    DAY = 86400.0
+    NOW = 1_760_054_400.0 + 43200  # noon UTC keeps partition boundaries deterministic
+
+    def test_window_planning_expiry_and_reopen(self):
+        vectors = np.eye(10, 10, dtype=np.float32)
+        ids = [f"n{i}" for i in range(10)]
+        metadatas = [{"published_ts": self.NOW - i * self.DAY} for i in range(10)]
+        with tempfile.TemporaryDirectory() as tmp:
+            store = PartitionedVectorStore("news", tmp, "day", retention_days=5, backend="numpy")
+            store.upsert(ids, vectors, metadatas, ids)
+            store.persist()
+            self.assertEqual(len(store.partitions()), 10)
+
+            window = {"published_ts": {"$gte": self.NOW - 2.5 * self.DAY}}
+            self.assertEqual(len(store._planned(window)), 3)
+            self.assertEqual(store.query(vectors[1], k=1, where=window)[0][0].id, "n1")
+            self.assertEqual(store.query(vectors[7], k=1, where=window)[0][1], 1.0)  # out-of-window rows never scored
+
+            # Moving a row to another day leaves no copy behind
+            store.upsert(["n9"], vectors[9:], [{"published_ts": self.NOW}], ["n9"])
+            self.assertEqual(store.count(), 10)
+            store.persist()
+
+            reopened = PartitionedVectorStore("news", tmp, "day", retention_days=5, backend="numpy")
+            self.assertEqual(reopened.count(), 10)
+            expired = reopened.expire(now=self.NOW)
+            self.assertEqual(sorted(expired), ["n6", "n7", "n8"])
+            self.assertEqual(reopened.count(), 7)
+            self.assertEqual(len(PartitionedVectorStore("news", tmp, "day", backend="numpy").partitions()), 6)
+
+    def test_writes_open_only_the_partitions_holding_the_rows(self):
+        vectors = np.eye(10, 10, dtype=np.float32)
+        ids = [f"n{i}" for i in range(10)]
+        with tempfile.TemporaryDirectory() as tmp:
+            store = PartitionedVectorStore("news", tmp, "day", backend="numpy")
+            store.upsert(ids, vectors, [{"published_ts": self.NOW - i * self.DAY} for i in range(10)], ids)
+            store.persist()
+
+            reopened = PartitionedVectorStore("news", tmp, "day", backend="numpy")
+            reopened.upsert(["fresh"], vectors[:1], [{"published_ts": self.NOW}], ["fresh"])
+            self.assertEqual(list(reopened._stores), [reopened._partition_for(self.NOW)[0]])
+            # Moving n9 opens its old partition; deleting n3 opens only n3's
+            reopened.upsert(["n9"], vectors[9:], [{"published_ts": self.NOW}], ["n9"])
+            reopened.delete(["n3", "missing"])
+            self.assertEqual(len(reopened._stores), 3)
+            self.assertEqual(reopened.count(), 10)
+            self.assertEqual(reopened.get(ids=["n9", "n3"])["ids"], ["n9"])
+            reopened.update_metadata(["n5"], [{"published_ts": self.NOW - 5 * self.DAY, "tag": "x"}])
+            self.assertEqual(len(reopened._stores), 4)
+            self.assertEqual(reopened.get(ids=["n5"])["metadatas"][0]["tag"], "x")
+            self.assertEqual(reopened.query(vectors[9], k=1)[0][0].id, "n9")
+
+
+class TestStoreRegistry(unittest.TestCase):
+    def setUp(self):
+        STORES.clear()
+        self.addCleanup(STORES.clear)
+
+    def test_concurrent_opens_share_one_handle(self):
+        opened = []
+        barrier = threading.Barrier(8)
+
+        def worker():
+            barrier.wait()
+            opened.append(open_vector_store("shared", backend="numpy"))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len({id(s) for s in opened}), 1)
+        opened[0].upsert(["a"], np.ones((1, 4), dtype=np.float32))
+        self.assertEqual(open_vector_store("shared", backend="numpy").count(), 1)
+
+    def test_keys_separate_directories_and_backends(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            on_disk = open_vector_store("c", tmp, backend="numpy")
+            self.assertIs(open_vector_store("c", tmp + "/.", backend="numpy"), on_disk)
+            self.assertIsNot(open_vector_store("c", backend="numpy"), on_disk)
+            self.assertIsNot(open_vector_store("c", tmp, backend="numpy-int8"), on_disk)
+            partitioned = open_partitioned_store("c", tmp, retention_days=7, backend="numpy")
+            self.assertIs(open_partitioned_store("c", tmp, retention_days=30, backend="numpy"), partitioned)
+            self.assertEqual(partitioned.retention_days, 30)
+
+    def test_shared_handles_reload_what_another_process_persisted(self):
+        vectors = np.eye(4, 4, dtype=np.float32)
+        with tempfile.TemporaryDirectory() as tmp:
+            shared = open_vector_store("c", tmp, backend="numpy")
+            shared.upsert(["a"], vectors[:1])
+            shared.persist()
+            STORES.get_or_create(("bm25", shared), lambda: "index over a")
+            version = shared.version
+            # Own writes do not count as foreign ones
+            self.assertIs(open_vector_store("c", tmp, backend="numpy"), shared)
+            self.assertEqual(shared.version, version)
+            self.assertIsNotNone(STORES.get(("bm25", shared)))
+
+            # Another process: its own handle on the same files
+            other = create_vector_store("c", tmp, backend="numpy")
+            other.upsert(["b"], vectors[1:2])
+            other.persist()
+            self.assertIs(open_vector_store("c", tmp, backend="numpy"), shared)
+            self.assertEqual(shared.count(), 2)
+            self.assertGreater(shared.version, version)
+            self.assertIsNone(STORES.get(("bm25", shared)))
+
+    def test_shared_partitioned_store_sees_new_partitions(self):
+        day = TestPartitionedVectorStore.DAY
+        now = TestPartitionedVectorStore.NOW
+        vectors = np.eye(4, 4, dtype=np.float32)
+        with tempfile.TemporaryDirectory() as tmp:
+            shared = open_partitioned_store("news", tmp, "day", backend="numpy")
+            shared.upsert(["old"], vectors[:1], [{"published_ts": now - 3 * day}])
+            shared.persist()
+
+            other = PartitionedVectorStore("news", tmp, "day", backend="numpy")
+            other.upsert(["new"], vectors[1:2], [{"published_ts": now}])
+            other.upsert(["old"], vectors[:1], [{"published_ts": now}])
+            other.persist()
+            self.assertIs(open_partitioned_store("news", tmp, "day", backend="numpy"), shared)
+            self.assertEqual(sorted(shared.ids()), ["new", "old"])
+            self.assertEqual(len(shared.partitions()), 2)
+            window = {"published_ts": {"$gte": now - day}}
+            self.assertEqual({d.id for d, _ in shared.query(vectors[0], k=5, where=window)}, {"new", "old"})
+
+
+if __name__ == "__main__":
+    unittest.main()
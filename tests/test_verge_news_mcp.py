@@ -0,0 +1,87 @@
+import asyncio
+import json
+import unittest
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+from agents.connectors.mcp_cache import MCPToolCache
+from agents.connectors.verge_news_mcp import VergeNewsMCPSync
+from agents.utils.async_runtime import run_sync
+
+
+class _FakeSession:
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = []
+        self.closed = False
+
+    async def call_tool(self, name, args):
+        self.calls.append(args["keyword"])
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # Later keywords answer first
+            await asyncio.sleep(0.05 / len(self.calls))
+            if args["keyword"] == "boom":
+                raise RuntimeError("tool failed")
+            item = {"title": f"about {args['keyword']}", "url": f"https://x/{args['keyword']}"}
+            return SimpleNamespace(content=[SimpleNamespace(text=json.dumps([item]))])
+        finally:
+            self.in_flight -= 1
+
+
+
+class TestSearchMany(unittest.TestCase):
+    def setUp(self):
+        self.session = _FakeSession()
+        self.connects = 0
+
+        @asynccontextmanager
+        async def connect():
+            self.connects += 1
+            try:
+                yield self.session
+            finally:
+                self.session.closed = True
+
+        self.sync = VergeNewsMCPSync(api_key="test", connect=connect, cache=MCPToolCache())
+        self.sync.client.pool_size = 1
+        self.addCleanup(lambda: run_sync(self.sync.client.aclose()))
+
+    def test_one_session_bounded_concurrency(self):
+        keywords = [f"kw{i}" for i in range(8)] + ["boom"]
+        results = dict(self.sync.iter_search_many(keywords, days_back=3, concurrency=3))
+        self.assertEqual(self.connects, 1)
+        self.assertEqual(self.session.max_in_flight, 3)
+        self.assertEqual(set(results), set(keywords))
+        self.assertEqual(results["kw5"][0]["title"], "about kw5")
+        self.assertIn("Fallback", results["boom"][0]["source"])
+        # The session outlives the call and serves the next one
+        self.assertFalse(self.session.closed)
+        self.assertEqual(self.sync.search_news("later")[0]["title"], "about later")
+        self.assertEqual(self.connects, 1)
+        run_sync(self.sync.client.aclose())
+        self.assertTrue(self.session.closed)
+
+    def test_early_stop_cancels_the_rest(self):
+        it = self.sync.iter_search_many([f"kw{i}" for i in range(20)], concurrency=2)
+        next(it)
+        it.close()
+        calls = len(self.session.calls)
+        self.assertLess(calls, 20)
+        self.assertEqual(self.sync.search_news("after")[0]["title"], "about after")
+        self.assertEqual(len(self.session.calls), calls + 1)
+
+    def test_cached_keywords_skip_the_server(self):
+        dict(self.sync.iter_search_many(["kw0", "kw1"], days_back=3))
+        other = VergeNewsMCPSync(api_key="test", connect=self.sync.client.connect, cache=self.sync.client.cache)
+        self.assertEqual(other.search_news("kw1", days_back=3)[0]["title"], "about kw1")
+        results = dict(other.iter_search_many(["kw0", "kw1"], days_back=3))
+        self.assertEqual(results["kw0"][0]["title"], "about kw0")
+        self.assertEqual(self.session.calls, ["kw0", "kw1"])
+        self.assertEqual(self.connects, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()